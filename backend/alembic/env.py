@@ -41,7 +41,10 @@ from app.models import (
     ticket_update,  # noqa
     part,      # noqa
     ticket_part,  # noqa
-    service    # noqa
+    service,   # noqa
+    stock_movement,  # noqa
+    part_usage,  # noqa
+    notification  # noqa
 )
 
 target_metadata = Base.metadata
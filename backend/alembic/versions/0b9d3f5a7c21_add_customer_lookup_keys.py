@@ -0,0 +1,58 @@
+"""add_customer_lookup_keys
+
+Revision ID: 0b9d3f5a7c21
+Revises: f4a6d2e8b135
+Create Date: 2026-10-19 16:20:37.105482
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b9d3f5a7c21'
+down_revision: Union[str, None] = 'f4a6d2e8b135'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('phone_digits', sa.String(length=20), nullable=True))
+    op.add_column('customers', sa.Column('phone_digits_reversed', sa.String(length=20), nullable=True))
+    op.add_column('customers', sa.Column('email_normalized', sa.String(length=100), nullable=True))
+
+    # Backfill; digit extraction isn't portable SQL, so it's done here
+    connection = op.get_bind()
+    rows = []
+    for customer_id, phone, email in connection.execute(sa.text("SELECT id, phone, email FROM customers")):
+        digits = re.sub(r"\D", "", phone or "") or None
+        rows.append({
+            "id": customer_id,
+            "digits": digits,
+            "reversed": digits[::-1] if digits else None,
+            "email": (email or "").strip().lower() or None,
+        })
+    if rows:
+        connection.execute(
+            sa.text(
+                "UPDATE customers SET phone_digits = :digits, phone_digits_reversed = :reversed, "
+                "email_normalized = :email WHERE id = :id"
+            ),
+            rows,
+        )
+
+    op.create_index(op.f('ix_customers_phone_digits'), 'customers', ['phone_digits'], unique=False)
+    op.create_index(op.f('ix_customers_phone_digits_reversed'), 'customers', ['phone_digits_reversed'], unique=False)
+    op.create_index(op.f('ix_customers_email_normalized'), 'customers', ['email_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_customers_email_normalized'), table_name='customers')
+    op.drop_index(op.f('ix_customers_phone_digits_reversed'), table_name='customers')
+    op.drop_index(op.f('ix_customers_phone_digits'), table_name='customers')
+    op.drop_column('customers', 'email_normalized')
+    op.drop_column('customers', 'phone_digits_reversed')
+    op.drop_column('customers', 'phone_digits')
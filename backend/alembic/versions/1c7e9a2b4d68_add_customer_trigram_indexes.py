@@ -0,0 +1,41 @@
+"""add_customer_trigram_indexes
+
+Revision ID: 1c7e9a2b4d68
+Revises: 0b9d3f5a7c21
+Create Date: 2026-10-19 16:54:11.392705
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7e9a2b4d68'
+down_revision: Union[str, None] = '0b9d3f5a7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fuzzy customer search runs against pg_trgm on PostgreSQL; other
+    # databases use the in-process trigram index and need nothing here
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_customers_name_trgm', 'customers', ['name'],
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_customers_email_trgm', 'customers', ['email'],
+        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_customers_email_trgm', table_name='customers')
+    op.drop_index('ix_customers_name_trgm', table_name='customers')
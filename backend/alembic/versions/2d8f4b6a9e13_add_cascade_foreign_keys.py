@@ -0,0 +1,80 @@
+"""add_cascade_foreign_keys
+
+Revision ID: 2d8f4b6a9e13
+Revises: 1c7e9a2b4d68
+Create Date: 2026-10-19 17:42:36.518204
+
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8f4b6a9e13'
+down_revision: Union[str, None] = '1c7e9a2b4d68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table) from a customer down to its tickets' rows
+CASCADES = [
+    ('bikes', 'owner_id', 'customers'),
+    ('tickets', 'bike_id', 'bikes'),
+    ('ticket_parts', 'ticket_id', 'tickets'),
+    ('ticket_updates', 'ticket_id', 'tickets'),
+]
+# Names the unnamed constraints SQLite reflects, so batch mode can drop them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+# Full-text sync triggers on the rebuilt tables (SQLite only)
+FTS_TRIGGERS = {
+    'bikes': [
+        'CREATE TRIGGER IF NOT EXISTS bikes_fts_ai AFTER INSERT ON bikes BEGIN INSERT INTO bikes_fts(rowid, name, specs) VALUES (new.id, new.name, new.specs); END',
+        "CREATE TRIGGER IF NOT EXISTS bikes_fts_ad AFTER DELETE ON bikes BEGIN INSERT INTO bikes_fts(bikes_fts, rowid, name, specs) VALUES ('delete', old.id, old.name, old.specs); END",
+        "CREATE TRIGGER IF NOT EXISTS bikes_fts_au AFTER UPDATE OF name, specs ON bikes BEGIN INSERT INTO bikes_fts(bikes_fts, rowid, name, specs) VALUES ('delete', old.id, old.name, old.specs); INSERT INTO bikes_fts(rowid, name, specs) VALUES (new.id, new.name, new.specs); END",
+    ],
+    'tickets': [
+        'CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN INSERT INTO tickets_fts(rowid, ticket_number, problem_description, diagnosis) VALUES (new.id, new.ticket_number, new.problem_description, new.diagnosis); END',
+        "CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN INSERT INTO tickets_fts(tickets_fts, rowid, ticket_number, problem_description, diagnosis) VALUES ('delete', old.id, old.ticket_number, old.problem_description, old.diagnosis); END",
+        "CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF ticket_number, problem_description, diagnosis ON tickets BEGIN INSERT INTO tickets_fts(tickets_fts, rowid, ticket_number, problem_description, diagnosis) VALUES ('delete', old.id, old.ticket_number, old.problem_description, old.diagnosis); INSERT INTO tickets_fts(rowid, ticket_number, problem_description, diagnosis) VALUES (new.id, new.ticket_number, new.problem_description, new.diagnosis); END",
+    ],
+    'ticket_updates': [
+        'CREATE TRIGGER IF NOT EXISTS ticket_updates_fts_ai AFTER INSERT ON ticket_updates BEGIN INSERT INTO ticket_updates_fts(rowid, note) VALUES (new.id, new.note); END',
+        "CREATE TRIGGER IF NOT EXISTS ticket_updates_fts_ad AFTER DELETE ON ticket_updates BEGIN INSERT INTO ticket_updates_fts(ticket_updates_fts, rowid, note) VALUES ('delete', old.id, old.note); END",
+        "CREATE TRIGGER IF NOT EXISTS ticket_updates_fts_au AFTER UPDATE OF note ON ticket_updates BEGIN INSERT INTO ticket_updates_fts(ticket_updates_fts, rowid, note) VALUES ('delete', old.id, old.note); INSERT INTO ticket_updates_fts(rowid, note) VALUES (new.id, new.note); END",
+    ],
+}
+
+
+def _foreign_key_name(table: str, column: str) -> Optional[str]:
+    for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if foreign_key['constrained_columns'] == [column]:
+            return foreign_key['name']
+    return None
+
+
+def _replace_foreign_key(table: str, column: str, referred: str, ondelete: Optional[str]) -> None:
+    name = f'fk_{table}_{column}_{referred}'
+    existing = _foreign_key_name(table, column) or name
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(existing, type_='foreignkey')
+        batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+    if op.get_bind().dialect.name == 'sqlite':
+        # Batch mode rebuilt the table, which dropped its full-text sync
+        # triggers; row IDs are kept, so the indexes themselves still match
+        for statement in FTS_TRIGGERS.get(table, []):
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    for table, column, referred in CASCADES:
+        _replace_foreign_key(table, column, referred, 'CASCADE')
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+    op.create_index(op.f('ix_stock_movements_ticket_id'), 'stock_movements', ['ticket_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stock_movements_ticket_id'), table_name='stock_movements')
+    for table, column, referred in reversed(CASCADES):
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
+        _replace_foreign_key(table, column, referred, None)
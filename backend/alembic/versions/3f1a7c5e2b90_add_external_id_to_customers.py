@@ -0,0 +1,28 @@
+"""add_external_id_to_customers
+
+Revision ID: 3f1a7c5e2b90
+Revises: 2d8f4b6a9e13
+Create Date: 2026-10-19 18:15:02.847319
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a7c5e2b90'
+down_revision: Union[str, None] = '2d8f4b6a9e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('external_id', sa.String(length=50), nullable=True))
+    op.create_index(op.f('ix_customers_external_id'), 'customers', ['external_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_customers_external_id'), table_name='customers')
+    op.drop_column('customers', 'external_id')
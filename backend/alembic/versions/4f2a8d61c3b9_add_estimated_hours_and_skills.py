@@ -0,0 +1,28 @@
+"""add_estimated_hours_and_skills
+
+Revision ID: 4f2a8d61c3b9
+Revises: 9c1e4b7d2a10
+Create Date: 2026-10-19 10:03:17.520946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a8d61c3b9'
+down_revision: Union[str, None] = '9c1e4b7d2a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tickets', sa.Column('estimated_hours', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('skills', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'skills')
+    op.drop_column('tickets', 'estimated_hours')
@@ -0,0 +1,26 @@
+"""add_bench_hours_to_users
+
+Revision ID: 5b9d3f7a2c48
+Revises: 4a2c8e6f1d37
+Create Date: 2026-10-19 19:41:08.537214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9d3f7a2c48'
+down_revision: Union[str, None] = '4a2c8e6f1d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('bench_hours', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'bench_hours')
@@ -0,0 +1,29 @@
+"""add_backordered_to_ticket_parts
+
+Revision ID: 6e0c2b9f4d87
+Revises: d3a94f7e6b15
+Create Date: 2026-10-19 12:48:30.207115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e0c2b9f4d87'
+down_revision: Union[str, None] = 'd3a94f7e6b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'ticket_parts',
+        sa.Column('backordered', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('ticket_parts', 'backordered')
@@ -0,0 +1,28 @@
+"""add_version_to_tickets_and_parts
+
+Revision ID: 9c1e4b7d2a10
+Revises: 583a3db48731
+Create Date: 2026-10-19 09:12:44.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1e4b7d2a10'
+down_revision: Union[str, None] = '583a3db48731'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tickets', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('parts', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('parts', 'version')
+    op.drop_column('tickets', 'version')
@@ -0,0 +1,35 @@
+"""add_is_low_stock_to_parts
+
+Revision ID: a8f31c6d27e4
+Revises: 6e0c2b9f4d87
+Create Date: 2026-10-19 13:22:54.870316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8f31c6d27e4'
+down_revision: Union[str, None] = '6e0c2b9f4d87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'parts',
+        sa.Column('is_low_stock', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.execute(
+        "UPDATE parts SET is_low_stock = "
+        "(COALESCE(quantity, 0) <= COALESCE(reorder_point, 0))"
+    )
+    op.create_index(op.f('ix_parts_is_low_stock'), 'parts', ['is_low_stock'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_parts_is_low_stock'), table_name='parts')
+    op.drop_column('parts', 'is_low_stock')
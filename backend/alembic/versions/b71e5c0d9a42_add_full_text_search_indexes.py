@@ -0,0 +1,75 @@
+"""add_full_text_search_indexes
+
+Revision ID: b71e5c0d9a42
+Revises: 4f2a8d61c3b9
+Create Date: 2026-10-19 11:20:41.183052
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e5c0d9a42'
+down_revision: Union[str, None] = '4f2a8d61c3b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# External-content FTS5 tables, their sync triggers and the initial rebuild
+UPGRADE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(ticket_number, problem_description, diagnosis, content='tickets', content_rowid='id')",
+    'CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN INSERT INTO tickets_fts(rowid, ticket_number, problem_description, diagnosis) VALUES (new.id, new.ticket_number, new.problem_description, new.diagnosis); END',
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN INSERT INTO tickets_fts(tickets_fts, rowid, ticket_number, problem_description, diagnosis) VALUES ('delete', old.id, old.ticket_number, old.problem_description, old.diagnosis); END",
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF ticket_number, problem_description, diagnosis ON tickets BEGIN INSERT INTO tickets_fts(tickets_fts, rowid, ticket_number, problem_description, diagnosis) VALUES ('delete', old.id, old.ticket_number, old.problem_description, old.diagnosis); INSERT INTO tickets_fts(rowid, ticket_number, problem_description, diagnosis) VALUES (new.id, new.ticket_number, new.problem_description, new.diagnosis); END",
+    "INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS ticket_updates_fts USING fts5(note, content='ticket_updates', content_rowid='id')",
+    'CREATE TRIGGER IF NOT EXISTS ticket_updates_fts_ai AFTER INSERT ON ticket_updates BEGIN INSERT INTO ticket_updates_fts(rowid, note) VALUES (new.id, new.note); END',
+    "CREATE TRIGGER IF NOT EXISTS ticket_updates_fts_ad AFTER DELETE ON ticket_updates BEGIN INSERT INTO ticket_updates_fts(ticket_updates_fts, rowid, note) VALUES ('delete', old.id, old.note); END",
+    "CREATE TRIGGER IF NOT EXISTS ticket_updates_fts_au AFTER UPDATE OF note ON ticket_updates BEGIN INSERT INTO ticket_updates_fts(ticket_updates_fts, rowid, note) VALUES ('delete', old.id, old.note); INSERT INTO ticket_updates_fts(rowid, note) VALUES (new.id, new.note); END",
+    "INSERT INTO ticket_updates_fts(ticket_updates_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(name, email, phone, content='customers', content_rowid='id')",
+    'CREATE TRIGGER IF NOT EXISTS customers_fts_ai AFTER INSERT ON customers BEGIN INSERT INTO customers_fts(rowid, name, email, phone) VALUES (new.id, new.name, new.email, new.phone); END',
+    "CREATE TRIGGER IF NOT EXISTS customers_fts_ad AFTER DELETE ON customers BEGIN INSERT INTO customers_fts(customers_fts, rowid, name, email, phone) VALUES ('delete', old.id, old.name, old.email, old.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS customers_fts_au AFTER UPDATE OF name, email, phone ON customers BEGIN INSERT INTO customers_fts(customers_fts, rowid, name, email, phone) VALUES ('delete', old.id, old.name, old.email, old.phone); INSERT INTO customers_fts(rowid, name, email, phone) VALUES (new.id, new.name, new.email, new.phone); END",
+    "INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS bikes_fts USING fts5(name, specs, content='bikes', content_rowid='id')",
+    'CREATE TRIGGER IF NOT EXISTS bikes_fts_ai AFTER INSERT ON bikes BEGIN INSERT INTO bikes_fts(rowid, name, specs) VALUES (new.id, new.name, new.specs); END',
+    "CREATE TRIGGER IF NOT EXISTS bikes_fts_ad AFTER DELETE ON bikes BEGIN INSERT INTO bikes_fts(bikes_fts, rowid, name, specs) VALUES ('delete', old.id, old.name, old.specs); END",
+    "CREATE TRIGGER IF NOT EXISTS bikes_fts_au AFTER UPDATE OF name, specs ON bikes BEGIN INSERT INTO bikes_fts(bikes_fts, rowid, name, specs) VALUES ('delete', old.id, old.name, old.specs); INSERT INTO bikes_fts(rowid, name, specs) VALUES (new.id, new.name, new.specs); END",
+    "INSERT INTO bikes_fts(bikes_fts) VALUES ('rebuild')",
+]
+
+DOWNGRADE_STATEMENTS = [
+    'DROP TRIGGER IF EXISTS tickets_fts_ai',
+    'DROP TRIGGER IF EXISTS tickets_fts_ad',
+    'DROP TRIGGER IF EXISTS tickets_fts_au',
+    'DROP TABLE IF EXISTS tickets_fts',
+    'DROP TRIGGER IF EXISTS ticket_updates_fts_ai',
+    'DROP TRIGGER IF EXISTS ticket_updates_fts_ad',
+    'DROP TRIGGER IF EXISTS ticket_updates_fts_au',
+    'DROP TABLE IF EXISTS ticket_updates_fts',
+    'DROP TRIGGER IF EXISTS customers_fts_ai',
+    'DROP TRIGGER IF EXISTS customers_fts_ad',
+    'DROP TRIGGER IF EXISTS customers_fts_au',
+    'DROP TABLE IF EXISTS customers_fts',
+    'DROP TRIGGER IF EXISTS bikes_fts_ai',
+    'DROP TRIGGER IF EXISTS bikes_fts_ad',
+    'DROP TRIGGER IF EXISTS bikes_fts_au',
+    'DROP TABLE IF EXISTS bikes_fts',
+]
+
+
+def upgrade() -> None:
+    # FTS5 indexes are SQLite-only
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in UPGRADE_STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in DOWNGRADE_STATEMENTS:
+        op.execute(statement)
@@ -0,0 +1,48 @@
+"""add_parts_search_index
+
+Revision ID: d3a94f7e6b15
+Revises: b71e5c0d9a42
+Create Date: 2026-10-19 12:05:09.641270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a94f7e6b15'
+down_revision: Union[str, None] = 'b71e5c0d9a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Short prefix indexes keep two- and three-letter type-ahead queries cheap
+UPGRADE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5(name, category, sku, content='parts', content_rowid='id', prefix='2 3')",
+    'CREATE TRIGGER IF NOT EXISTS parts_fts_ai AFTER INSERT ON parts BEGIN INSERT INTO parts_fts(rowid, name, category, sku) VALUES (new.id, new.name, new.category, new.sku); END',
+    "CREATE TRIGGER IF NOT EXISTS parts_fts_ad AFTER DELETE ON parts BEGIN INSERT INTO parts_fts(parts_fts, rowid, name, category, sku) VALUES ('delete', old.id, old.name, old.category, old.sku); END",
+    "CREATE TRIGGER IF NOT EXISTS parts_fts_au AFTER UPDATE OF name, category, sku ON parts BEGIN INSERT INTO parts_fts(parts_fts, rowid, name, category, sku) VALUES ('delete', old.id, old.name, old.category, old.sku); INSERT INTO parts_fts(rowid, name, category, sku) VALUES (new.id, new.name, new.category, new.sku); END",
+    "INSERT INTO parts_fts(parts_fts) VALUES ('rebuild')",
+]
+
+DOWNGRADE_STATEMENTS = [
+    'DROP TRIGGER IF EXISTS parts_fts_ai',
+    'DROP TRIGGER IF EXISTS parts_fts_ad',
+    'DROP TRIGGER IF EXISTS parts_fts_au',
+    'DROP TABLE IF EXISTS parts_fts',
+]
+
+
+def upgrade() -> None:
+    # FTS5 indexes are SQLite-only
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in UPGRADE_STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in DOWNGRADE_STATEMENTS:
+        op.execute(statement)
@@ -0,0 +1,64 @@
+"""add_part_usage_rollups
+
+Revision ID: e2b7c4a91f56
+Revises: c5d8e1f04a39
+Create Date: 2026-10-19 15:12:40.218377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c4a91f56'
+down_revision: Union[str, None] = 'c5d8e1f04a39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'part_usage_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('part_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('cost', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['part_id'], ['parts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('part_id', 'day', name='uq_part_usage_daily_part_day')
+    )
+    op.create_index(op.f('ix_part_usage_daily_id'), 'part_usage_daily', ['id'], unique=False)
+    op.create_index(op.f('ix_part_usage_daily_day'), 'part_usage_daily', ['day'], unique=False)
+
+    op.create_table(
+        'part_usage_pending',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_part_usage_pending_id'), 'part_usage_pending', ['id'], unique=False)
+
+    op.create_index('ix_ticket_parts_created_at', 'ticket_parts', ['created_at'], unique=False)
+
+    # Queue every day that already has line items, so the first refresh rolls them up
+    op.execute(
+        "INSERT INTO part_usage_pending (day) "
+        "SELECT DISTINCT date(created_at) FROM ticket_parts"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ticket_parts_created_at', table_name='ticket_parts')
+    op.drop_index(op.f('ix_part_usage_pending_id'), table_name='part_usage_pending')
+    op.drop_table('part_usage_pending')
+    op.drop_index(op.f('ix_part_usage_daily_day'), table_name='part_usage_daily')
+    op.drop_index(op.f('ix_part_usage_daily_id'), table_name='part_usage_daily')
+    op.drop_table('part_usage_daily')
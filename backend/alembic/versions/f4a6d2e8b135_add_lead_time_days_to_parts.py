@@ -0,0 +1,26 @@
+"""add_lead_time_days_to_parts
+
+Revision ID: f4a6d2e8b135
+Revises: e2b7c4a91f56
+Create Date: 2026-10-19 15:48:03.641920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a6d2e8b135'
+down_revision: Union[str, None] = 'e2b7c4a91f56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('parts', sa.Column('lead_time_days', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('parts', 'lead_time_days')
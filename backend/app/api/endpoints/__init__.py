@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, users, customers, tickets, bikes, parts
+from app.api.endpoints import auth, users, customers, tickets, bikes, parts, technicians, search, export, analytics, schedule
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -8,4 +8,9 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(customers.router, prefix="/customers", tags=["customers"])
 api_router.include_router(bikes.router, prefix="/bikes", tags=["bikes"])
 api_router.include_router(tickets.router, prefix="/tickets", tags=["tickets"])
-api_router.include_router(parts.router, prefix="/parts", tags=["parts"])
\ No newline at end of file
+api_router.include_router(parts.router, prefix="/parts", tags=["parts"])
+api_router.include_router(technicians.router, prefix="/technicians", tags=["technicians"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(schedule.router, prefix="/schedule", tags=["schedule"])
\ No newline at end of file
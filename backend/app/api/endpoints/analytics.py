@@ -0,0 +1,93 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_active_user, get_current_admin_user, get_db
+from app.models.user import User
+from app.schemas.analytics import CategoryMargin, DeadStockPart, PartMover
+from app.services import part_usage
+
+router = APIRouter()
+
+
+@router.get(
+    "/parts/top-movers",
+    response_model=List[PartMover],
+    summary="Get top moving parts",
+    description="Get the parts with the most units used on tickets over a recent period, from the daily usage rollups."
+)
+def read_top_movers(
+    db: Session = Depends(get_db),
+    days: int = Query(30, ge=1, le=3650, description="Length of the period, ending today"),
+    limit: int = Query(10, ge=1, le=100),
+    category: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get the parts used most on tickets.
+
+    Parameters:
+    - **days**: Length of the period in days, ending today (default 30)
+    - **limit**: Maximum number of parts to return
+    - **category**: Only parts in this category
+
+    Returns:
+    - Parts with units used, revenue, cost and margin, most units first
+
+    Figures are as of the last rollup refresh.
+    """
+    return part_usage.top_movers(db, days=days, limit=limit, category=category)
+
+
+@router.get(
+    "/parts/dead-stock",
+    response_model=List[DeadStockPart],
+    summary="Get dead stock",
+    description="Get parts in stock that haven't been used on a ticket over a recent period, from the daily usage rollups."
+)
+def read_dead_stock(
+    db: Session = Depends(get_db),
+    days: int = Query(90, ge=1, le=3650, description="Length of the period, ending today"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get parts that are in stock but haven't moved.
+
+    Parameters:
+    - **days**: Length of the period in days, ending today (default 90)
+    - **limit**: Maximum number of parts to return
+
+    Returns:
+    - Unused parts with their stock value and the last day they were used,
+      most stock value first
+
+    Figures are as of the last rollup refresh.
+    """
+    return part_usage.dead_stock(db, days=days, limit=limit)
+
+
+@router.get(
+    "/parts/margin-by-category",
+    response_model=List[CategoryMargin],
+    summary="Get parts margin by category",
+    description="Get the revenue, cost and margin of parts used on tickets per category, from the daily usage rollups. Only accessible to admin users."
+)
+def read_margin_by_category(
+    db: Session = Depends(get_db),
+    days: int = Query(30, ge=1, le=3650, description="Length of the period, ending today"),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Get parts margin per category.
+
+    Parameters:
+    - **days**: Length of the period in days, ending today (default 30)
+
+    Returns:
+    - One entry per category, highest revenue first
+
+    Only accessible to admin users. Figures are as of the last rollup refresh.
+    """
+    return part_usage.margin_by_category(db, days=days)
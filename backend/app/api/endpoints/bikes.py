@@ -4,19 +4,25 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_current_admin_user, get_current_active_user, get_db
+from app.core.integrity import row_exists
 from app.models.user import User
 from app.models.bike import Bike
 from app.models.customer import Customer
-from app.schemas.bike import Bike as BikeSchema, BikeCreate, BikeUpdate, BikeWithTickets
+from app.models.ticket import Ticket
+from app.schemas.bike import Bike as BikeSchema, BikeCreate, BikeUpdate, BikeWithStats, BikeWithTickets, DeletionCounts
+from app.services import events
+from app.services.deletion import count_deletion, delete_cascade
+from app.services.stock import publish_parts_changed
+from app.services.service_history import open_ticket_status, ticket_stats
 
 router = APIRouter()
 
 
 @router.get(
     "/", 
-    response_model=List[BikeSchema],
+    response_model=List[BikeWithStats],
     summary="Get all bikes",
-    description="Retrieve all bikes with pagination and optional filtering by owner ID or name."
+    description="Retrieve all bikes with pagination and optional filtering by owner ID or name, optionally with each bike's service history totals."
 )
 def read_bikes(
     db: Session = Depends(get_db),
@@ -24,6 +30,7 @@ def read_bikes(
     limit: int = 100,
     owner_id: Optional[int] = None,
     name: Optional[str] = None,
+    include_stats: bool = Query(False, description="Include ticket count, last service date, open ticket status and lifetime spend"),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -34,9 +41,15 @@ def read_bikes(
     - **limit**: Maximum number of bikes to return (for pagination)
     - **owner_id**: Optional filter by customer/owner ID
     - **name**: Optional filter by bike name (case-insensitive partial match)
+    - **include_stats**: Also return each bike's ticket count, last service
+      date, status of its open ticket and lifetime spend
     
     Returns:
-    - List of bike objects
+    - List of bike objects, ordered by ID; the service history fields are
+      null unless include_stats is set
+    
+    The totals are computed in the same query as the page, from one grouped
+    subquery over the tickets of just the bikes on the page.
     """
     query = db.query(Bike)
     
@@ -45,9 +58,35 @@ def read_bikes(
         query = query.filter(Bike.owner_id == owner_id)
     if name:
         query = query.filter(Bike.name.ilike(f"%{name}%"))
-        
-    bikes = query.offset(skip).limit(limit).all()
-    return bikes
+
+    if not include_stats:
+        return query.order_by(Bike.id).offset(skip).limit(limit).all()
+
+    page_ids = query.with_entities(Bike.id).order_by(Bike.id).offset(skip).limit(limit)
+    stats = ticket_stats(page_ids.statement).subquery()
+    rows = (
+        query.add_columns(
+            stats.c.ticket_count,
+            stats.c.last_service_at,
+            open_ticket_status(Bike.id).label("open_ticket_status"),
+            stats.c.lifetime_spend,
+        )
+        .outerjoin(stats, stats.c.bike_id == Bike.id)
+        .order_by(Bike.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return [
+        BikeWithStats(
+            **BikeSchema.model_validate(bike).model_dump(),
+            ticket_count=ticket_count or 0,
+            last_service_at=last_service_at,
+            open_ticket_status=open_status,
+            lifetime_spend=round(lifetime_spend or 0.0, 2),
+        )
+        for bike, ticket_count, last_service_at, open_status, lifetime_spend in rows
+    ]
 
 
 @router.post(
@@ -76,8 +115,7 @@ def create_bike(
     - 404: If the specified customer/owner does not exist
     """
     # Verify owner exists
-    owner = db.query(Customer).filter(Customer.id == bike_in.owner_id).first()
-    if not owner:
+    if not row_exists(db, Customer.id == bike_in.owner_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found",
@@ -131,10 +169,12 @@ def read_bike(
     "/{bike_id}/with-tickets", 
     response_model=BikeWithTickets,
     summary="Get bike with tickets",
-    description="Get a specific bike with its associated service tickets."
+    description="Get a specific bike with a page of its service tickets, newest first."
 )
 def read_bike_with_tickets(
     bike_id: int,
+    tickets_skip: int = Query(0, ge=0),
+    tickets_limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -143,9 +183,12 @@ def read_bike_with_tickets(
     
     Parameters:
     - **bike_id**: ID of the bike to retrieve
+    - **tickets_skip**: Number of tickets to skip (for pagination)
+    - **tickets_limit**: Maximum number of tickets to return (default 100)
     
     Returns:
-    - Bike object with tickets list
+    - Bike object with a page of its tickets, newest first, and the total
+      number of tickets in ticket_count
     
     Raises:
     - 404: Bike not found
@@ -156,7 +199,19 @@ def read_bike_with_tickets(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bike not found",
         )
-    return bike
+
+    tickets = db.query(Ticket).filter(Ticket.bike_id == bike_id)
+    page = (
+        tickets.order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        .offset(tickets_skip)
+        .limit(tickets_limit)
+        .all()
+    )
+    return BikeWithTickets(
+        **BikeSchema.model_validate(bike).model_dump(),
+        tickets=page,
+        ticket_count=tickets.count(),
+    )
 
 
 @router.put(
@@ -195,8 +250,7 @@ def update_bike(
     
     # Check owner exists if changing owner
     if bike_in.owner_id is not None:
-        owner = db.query(Customer).filter(Customer.id == bike_in.owner_id).first()
-        if not owner:
+        if not row_exists(db, Customer.id == bike_in.owner_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Customer not found",
@@ -225,7 +279,10 @@ def delete_bike(
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
-    Delete a specific bike by ID.
+    Delete a specific bike by ID, with its tickets.
+    
+    Each table is cleared with one set-based DELETE, so the time taken
+    doesn't grow with the bike's service history.
     
     Parameters:
     - **bike_id**: ID of the bike to delete
@@ -245,6 +302,43 @@ def delete_bike(
             detail="Bike not found",
         )
     
-    db.delete(bike)
+    deleted = BikeSchema.model_validate(bike)
+    _, ticket_ids, part_ids = delete_cascade(db, bike_id=bike_id, user_id=current_user.id)
     db.commit()
-    return bike
\ No newline at end of file
+    for ticket_id in ticket_ids:
+        events.publish(events.TICKET_DELETED, ticket_id=ticket_id)
+    publish_parts_changed(db, part_ids)
+    return deleted
+
+
+@router.get(
+    "/{bike_id}/delete-preview",
+    response_model=DeletionCounts,
+    summary="Preview bike deletion",
+    description="Count the tickets, ticket updates and ticket parts that deleting a bike would remove, without deleting anything. Only accessible to admin users."
+)
+def preview_delete_bike(
+    bike_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Dry run of deleting a bike.
+    
+    Parameters:
+    - **bike_id**: ID of the bike
+    
+    Returns:
+    - Number of rows per table that deleting the bike would remove
+    
+    Raises:
+    - 404: Bike not found
+    
+    Only accessible to admin users.
+    """
+    if not db.query(Bike.id).filter(Bike.id == bike_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bike not found",
+        )
+    return count_deletion(db, bike_id=bike_id)
\ No newline at end of file
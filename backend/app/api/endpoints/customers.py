@@ -1,19 +1,38 @@
+import io
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status, Query
+from sqlalchemy.orm import Session, selectinload
 
 from app.core.deps import (
     get_current_admin_user, get_current_active_user, get_db
 )
 from app.models.user import User
-from app.models.customer import Customer
+from app.models.customer import Customer, normalize_email, normalize_phone
+from app.schemas.bike import Bike as BikeSchema, DeletionCounts
 from app.schemas.customer import (
+    BikeOverview,
     Customer as CustomerSchema,
     CustomerCreate,
+    CustomerImportResult,
+    CustomerMatch,
+    CustomerMergeRequest,
+    CustomerMergeResult,
+    CustomerOverview,
     CustomerUpdate,
-    CustomerWithBikes
+    CustomerWithBikes,
+    DuplicateCluster,
+    ImportFormat,
+    PhoneMatch
 )
+from app.services import events
+from app.services.customer_dedupe import external_id_conflicts, find_duplicate_customers, merge_customers
+from app.services.deletion import count_deletion, delete_cascade
+from app.services.stock import publish_parts_changed
+from app.services.customer_import import DEFAULT_CHUNK_SIZE, import_customers
+from app.services.customer_search import DEFAULT_MIN_SCORE, fuzzy_search_customers
+from app.services.filters import filter_customers
+from app.services.service_history import recent_tickets, ticket_stats
 
 router = APIRouter()
 
@@ -31,6 +50,7 @@ def read_customers(
     name: Optional[str] = None,
     email: Optional[str] = None,
     phone: Optional[str] = None,
+    phone_match: PhoneMatch = PhoneMatch.SUFFIX,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -41,20 +61,17 @@ def read_customers(
     - **limit**: Maximum number of customers to return (for pagination)
     - **name**: Optional filter by customer name (case-insensitive partial match)
     - **email**: Optional filter by customer email (case-insensitive partial match)
-    - **phone**: Optional filter by customer phone (case-insensitive partial match)
+    - **phone**: Optional filter by customer phone; only the digits are compared,
+      so "(555) 123-4567" and "555.123.4567" are the same number
+    - **phone_match**: How the phone digits must match: suffix (default, the
+      number ends with them), exact, or contains
     
     Returns:
     - List of customer objects
     """
-    query = db.query(Customer)
-
-    # Apply filters if provided
-    if name:
-        query = query.filter(Customer.name.ilike(f"%{name}%"))
-    if email:
-        query = query.filter(Customer.email.ilike(f"%{email}%"))
-    if phone:
-        query = query.filter(Customer.phone.ilike(f"%{phone}%"))
+    query = filter_customers(
+        db.query(Customer), name=name, email=email, phone=phone, phone_match=phone_match
+    )
 
     customers = query.offset(skip).limit(limit).all()
     return customers
@@ -91,9 +108,194 @@ def create_customer(
     db.add(customer)
     db.commit()
     db.refresh(customer)
+    events.publish(events.CUSTOMER_CHANGED, customer=customer)
     return customer
 
 
+@router.post(
+    "/import",
+    response_model=CustomerImportResult,
+    summary="Import customers and bikes",
+    description="Create customers and their bikes from an uploaded CSV or NDJSON file, e.g. an export from another system. Only accessible to admin users."
+)
+def import_customers_and_bikes(
+    *,
+    db: Session = Depends(get_db),
+    file: UploadFile = File(..., description="CSV file with a header row, or NDJSON"),
+    format: Optional[ImportFormat] = Query(None, description="File format; taken from the file name when omitted"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=5000),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Import customers and bikes in bulk.
+    
+    Each row is a customer or a bike, named by a **record** column. Rows are
+    written in chunks of **chunk_size**, each with one INSERT per table and
+    its own commit. Bikes find their owner by the owner's external ID or
+    email, so customers must come before their bikes. Customers whose
+    external ID was already imported, and bikes their owner already had under
+    the same name, are mapped to the existing record rather than created
+    again, so a failed import can be rerun.
+    
+    Parameters:
+    - **file**: UTF-8 CSV or NDJSON. Customer rows: name, email, phone, notes,
+      external_id. Bike rows: name, specs, owner_external_id or owner_email
+    - **format**: csv or ndjson; .ndjson and .jsonl files are read as NDJSON
+    - **chunk_size**: Rows written per transaction
+    
+    Returns:
+    - Counts of rows read, created and failed, the first row errors, and the
+      ID each imported row was given
+    
+    Raises:
+    - 400: The file is not UTF-8 encoded (chunks before the error stay imported)
+    
+    Only accessible to admin users.
+    """
+    if format is None:
+        name = (file.filename or "").lower()
+        format = ImportFormat.NDJSON if name.endswith((".ndjson", ".jsonl")) else ImportFormat.CSV
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = import_customers(db, stream, format=format, chunk_size=chunk_size)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The file must be UTF-8 encoded",
+        )
+    finally:
+        events.publish(events.CUSTOMERS_BULK_CHANGED)
+    return result
+
+
+@router.get(
+    "/fuzzy",
+    response_model=List[CustomerMatch],
+    summary="Fuzzy search customers",
+    description="Find customers whose name or email resembles the search text, tolerating typos, best matches first."
+)
+def fuzzy_search(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    min_score: float = Query(DEFAULT_MIN_SCORE, ge=0, le=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Find customers by approximate name or email.
+    
+    Candidates are ranked by trigram similarity, so misspellings such as
+    "Jon Smiht" still find "John Smith".
+    
+    Parameters:
+    - **q**: Search text (minimum 2 characters)
+    - **limit**: Maximum number of customers to return (default 20, max 100)
+    - **min_score**: Minimum similarity between 0 and 1 (default 0.3)
+    
+    Returns:
+    - Matching customers with their similarity score, best first
+    """
+    matches = fuzzy_search_customers(db, q, limit=limit, min_score=min_score)
+    return [
+        CustomerMatch(**CustomerSchema.model_validate(customer).model_dump(), score=round(score, 4))
+        for customer, score in matches
+    ]
+
+
+@router.get(
+    "/duplicates",
+    response_model=List[DuplicateCluster],
+    summary="Find duplicate customers",
+    description="Find clusters of customer records that are likely the same person, by phone, email and name. Only accessible to admin users."
+)
+def read_duplicate_customers(
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Find likely duplicate customers.
+    
+    Only customers sharing a phone number, an email or the words of their
+    name are compared, so this scales to the whole customers table.
+    
+    Parameters:
+    - **limit**: Maximum number of clusters to return (default 100)
+    
+    Returns:
+    - Clusters of customer IDs with the proposed survivor and the rules that
+      matched, largest clusters first
+    
+    Only accessible to admin users.
+    """
+    return find_duplicate_customers(db)[:limit]
+
+
+@router.post(
+    "/merge",
+    response_model=CustomerMergeResult,
+    summary="Merge customers",
+    description="Merge duplicate customers into one: their bikes move to the survivor, notes are combined and the duplicates are deleted. Only accessible to admin users."
+)
+def merge_duplicate_customers(
+    *,
+    db: Session = Depends(get_db),
+    merge_in: CustomerMergeRequest,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Merge a cluster of duplicate customers in one transaction.
+    
+    Parameters:
+    - **merge_in**: The customer to keep (survivor_id) and the customers to
+      fold into it (customer_ids)
+    
+    Returns:
+    - The survivor, the merged customer IDs and the number of bikes moved
+    
+    Raises:
+    - 400: No customers to merge besides the survivor
+    - 400: The customers were imported under different external IDs
+    - 404: Any of the customers not found
+    
+    Only accessible to admin users. The survivor keeps its own name and
+    contact details, taking the duplicates' phone or email only where its
+    own is missing.
+    """
+    loser_ids = sorted(set(merge_in.customer_ids) - {merge_in.survivor_id})
+    if not loser_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="List at least one customer to merge besides the survivor",
+        )
+    customers = {
+        customer.id: customer
+        for customer in db.query(Customer).filter(Customer.id.in_([merge_in.survivor_id, *loser_ids]))
+    }
+    missing = [customer_id for customer_id in [merge_in.survivor_id, *loser_ids] if customer_id not in customers]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Customers not found: {', '.join(map(str, missing))}",
+        )
+
+    conflicts = external_id_conflicts(customers.values())
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Customers have different external IDs: {', '.join(conflicts)}",
+        )
+
+    survivor = customers[merge_in.survivor_id]
+    result = merge_customers(db, survivor, [customers[customer_id] for customer_id in loser_ids])
+    db.commit()
+    db.refresh(survivor)
+    events.publish(events.CUSTOMER_CHANGED, customer=survivor)
+    for customer_id in result.merged_ids:
+        events.publish(events.CUSTOMER_DELETED, customer_id=customer_id)
+    return result
+
+
 @router.get(
     "/{customer_id}", 
     response_model=CustomerSchema,
@@ -158,6 +360,74 @@ def read_customer_with_bikes(
     return customer
 
 
+@router.get(
+    "/{customer_id}/overview",
+    response_model=CustomerOverview,
+    summary="Get customer overview",
+    description="Get a customer with their bikes, each bike's latest tickets, open ticket counts and lifetime spend."
+)
+def read_customer_overview(
+    customer_id: int,
+    recent: int = Query(5, ge=0, le=50, description="Latest tickets to include per bike"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a customer's service overview.
+    
+    Loads in four queries however many bikes and tickets the customer has:
+    the customer, their bikes, one grouped aggregate over their tickets and
+    one windowed query for the latest tickets of every bike.
+    
+    Parameters:
+    - **customer_id**: ID of the customer to retrieve
+    - **recent**: Number of latest tickets to include per bike (default 5)
+    
+    Returns:
+    - Customer object with bikes, per-bike and overall ticket counts, open
+      tickets and lifetime spend (completed and delivered tickets)
+    
+    Raises:
+    - 404: Customer not found
+    """
+    customer = (
+        db.query(Customer)
+        .options(selectinload(Customer.bikes))
+        .filter(Customer.id == customer_id)
+        .first()
+    )
+    if not customer:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Customer not found",
+        )
+
+    bike_ids = [bike.id for bike in customer.bikes]
+    stats = {}
+    if bike_ids:
+        stats = {row.bike_id: row for row in db.execute(ticket_stats(bike_ids))}
+    latest = recent_tickets(db, bike_ids, recent)
+
+    bikes = []
+    for bike in sorted(customer.bikes, key=lambda bike: bike.id):
+        row = stats.get(bike.id)
+        bikes.append(BikeOverview(
+            **BikeSchema.model_validate(bike).model_dump(),
+            ticket_count=row.ticket_count if row else 0,
+            open_tickets=row.open_tickets if row else 0,
+            last_service_at=row.last_service_at if row else None,
+            lifetime_spend=round(row.lifetime_spend or 0.0, 2) if row else 0.0,
+            recent_tickets=latest.get(bike.id, []),
+        ))
+    return CustomerOverview(
+        **CustomerSchema.model_validate(customer).model_dump(),
+        bikes=bikes,
+        ticket_count=sum(bike.ticket_count for bike in bikes),
+        open_tickets=sum(bike.open_tickets for bike in bikes),
+        lifetime_spend=round(sum(bike.lifetime_spend for bike in bikes), 2),
+    )
+
+
 @router.put(
     "/{customer_id}", 
     response_model=CustomerSchema,
@@ -200,6 +470,7 @@ def update_customer(
     db.add(customer)
     db.commit()
     db.refresh(customer)
+    events.publish(events.CUSTOMER_CHANGED, customer=customer)
     return customer
 
 
@@ -216,7 +487,10 @@ def delete_customer(
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
-    Delete a specific customer by ID.
+    Delete a specific customer by ID, with their bikes and the bikes' tickets.
+    
+    Each table is cleared with one set-based DELETE, so the time taken
+    doesn't grow with the customer's service history.
     
     Parameters:
     - **customer_id**: ID of the customer to delete
@@ -236,9 +510,47 @@ def delete_customer(
             detail="Customer not found",
         )
 
-    db.delete(customer)
+    deleted = CustomerSchema.model_validate(customer)
+    _, ticket_ids, part_ids = delete_cascade(db, customer_id=customer_id, user_id=current_user.id)
     db.commit()
-    return customer
+    for ticket_id in ticket_ids:
+        events.publish(events.TICKET_DELETED, ticket_id=ticket_id)
+    publish_parts_changed(db, part_ids)
+    events.publish(events.CUSTOMER_DELETED, customer_id=customer_id)
+    return deleted
+
+
+@router.get(
+    "/{customer_id}/delete-preview",
+    response_model=DeletionCounts,
+    summary="Preview customer deletion",
+    description="Count the bikes, tickets, ticket updates and ticket parts that deleting a customer would remove, without deleting anything. Only accessible to admin users."
+)
+def preview_delete_customer(
+    customer_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Dry run of deleting a customer.
+    
+    Parameters:
+    - **customer_id**: ID of the customer
+    
+    Returns:
+    - Number of rows per table that deleting the customer would remove
+    
+    Raises:
+    - 404: Customer not found
+    
+    Only accessible to admin users.
+    """
+    if not db.query(Customer.id).filter(Customer.id == customer_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Customer not found",
+        )
+    return count_deletion(db, customer_id=customer_id)
 
 
 @router.get(
@@ -256,7 +568,7 @@ def search_customers(
     Search for customers by name, email, or phone.
     
     Parameters:
-    - **search_term**: Text to search for in customer name, email, or phone (minimum 2 characters)
+    - **search_term**: Text to search for in customer name, email, or phone digits (minimum 2 characters)
     
     Returns:
     - List of matching customer objects
@@ -264,10 +576,13 @@ def search_customers(
     Raises:
     - 422: Validation error if search term is less than 2 characters
     """
-    customers = db.query(Customer).filter(
-        (Customer.name.ilike(f"%{search_term}%")) |
-        (Customer.email.ilike(f"%{search_term}%")) |
-        (Customer.phone.ilike(f"%{search_term}%"))
-    ).all()
+    matches = (
+        Customer.name.ilike(f"%{search_term}%") |
+        Customer.email_normalized.contains(normalize_email(search_term), autoescape=True)
+    )
+    digits = normalize_phone(search_term)
+    if digits:
+        matches = matches | Customer.phone_digits.contains(digits, autoescape=True)
+    customers = db.query(Customer).filter(matches).all()
 
     return customers
\ No newline at end of file
@@ -0,0 +1,232 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Iterator, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_admin_user, get_db
+from app.models.user import User
+from app.models.customer import Customer
+from app.models.part import Part
+from app.models.ticket import Ticket, TicketStatus, TicketPriority
+from app.models.ticket_part import TicketPart
+from app.schemas.customer import PhoneMatch
+from app.services.filters import filter_customers, filter_parts, filter_tickets
+
+router = APIRouter()
+
+# Rows fetched from the server-side cursor per round trip
+BATCH_SIZE = 1000
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+TICKET_COLUMNS = (
+    Ticket.id, Ticket.ticket_number, Ticket.status, Ticket.priority, Ticket.bike_id,
+    Ticket.technician_id, Ticket.problem_description, Ticket.diagnosis,
+    Ticket.labor_cost, Ticket.total_parts_cost, Ticket.estimated_completion,
+    Ticket.is_archived, Ticket.created_at, Ticket.updated_at,
+)
+PART_COLUMNS = (
+    Part.id, Part.name, Part.sku, Part.category, Part.description, Part.quantity,
+    Part.min_stock, Part.reorder_point, Part.is_low_stock, Part.cost_price,
+    Part.retail_price, Part.created_at, Part.updated_at,
+)
+CUSTOMER_COLUMNS = (
+    Customer.id, Customer.name, Customer.email, Customer.phone, Customer.notes,
+    Customer.created_at, Customer.updated_at,
+)
+TICKET_PART_COLUMNS = (
+    TicketPart.id, TicketPart.ticket_id, TicketPart.part_id, TicketPart.quantity,
+    TicketPart.price_charged, TicketPart.backordered, TicketPart.created_at,
+)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_rows(result, headers) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for batch in result.partitions():
+        for row in batch:
+            writer.writerow([_plain(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson_rows(result, headers) -> Iterator[str]:
+    for batch in result.partitions():
+        yield "".join(
+            json.dumps(dict(zip(headers, (_plain(value) for value in row)))) + "\n"
+            for row in batch
+        )
+
+
+def _stream(db: Session, statement, name: str, format: ExportFormat) -> StreamingResponse:
+    """
+    Stream a select to the client in batches.
+
+    ``yield_per`` makes the driver fetch from a server-side cursor where the
+    database supports it, so memory use stays flat however many rows match.
+    """
+    headers = [column.key for column in statement.selected_columns]
+    result = db.execute(statement.execution_options(yield_per=BATCH_SIZE))
+    if format == ExportFormat.CSV:
+        body, media_type = _csv_rows(result, headers), "text/csv"
+    else:
+        body, media_type = _ndjson_rows(result, headers), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format.value}"'},
+    )
+
+
+@router.get(
+    "/tickets",
+    summary="Export tickets",
+    description="Stream all tickets matching the ticket list filters as CSV or NDJSON. Requires admin privileges."
+)
+def export_tickets(
+    db: Session = Depends(get_db),
+    format: ExportFormat = ExportFormat.CSV,
+    status: Optional[TicketStatus] = None,
+    priority: Optional[TicketPriority] = None,
+    customer_id: Optional[int] = None,
+    bike_id: Optional[int] = None,
+    technician_id: Optional[int] = None,
+    archived: Optional[bool] = Query(None, description="Only archived (true) or active (false) tickets; all when omitted"),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Export tickets.
+
+    Parameters:
+    - **format**: csv (default) or ndjson
+    - **status**, **priority**, **customer_id**, **bike_id**, **technician_id**: Same filters as the ticket list
+    - **archived**: Filter by archive status; every ticket is exported when omitted
+
+    Returns:
+    - A streamed file with one row per ticket, ordered by ID
+    """
+    statement = filter_tickets(
+        select(*TICKET_COLUMNS),
+        status=status,
+        priority=priority,
+        customer_id=customer_id,
+        bike_id=bike_id,
+        technician_id=technician_id,
+        archived=archived,
+    ).order_by(Ticket.id)
+    return _stream(db, statement, "tickets", format)
+
+
+@router.get(
+    "/parts",
+    summary="Export parts",
+    description="Stream all parts matching the parts list filters as CSV or NDJSON. Requires admin privileges."
+)
+def export_parts(
+    db: Session = Depends(get_db),
+    format: ExportFormat = ExportFormat.CSV,
+    name: Optional[str] = None,
+    category: Optional[str] = None,
+    sku: Optional[str] = None,
+    low_stock: Optional[bool] = False,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Export the parts catalog.
+
+    Parameters:
+    - **format**: csv (default) or ndjson
+    - **name**, **category**, **sku**, **low_stock**: Same filters as the parts list
+
+    Returns:
+    - A streamed file with one row per part, ordered by ID
+    """
+    statement = filter_parts(
+        select(*PART_COLUMNS), name=name, category=category, sku=sku, low_stock=low_stock
+    ).order_by(Part.id)
+    return _stream(db, statement, "parts", format)
+
+
+@router.get(
+    "/customers",
+    summary="Export customers",
+    description="Stream all customers matching the customer list filters as CSV or NDJSON. Requires admin privileges."
+)
+def export_customers(
+    db: Session = Depends(get_db),
+    format: ExportFormat = ExportFormat.CSV,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    phone_match: PhoneMatch = PhoneMatch.SUFFIX,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Export customers.
+
+    Parameters:
+    - **format**: csv (default) or ndjson
+    - **name**, **email**, **phone**, **phone_match**: Same filters as the customer list
+
+    Returns:
+    - A streamed file with one row per customer, ordered by ID
+    """
+    statement = filter_customers(
+        select(*CUSTOMER_COLUMNS), name=name, email=email, phone=phone, phone_match=phone_match
+    ).order_by(Customer.id)
+    return _stream(db, statement, "customers", format)
+
+
+@router.get(
+    "/ticket_parts",
+    summary="Export ticket parts",
+    description="Stream the parts used on tickets as CSV or NDJSON. Requires admin privileges."
+)
+def export_ticket_parts(
+    db: Session = Depends(get_db),
+    format: ExportFormat = ExportFormat.CSV,
+    ticket_id: Optional[int] = None,
+    part_id: Optional[int] = None,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Export ticket part line items.
+
+    Parameters:
+    - **format**: csv (default) or ndjson
+    - **ticket_id**: Only lines on this ticket
+    - **part_id**: Only lines for this part
+
+    Returns:
+    - A streamed file with one row per ticket part, ordered by ID
+    """
+    statement = select(*TICKET_PART_COLUMNS)
+    if ticket_id:
+        statement = statement.filter(TicketPart.ticket_id == ticket_id)
+    if part_id:
+        statement = statement.filter(TicketPart.part_id == part_id)
+    return _stream(db, statement.order_by(TicketPart.id), "ticket_parts", format)
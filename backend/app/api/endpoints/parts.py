@@ -1,18 +1,46 @@
+import io
+from datetime import datetime
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status, Query
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 
+from app.core.concurrency import (
+    check_version, commit_or_conflict, get_if_match_version, set_etag
+)
 from app.core.deps import (
     get_current_admin_user, get_current_active_user, get_db
 )
+from app.core.integrity import ensure_unreferenced, row_exists
 from app.models.user import User
 from app.models.part import Part
+from app.models.part_usage import PartUsageDaily
+from app.models.stock_movement import MovementKind, StockMovement, StockSnapshot
+from app.models.ticket_part import TicketPart
 from app.schemas.part import (
     Part as PartSchema,
     PartCreate,
-    PartUpdate
+    PartImportResult,
+    PartLookup,
+    PartUpdate,
+    ReorderForecast,
+    StockReceipt,
+    StockReceiptResult
+)
+from app.schemas.stock import StockLevel, StockMovement as StockMovementSchema
+from app.services import events
+from app.services.filters import filter_parts
+from app.services.forecast import (
+    DEFAULT_HISTORY_DAYS, DEFAULT_LEAD_TIME_DAYS, DEFAULT_SERVICE_LEVEL, DEFAULT_SMOOTHING,
+    forecast_reorder_points
 )
+from app.services import search as search_service
+from app.services.low_stock import low_stock_watcher
+from app.services.part_import import DEFAULT_CHUNK_SIZE, import_parts
+from app.services.parts_catalog import parts_catalog
+from app.services.stock import receive_stock, release_stock, reserve_stock
+from app.services.stock_ledger import stock_at
 
 router = APIRouter()
 
@@ -47,17 +75,9 @@ def read_parts(
     Returns:
     - List of part objects
     """
-    query = db.query(Part)
-
-    # Apply filters if provided
-    if name:
-        query = query.filter(Part.name.ilike(f"%{name}%"))
-    if category:
-        query = query.filter(Part.category.ilike(f"%{category}%"))
-    if sku:
-        query = query.filter(Part.sku.ilike(f"%{sku}%"))
-    if low_stock:
-        query = query.filter(Part.quantity <= Part.reorder_point)
+    query = filter_parts(
+        db.query(Part), name=name, category=category, sku=sku, low_stock=low_stock
+    )
 
     parts = query.offset(skip).limit(limit).all()
     return parts
@@ -87,14 +107,14 @@ def create_part(
     """
     # Check if SKU already exists
     if part_in.sku:
-        existing_part = db.query(Part).filter(Part.sku == part_in.sku).first()
-        if existing_part:
+        if row_exists(db, Part.sku == part_in.sku):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Part with this SKU already exists",
             )
             
     # Create new part
+    low_stock_watcher.ensure_loaded(db)
     part = Part(
         name=part_in.name,
         description=part_in.description,
@@ -109,9 +129,135 @@ def create_part(
     db.add(part)
     db.commit()
     db.refresh(part)
+    events.publish(events.PART_CHANGED, part=part)
     return part
 
 
+@router.get(
+    "/lookup",
+    response_model=List[PartLookup],
+    summary="Look up parts",
+    description="Type-ahead and barcode lookup served from the in-memory parts catalog."
+)
+def lookup_parts(
+    q: Optional[str] = Query(None, max_length=100),
+    sku: Optional[str] = Query(None, max_length=50),
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Look up parts for type-ahead and barcode scanning.
+    
+    Lookups are answered from an in-memory catalog of part names, SKUs and
+    categories that is kept current as parts change, so no SQL runs per
+    keystroke.
+    
+    Parameters:
+    - **q**: Optional text; every word must start a word of the part name or SKU
+    - **sku**: Optional exact SKU (case-insensitive), e.g. from a barcode scanner
+    - **category**: Optional exact category (case-insensitive)
+    - **limit**: Maximum number of parts to return (default 20, max 100)
+    
+    Returns:
+    - List of matching catalog entries, exact and prefix SKU matches first
+    """
+    parts_catalog.ensure_loaded(db)
+    if sku is not None:
+        entry = parts_catalog.get_by_sku(sku)
+        return [entry] if entry else []
+    return parts_catalog.lookup(q, category=category, limit=limit)
+
+
+@router.get(
+    "/reorder-forecast",
+    response_model=ReorderForecast,
+    summary="Forecast reorder points",
+    description="Propose reorder points and safety stock from recent demand without changing any part. Only accessible to admin users."
+)
+def read_reorder_forecast(
+    db: Session = Depends(get_db),
+    history_days: int = Query(DEFAULT_HISTORY_DAYS, ge=7, le=730),
+    lead_time_days: int = Query(DEFAULT_LEAD_TIME_DAYS, ge=0, le=365),
+    service_level: float = Query(DEFAULT_SERVICE_LEVEL, gt=0.5, lt=1),
+    alpha: float = Query(DEFAULT_SMOOTHING, gt=0, le=1),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Propose reorder levels from recent demand.
+    
+    Daily usage on tickets is exponentially smoothed per part, and levels are
+    set so stock covers demand over the supplier lead time at the requested
+    service level.
+    
+    Parameters:
+    - **history_days**: Days of demand history to fit, ending yesterday
+    - **lead_time_days**: Lead time for parts without their own
+    - **service_level**: Probability of not running out during the lead time
+    - **alpha**: Smoothing factor; higher values follow recent demand more closely
+    - **limit**: Maximum number of proposals to return
+    
+    Returns:
+    - Counts of parts forecast and changed, with the changed parts' proposals
+    
+    Only accessible to admin users. Demand is as of the last rollup refresh;
+    applying the forecast refreshes the rollups first.
+    """
+    return forecast_reorder_points(
+        db,
+        history_days=history_days,
+        lead_time_days=lead_time_days,
+        service_level=service_level,
+        alpha=alpha,
+        limit=limit,
+    )
+
+
+@router.post(
+    "/reorder-forecast",
+    response_model=ReorderForecast,
+    summary="Apply forecast reorder points",
+    description="Set every forecast part's reorder point and minimum stock from recent demand. Only accessible to admin users."
+)
+def apply_reorder_forecast(
+    db: Session = Depends(get_db),
+    history_days: int = Query(DEFAULT_HISTORY_DAYS, ge=7, le=730),
+    lead_time_days: int = Query(DEFAULT_LEAD_TIME_DAYS, ge=0, le=365),
+    service_level: float = Query(DEFAULT_SERVICE_LEVEL, gt=0.5, lt=1),
+    alpha: float = Query(DEFAULT_SMOOTHING, gt=0, le=1),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Apply reorder levels forecast from recent demand.
+    
+    Takes the same parameters as the forecast. Parts without demand in the
+    history window keep their levels; low-stock flags are updated with the
+    new reorder points.
+    
+    Returns:
+    - Counts of parts forecast and changed, with the applied proposals
+    
+    Only accessible to admin users.
+    """
+    changed_ids: List[int] = []
+    result = forecast_reorder_points(
+        db,
+        history_days=history_days,
+        lead_time_days=lead_time_days,
+        service_level=service_level,
+        alpha=alpha,
+        apply=True,
+        limit=limit,
+        changed_ids=changed_ids,
+    )
+    if changed_ids:
+        events.publish(events.PARTS_BULK_CHANGED, db=db, part_ids=changed_ids)
+    return result
+
+
 @router.get(
     "/{part_id}", 
     response_model=PartSchema,
@@ -120,6 +266,7 @@ def create_part(
 )
 def read_part(
     part_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -130,7 +277,7 @@ def read_part(
     - **part_id**: ID of the part to retrieve
     
     Returns:
-    - Part object
+    - Part object, with its version as the ETag header
     
     Raises:
     - 404: Part not found
@@ -141,6 +288,7 @@ def read_part(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Part not found",
         )
+    set_etag(response, part)
     return part
 
 
@@ -155,6 +303,8 @@ def update_part(
     db: Session = Depends(get_db),
     part_id: int,
     part_in: PartUpdate,
+    response: Response,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -163,6 +313,7 @@ def update_part(
     Parameters:
     - **part_id**: ID of the part to update
     - **part_in**: Part update data
+    - **If-Match** (header): Optional part version the update is based on
     
     Returns:
     - Updated part object
@@ -170,6 +321,7 @@ def update_part(
     Raises:
     - 404: Part not found
     - 400: SKU already exists
+    - 409: Part was modified by another request
     """
     part = db.query(Part).filter(Part.id == part_id).first()
     if not part:
@@ -177,25 +329,28 @@ def update_part(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Part not found",
         )
+    check_version(part, expected_version, "Part")
 
     # Check if SKU is being updated and already exists
     if part_in.sku and part_in.sku != part.sku:
-        existing_part = db.query(Part).filter(Part.sku == part_in.sku).first()
-        if existing_part:
+        if row_exists(db, Part.sku == part_in.sku):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Part with this SKU already exists",
             )
 
     # Update part fields
+    low_stock_watcher.ensure_loaded(db)
     update_data = part_in.model_dump(exclude_unset=True)
     for field in update_data:
         if hasattr(part, field) and update_data[field] is not None:
             setattr(part, field, update_data[field])
 
     db.add(part)
-    db.commit()
+    commit_or_conflict(db, "Part")
     db.refresh(part)
+    events.publish(events.PART_CHANGED, part=part)
+    set_etag(response, part)
     return part
 
 
@@ -221,8 +376,10 @@ def delete_part(
     - Deleted part object
     
     Raises:
+    - 400: Part is used in tickets
     - 404: Part not found
     
+    The part's stock ledger, snapshots and usage rollups are deleted with it.
     Only accessible to admin users.
     """
     part = db.query(Part).filter(Part.id == part_id).first()
@@ -233,14 +390,16 @@ def delete_part(
         )
 
     # Check if part is used in any tickets
-    if part.ticket_parts:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot delete part that is used in tickets",
-        )
+    ensure_unreferenced(
+        db, {"ticket parts": TicketPart.part_id}, part_id, "Cannot delete part that is used in tickets"
+    )
 
+    # SQLite doesn't enforce the ON DELETE CASCADE, so clear the ledger and rollups here
+    for model in (StockMovement, StockSnapshot, PartUsageDaily):
+        db.execute(delete(model.__table__).where(model.part_id == part_id))
     db.delete(part)
     db.commit()
+    events.publish(events.PART_DELETED, part_id=part_id)
     return part
 
 
@@ -248,32 +407,34 @@ def delete_part(
     "/search/", 
     response_model=List[PartSchema],
     summary="Search parts",
-    description="Search for parts by name, category, or SKU. Requires at least 2 characters in the search term."
+    description="Search for parts by name, category, or SKU, most relevant first. Requires at least 2 characters in the search term."
 )
 def search_parts(
     search_term: str = Query(..., min_length=2),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Search for parts by name, category, or SKU.
     
+    Every word in the search term must match the start of a word in the
+    part's name, category or SKU. An exact SKU match is listed first, then
+    SKU and name prefix matches, then the remaining matches by relevance.
+    
     Parameters:
     - **search_term**: Text to search for in part name, category, or SKU (minimum 2 characters)
+    - **skip**: Number of matches to skip (for pagination)
+    - **limit**: Maximum number of parts to return (default 20, max 100)
     
     Returns:
-    - List of matching part objects
+    - List of matching part objects, most relevant first
     
     Raises:
     - 422: Validation error if search term is less than 2 characters
     """
-    parts = db.query(Part).filter(
-        (Part.name.ilike(f"%{search_term}%")) |
-        (Part.category.ilike(f"%{search_term}%")) |
-        (Part.sku.ilike(f"%{search_term}%"))
-    ).all()
-
-    return parts
+    return search_service.search_parts(db, search_term, skip=skip, limit=limit)
 
 
 @router.put(
@@ -287,14 +448,21 @@ def adjust_stock(
     db: Session = Depends(get_db),
     part_id: int,
     quantity_change: int = Query(..., description="Quantity to add (positive) or remove (negative)"),
+    response: Response,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Adjust the stock quantity of a part.
     
+    The adjustment is applied as a single conditional UPDATE, so concurrent
+    adjustments and ticket reservations can't lose each other's changes or
+    take the stock below zero.
+    
     Parameters:
     - **part_id**: ID of the part to adjust
     - **quantity_change**: Quantity to add (positive) or remove (negative)
+    - **If-Match** (header): Optional part version the adjustment is based on
     
     Returns:
     - Updated part object
@@ -302,6 +470,7 @@ def adjust_stock(
     Raises:
     - 404: Part not found
     - 400: Insufficient stock
+    - 409: Part was modified by another request
     """
     part = db.query(Part).filter(Part.id == part_id).first()
     if not part:
@@ -309,21 +478,205 @@ def adjust_stock(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Part not found",
         )
+    check_version(part, expected_version, "Part")
     
-    # Check if removing stock would result in negative quantity
-    if quantity_change < 0 and abs(quantity_change) > part.quantity:
+    movement = {"kind": MovementKind.ADJUST, "user_id": current_user.id}
+    if quantity_change < 0:
+        adjusted = reserve_stock(db, part_id, -quantity_change, expected_version, **movement)
+    else:
+        adjusted = release_stock(db, part_id, quantity_change, expected_version, **movement)
+    if not adjusted:
+        db.rollback()
+        db.refresh(part)
+        check_version(part, expected_version, "Part")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Insufficient stock to remove requested quantity",
         )
     
-    part.quantity += quantity_change
-    db.add(part)
     db.commit()
     db.refresh(part)
+    events.publish(events.PART_CHANGED, part=part)
+    set_etag(response, part)
     return part
 
 
+@router.post(
+    "/receive",
+    response_model=StockReceiptResult,
+    summary="Receive stock",
+    description="Book a supplier delivery into stock in one request, identifying parts by ID or SKU."
+)
+def receive_parts(
+    *,
+    db: Session = Depends(get_db),
+    receipt_in: StockReceipt,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Book a supplier delivery into stock.
+    
+    All lines are applied in one transaction with set-based updates. Lines
+    for the same part are added together, and a line's cost price, if
+    given, replaces the part's wholesale cost.
+    
+    Parameters:
+    - **receipt_in**: Delivery lines, each with a part_id or sku, the quantity
+      received and an optional new cost price
+    
+    Returns:
+    - Per-line results with the new stock on hand; lines whose part can't be
+      found are reported with an error and skipped
+    """
+    result = receive_stock(db, receipt_in.lines, user_id=current_user.id)
+    db.commit()
+    
+    part_ids = {line.part_id for line in result.results if line.error is None}
+    parts = {part.id: part for part in db.query(Part).filter(Part.id.in_(part_ids)).all()}
+    for line in result.results:
+        if line.error is None:
+            line.quantity = parts[line.part_id].quantity
+    for part in parts.values():
+        events.publish(events.PART_CHANGED, part=part)
+    return result
+
+
+@router.post(
+    "/import",
+    response_model=PartImportResult,
+    summary="Import parts catalog",
+    description="Create or update parts from an uploaded CSV price list, matched by SKU. Only accessible to admin users."
+)
+def import_parts_catalog(
+    *,
+    db: Session = Depends(get_db),
+    file: UploadFile = File(..., description="CSV file with a header row"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=2000),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Create or update parts from an uploaded CSV price list.
+    
+    The file is read in chunks of **chunk_size** rows; each row is validated
+    like a part creation request and each chunk is upserted on SKU in one
+    statement and committed. Existing parts keep their stock level; new parts
+    take their opening stock from the quantity column.
+    
+    Parameters:
+    - **file**: UTF-8 CSV with a header row naming part fields (name, sku,
+      category, description, quantity, min_stock, reorder_point, cost_price,
+      retail_price); sku, name, cost_price and retail_price are required
+    - **chunk_size**: Rows written per statement and transaction
+    
+    Returns:
+    - Counts of rows read, created, updated and failed, with the first row errors
+    
+    Raises:
+    - 400: The file is not a UTF-8 CSV file (chunks before the error stay imported)
+    
+    Only accessible to admin users.
+    """
+    if file.filename and not file.filename.lower().endswith((".csv", ".txt")):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only CSV files can be imported",
+        )
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    written_ids: List[int] = []
+    try:
+        result = import_parts(db, stream, chunk_size=chunk_size, written_ids=written_ids)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The file must be UTF-8 encoded",
+        )
+    finally:
+        if written_ids:
+            events.publish(events.PARTS_BULK_CHANGED, db=db, part_ids=written_ids)
+    return result
+
+
+@router.get(
+    "/{part_id}/movements",
+    response_model=List[StockMovementSchema],
+    summary="Get part stock movements",
+    description="Get the stock ledger of a specific part, newest first."
+)
+def read_part_movements(
+    part_id: int,
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get the stock ledger of a specific part, newest first.
+    
+    Movements older than the ledger's retention window are compacted into
+    snapshots and no longer listed.
+    
+    Parameters:
+    - **part_id**: ID of the part
+    - **skip**: Number of movements to skip (for pagination)
+    - **limit**: Maximum number of movements to return (for pagination)
+    
+    Returns:
+    - List of stock movements (receive, consume, return, adjust)
+    
+    Raises:
+    - 404: Part not found
+    """
+    if db.query(Part.id).filter(Part.id == part_id).first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Part not found",
+        )
+    return (
+        db.query(StockMovement)
+        .filter(StockMovement.part_id == part_id)
+        .order_by(StockMovement.occurred_at.desc(), StockMovement.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+@router.get(
+    "/{part_id}/stock-at",
+    response_model=StockLevel,
+    summary="Get historical stock level",
+    description="Get a part's stock on hand at a past date and time."
+)
+def read_part_stock_at(
+    part_id: int,
+    at: datetime,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a part's stock on hand at a past date and time.
+    
+    Computed from the latest stock snapshot before **at** plus the ledger
+    movements after it.
+    
+    Parameters:
+    - **part_id**: ID of the part
+    - **at**: Date and time (ISO 8601, UTC if no offset is given)
+    
+    Returns:
+    - Stock level at the requested time
+    
+    Raises:
+    - 404: Part not found
+    """
+    if db.query(Part.id).filter(Part.id == part_id).first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Part not found",
+        )
+    return StockLevel(part_id=part_id, at=at, quantity=stock_at(db, part_id, at))
+
+
 @router.get(
     "/low-stock/", 
     response_model=List[PartSchema],
@@ -340,5 +693,5 @@ def get_low_stock_parts(
     Returns:
     - List of parts below reorder point
     """
-    parts = db.query(Part).filter(Part.quantity <= Part.reorder_point).all()
+    parts = db.query(Part).filter(Part.is_low_stock == True).all()  # noqa: E712
     return parts
\ No newline at end of file
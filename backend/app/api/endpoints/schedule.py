@@ -0,0 +1,120 @@
+from datetime import date
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_active_user, get_db
+from app.models.user import User
+from app.schemas.schedule import CompletionQuote, DayAvailability
+from app.services.scheduling import bench_schedule
+
+router = APIRouter()
+
+
+def _loaded_schedule(db: Session, technician_id: Optional[int]):
+    bench_schedule.ensure_loaded(db)
+    if technician_id is not None and not bench_schedule.has_technician(technician_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Technician not found",
+        )
+    return bench_schedule
+
+
+@router.get(
+    "/earliest-completion",
+    response_model=CompletionQuote,
+    summary="Quote earliest completion",
+    description="Get the earliest date new work of a given size can be finished, from technician bench capacity and the work already booked."
+)
+def read_earliest_completion(
+    db: Session = Depends(get_db),
+    hours: float = Query(..., gt=0, le=1000, description="Estimated labor hours of the new work"),
+    technician_id: Optional[int] = Query(None, description="Quote for this technician's bench instead of the whole shop"),
+    start: Optional[date] = Query(None, description="First day the work can start; today when omitted"),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Quote the earliest completion date for new work.
+
+    Open tickets book their estimated hours against their technician's bench
+    by their estimated completion date, and work can be done ahead of its
+    date. The quote is the first working day by which the new work fits
+    without making any booked ticket late. It is served from in-memory
+    bookings, so it is cheap enough to call at intake.
+
+    Parameters:
+    - **hours**: Estimated labor hours of the new work
+    - **technician_id**: Optional technician; the whole shop's capacity is used when omitted
+    - **start**: Optional first day the work can start (default today)
+
+    Returns:
+    - The quote; earliest_completion is null when there is no bench capacity
+
+    Raises:
+    - 404: Technician not found (or not an active technician)
+    """
+    schedule = _loaded_schedule(db, technician_id)
+    return schedule.earliest_completion(hours, technician_id=technician_id, start=start)
+
+
+@router.get(
+    "/days",
+    response_model=List[DayAvailability],
+    summary="Get bench availability",
+    description="Get bench capacity, booked hours and hours still available for a range of days."
+)
+def read_days(
+    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="First day; today when omitted"),
+    days: int = Query(7, ge=1, le=366),
+    technician_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get bench availability for a range of days.
+
+    Parameters:
+    - **start**: Optional first day (default today)
+    - **days**: Number of days (default 7)
+    - **technician_id**: Optional technician; the whole shop is reported when omitted
+
+    Returns:
+    - One entry per day. A day is full when too little bench time is left
+      to promise any more work for it; closed and past days are always full.
+
+    Raises:
+    - 404: Technician not found (or not an active technician)
+    """
+    schedule = _loaded_schedule(db, technician_id)
+    return schedule.availability(start, days, technician_id=technician_id)
+
+
+@router.get(
+    "/days/{day}",
+    response_model=DayAvailability,
+    summary="Get day availability",
+    description="Get bench capacity, booked hours and hours still available on one day, and whether it is full."
+)
+def read_day(
+    day: date,
+    db: Session = Depends(get_db),
+    technician_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get bench availability on one day.
+
+    Parameters:
+    - **day**: The day, as YYYY-MM-DD
+    - **technician_id**: Optional technician; the whole shop is reported when omitted
+
+    Returns:
+    - The day's capacity, booked and available hours, and whether it is full
+
+    Raises:
+    - 404: Technician not found (or not an active technician)
+    """
+    schedule = _loaded_schedule(db, technician_id)
+    return schedule.availability(day, 1, technician_id=technician_id)[0]
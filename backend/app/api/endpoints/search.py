@@ -0,0 +1,41 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_active_user, get_db
+from app.models.user import User
+from app.schemas.search import SearchResults
+from app.services.search import search_all
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    response_model=SearchResults,
+    summary="Search tickets, customers and bikes",
+    description="Full-text search across tickets, ticket notes, customers and bikes, grouped by type and ranked by relevance."
+)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Full-text search across tickets, ticket notes, customers and bikes.
+
+    Every word in the query must match (as a word prefix) somewhere in the
+    indexed text. Ticket number, problem description, diagnosis and update
+    notes are searched for tickets; name, email and phone for customers;
+    name and specs for bikes.
+
+    Parameters:
+    - **q**: Search text
+    - **limit**: Maximum number of results per group (default 10, max 50)
+
+    Returns:
+    - Tickets, customers and bikes matching the query, best matches first
+    """
+    return search_all(db, q, limit=limit)
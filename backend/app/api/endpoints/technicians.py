@@ -0,0 +1,99 @@
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_active_user, get_current_admin_user, get_db
+from app.models.user import User, UserRole
+from app.schemas.assignment import TechnicianWorkload
+from app.schemas.work_queue import QueueEntry
+from app.services.assignment import workload_tracker
+from app.services.work_queue import work_queue_index
+
+router = APIRouter()
+
+
+@router.get(
+    "/workload",
+    response_model=List[TechnicianWorkload],
+    summary="Get technician workloads",
+    description="Get open ticket counts and estimated labor hours for every active technician. Only accessible to admin users."
+)
+def read_technician_workloads(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Get open ticket counts and estimated labor hours for every active technician.
+
+    Returns:
+    - List of technician workloads, as used by ticket auto-assignment
+
+    Only accessible to admin users.
+    """
+    workload_tracker.ensure_loaded(db)
+    return [
+        TechnicianWorkload(
+            technician_id=load.technician_id,
+            username=load.username,
+            skills=sorted(load.skills),
+            open_tickets=load.open_tickets,
+            estimated_hours=load.hours,
+        )
+        for load in workload_tracker.workloads()
+    ]
+
+
+@router.get(
+    "/{technician_id}/queue",
+    response_model=List[QueueEntry],
+    summary="Get technician work queue",
+    description="Get a technician's open tickets ordered by urgency. Technicians can only view their own queue."
+)
+def read_technician_queue(
+    technician_id: int,
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a technician's open tickets ordered by urgency.
+
+    Tickets are scored by priority, time spent in their current status and
+    slack before their estimated completion; tickets awaiting parts are
+    listed last. The queue is served from an in-memory index, so this does
+    not sort the tickets table per request.
+
+    Parameters:
+    - **technician_id**: ID of the technician
+    - **limit**: Maximum number of tickets to return (default 50, at most 500)
+
+    Returns:
+    - List of queue entries, most urgent first (empty if the technician has no open tickets)
+
+    Raises:
+    - 403: Not enough permissions (if a technician requests another technician's queue)
+    """
+    if current_user.id != technician_id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+    work_queue_index.ensure_loaded(db)
+    now = datetime.utcnow()
+
+    return [
+        QueueEntry(
+            ticket_id=item.ticket_id,
+            ticket_number=item.ticket_number,
+            status=item.status,
+            priority=item.priority,
+            estimated_completion=item.estimated_completion,
+            status_since=item.status_since,
+            blocked=item.blocked,
+            score=item.score(now),
+        )
+        for item in work_queue_index.queue(technician_id, limit=limit)
+    ]
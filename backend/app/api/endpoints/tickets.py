@@ -1,21 +1,30 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 
+from app.core.concurrency import (
+    check_version, commit_or_conflict, get_if_match_version, set_etag
+)
 from app.core.deps import (
     get_current_admin_user, get_current_active_user, get_db
 )
+from app.core.integrity import row_exists
 from app.models.user import User
-from app.models.ticket import Ticket, TicketStatus, TicketPriority
+from app.models.ticket import CLOSED_STATUSES, Ticket, TicketStatus, TicketPriority
 from app.models.ticket_update import TicketUpdate
 from app.models.ticket_part import TicketPart
+from app.models.notification import Notification
+from app.models.part import Part
+from app.models.stock_movement import StockMovement
 from app.schemas.ticket import (
     Ticket as TicketSchema,
     TicketCreate,
     TicketUpdate as TicketUpdateSchema,
     TicketWithDetails,
-    TicketArchiveRequest
+    TicketArchiveRequest,
+    PartsTotalReconciliation
 )
 from app.schemas.ticket_update import (
     TicketUpdateCreate, 
@@ -26,10 +35,45 @@ from app.schemas.ticket_part import (
     TicketPartUpdate,
     TicketPart as TicketPartSchema
 )
+from app.schemas.assignment import (
+    AssignmentPolicyName,
+    BulkAssignRequest,
+    BulkAssignResult,
+    TicketAssignment
+)
+from app.services import events
+from app.services.filters import filter_tickets
+from app.services.notifications import enqueue_status_notification
+from app.services.stock import publish_parts_changed, release_stock, reserve_stock, stock_on_hand
+from app.services.assignment import workload_tracker
+from app.services.reconciliation import reconcile_parts_totals
 
 router = APIRouter()
 
 
+def _insufficient_stock(db: Session, part_id: int, requested: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=(
+            f"Insufficient stock for part #{part_id}: requested {requested}, "
+            f"{stock_on_hand(db, part_id)} available"
+        ),
+    )
+
+
+def _increment_parts_total(db: Session, ticket_id: int, amount: float) -> None:
+    """
+    Add ``amount`` to a ticket's stored parts total in a single UPDATE.
+
+    The arithmetic happens in SQL so concurrent part edits on the same
+    ticket cannot overwrite each other's changes.
+    """
+    db.query(Ticket).filter(Ticket.id == ticket_id).update(
+        {Ticket.total_parts_cost: func.coalesce(Ticket.total_parts_cost, 0.0) + amount},
+        synchronize_session=False,
+    )
+
+
 @router.get(
     "/",
     response_model=List[TicketSchema],
@@ -64,22 +108,15 @@ def read_tickets(
     Returns:
     - List of ticket objects
     """
-    query = db.query(Ticket)
-
-    # Apply filters if provided
-    if status:
-        query = query.filter(Ticket.status == status)
-    if priority:
-        query = query.filter(Ticket.priority == priority)
-    if customer_id:
-        query = query.filter(Ticket.bike.has(customer_id=customer_id))
-    if bike_id:
-        query = query.filter(Ticket.bike_id == bike_id)
-    if technician_id:
-        query = query.filter(Ticket.technician_id == technician_id)
-    
-    # Filter by archive status
-    query = query.filter(Ticket.is_archived == archived)
+    query = filter_tickets(
+        db.query(Ticket),
+        status=status,
+        priority=priority,
+        customer_id=customer_id,
+        bike_id=bike_id,
+        technician_id=technician_id,
+        archived=archived,
+    )
 
     tickets = query.offset(skip).limit(limit).all()
     return tickets
@@ -96,6 +133,9 @@ def create_ticket(
     *,
     db: Session = Depends(get_db),
     ticket_in: TicketCreate,
+    auto_assign: bool = False,
+    policy: AssignmentPolicyName = AssignmentPolicyName.LEAST_LOADED,
+    skill: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -103,6 +143,9 @@ def create_ticket(
     
     Parameters:
     - **ticket_in**: Ticket creation data
+    - **auto_assign**: Pick a technician automatically if none is given
+    - **policy**: Assignment policy (least_loaded, round_robin or skill_tag)
+    - **skill**: Skill tag preferred by the skill_tag policy
     
     Returns:
     - Created ticket object with ID
@@ -110,12 +153,17 @@ def create_ticket(
     # Generate a unique ticket number if not provided
     if not hasattr(ticket_in, 'ticket_number') or not ticket_in.ticket_number:
         # Generate a unique ticket number (e.g., "T-001")
-        last_ticket = db.query(Ticket).order_by(Ticket.id.desc()).first()
-        next_id = 1 if not last_ticket else last_ticket.id + 1
+        last_id = db.query(func.max(Ticket.id)).scalar()
+        next_id = (last_id or 0) + 1
         ticket_number = f"T-{next_id:04d}"
     else:
         ticket_number = ticket_in.ticket_number
 
+    technician_id = ticket_in.technician_id
+    if technician_id is None and auto_assign:
+        workload_tracker.ensure_loaded(db)
+        technician_id = workload_tracker.choose(policy, skill)
+
     ticket = Ticket(
         ticket_number=ticket_number,
         problem_description=ticket_in.problem_description,
@@ -124,8 +172,9 @@ def create_ticket(
         priority=ticket_in.priority,
         estimated_completion=ticket_in.estimated_completion,
         bike_id=ticket_in.bike_id,
-        technician_id=ticket_in.technician_id,
-        labor_cost=ticket_in.labor_cost
+        technician_id=technician_id,
+        labor_cost=ticket_in.labor_cost,
+        estimated_hours=ticket_in.estimated_hours
     )
     
     db.add(ticket)
@@ -142,6 +191,7 @@ def create_ticket(
     db.add(ticket_update)
     db.commit()
     
+    events.publish(events.TICKET_CHANGED, ticket=ticket, status_changed=True)
     return ticket
 
 
@@ -153,6 +203,7 @@ def create_ticket(
 )
 def read_ticket(
     ticket_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -163,7 +214,7 @@ def read_ticket(
     - **ticket_id**: ID of the ticket to retrieve
     
     Returns:
-    - Ticket object with updates and parts
+    - Ticket object with updates and parts, with its version as the ETag header
     
     Raises:
     - 404: Ticket not found
@@ -174,6 +225,7 @@ def read_ticket(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not found",
         )
+    set_etag(response, ticket)
     return ticket
 
 
@@ -188,6 +240,8 @@ def update_ticket(
     db: Session = Depends(get_db),
     ticket_id: int,
     ticket_in: TicketUpdateSchema,
+    response: Response,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -196,12 +250,14 @@ def update_ticket(
     Parameters:
     - **ticket_id**: ID of the ticket to update
     - **ticket_in**: Ticket update data
+    - **If-Match** (header): Optional ticket version the update is based on
     
     Returns:
     - Updated ticket object
     
     Raises:
     - 404: Ticket not found
+    - 409: Ticket was modified by another request
     """
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
@@ -209,6 +265,7 @@ def update_ticket(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not found",
         )
+    check_version(ticket, expected_version, "Ticket")
 
     previous_status = ticket.status
     
@@ -218,12 +275,17 @@ def update_ticket(
         if hasattr(ticket, field) and update_data[field] is not None:
             setattr(ticket, field, update_data[field])
 
+    # The customer email is queued in the same transaction as the change
+    status_changed = ticket.status != previous_status
+    if status_changed:
+        enqueue_status_notification(db, ticket)
+
     db.add(ticket)
-    db.commit()
+    commit_or_conflict(db, "Ticket")
     db.refresh(ticket)
     
     # Add update record if status changed or note provided
-    if ticket.status != previous_status or (update_data.get('note') is not None):
+    if status_changed or (update_data.get('note') is not None):
         ticket_update = TicketUpdate(
             ticket_id=ticket.id,
             previous_status=previous_status if ticket.status != previous_status else None,
@@ -234,6 +296,8 @@ def update_ticket(
         db.add(ticket_update)
         db.commit()
     
+    events.publish(events.TICKET_CHANGED, ticket=ticket, status_changed=status_changed)
+    set_etag(response, ticket)
     return ticket
 
 
@@ -267,8 +331,27 @@ def delete_ticket(
             detail="Ticket not found",
         )
 
+    # Reserved parts go back into stock with the ticket's line items
+    part_ids = []
+    for ticket_part in ticket.parts:
+        if not ticket_part.backordered:
+            release_stock(
+                db, ticket_part.part_id, ticket_part.quantity, ticket_id=ticket.id, user_id=current_user.id
+            )
+            part_ids.append(ticket_part.part_id)
+
+    # The stock ledger and notification outbox outlive the ticket they mention
+    for model in (StockMovement, Notification):
+        db.execute(
+            update(model.__table__)
+            .where(model.ticket_id == ticket.id)
+            .values(ticket_id=None)
+        )
     db.delete(ticket)
     db.commit()
+    
+    events.publish(events.TICKET_DELETED, ticket_id=ticket_id)
+    publish_parts_changed(db, part_ids)
     return None
 
 
@@ -283,6 +366,8 @@ def archive_ticket(
     db: Session = Depends(get_db),
     ticket_id: int,
     archive_data: TicketArchiveRequest,
+    response: Response,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -291,12 +376,14 @@ def archive_ticket(
     Parameters:
     - **ticket_id**: ID of the ticket to archive
     - **archive_data**: Optional note to add with the archive action
+    - **If-Match** (header): Optional ticket version the change is based on
     
     Returns:
     - Updated ticket object
     
     Raises:
     - 404: Ticket not found
+    - 409: Ticket was modified by another request
     - 400: Ticket is already archived
     """
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -306,6 +393,8 @@ def archive_ticket(
             detail="Ticket not found",
         )
     
+    check_version(ticket, expected_version, "Ticket")
+    
     if ticket.is_archived:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -326,9 +415,11 @@ def archive_ticket(
     )
     db.add(ticket_update)
     
-    db.commit()
+    commit_or_conflict(db, "Ticket")
     db.refresh(ticket)
     
+    events.publish(events.TICKET_CHANGED, ticket=ticket, status_changed=False)
+    set_etag(response, ticket)
     return ticket
 
 
@@ -343,6 +434,8 @@ def unarchive_ticket(
     db: Session = Depends(get_db),
     ticket_id: int,
     archive_data: TicketArchiveRequest,
+    response: Response,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -351,12 +444,14 @@ def unarchive_ticket(
     Parameters:
     - **ticket_id**: ID of the ticket to unarchive
     - **archive_data**: Optional note to add with the unarchive action
+    - **If-Match** (header): Optional ticket version the change is based on
     
     Returns:
     - Updated ticket object
     
     Raises:
     - 404: Ticket not found
+    - 409: Ticket was modified by another request
     - 400: Ticket is not archived
     """
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -366,6 +461,8 @@ def unarchive_ticket(
             detail="Ticket not found",
         )
     
+    check_version(ticket, expected_version, "Ticket")
+    
     if not ticket.is_archived:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -386,9 +483,11 @@ def unarchive_ticket(
     )
     db.add(ticket_update)
     
-    db.commit()
+    commit_or_conflict(db, "Ticket")
     db.refresh(ticket)
     
+    events.publish(events.TICKET_CHANGED, ticket=ticket, status_changed=False)
+    set_etag(response, ticket)
     return ticket
 
 
@@ -461,6 +560,7 @@ def create_ticket_update(
     
     Raises:
     - 404: Ticket not found
+    - 409: Ticket status was changed concurrently by another request
     """
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
@@ -475,18 +575,21 @@ def create_ticket_update(
     update_data["user_id"] = current_user.id
     
     # Save previous status if changing status
-    if "new_status" in update_data and update_data["new_status"] != ticket.status:
+    status_changed = update_data["new_status"] != ticket.status
+    if status_changed:
         update_data["previous_status"] = ticket.status
         
         # Update the ticket's status
         ticket.status = update_data["new_status"]
         db.add(ticket)
+        enqueue_status_notification(db, ticket)
     
     ticket_update = TicketUpdate(**update_data)
     db.add(ticket_update)
-    db.commit()
+    commit_or_conflict(db, "Ticket")
     db.refresh(ticket_update)
     
+    events.publish(events.TICKET_CHANGED, ticket=ticket, status_changed=status_changed)
     return ticket_update
 
 
@@ -541,20 +644,24 @@ def add_ticket_part(
     db: Session = Depends(get_db),
     ticket_id: int,
     part_in: TicketPartCreate,
+    backorder: bool = Query(False, description="Add the part as backordered if there is not enough stock"),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Add a part to a specific ticket.
+    Add a part to a specific ticket, reserving it from stock.
     
     Parameters:
     - **ticket_id**: ID of the ticket
     - **part_in**: Part data including part_id, quantity, and price
+    - **backorder**: If there is not enough stock, add the part as backordered
+      instead of failing; no stock is reserved for a backordered part
     
     Returns:
     - Created ticket part object
     
     Raises:
     - 404: Ticket not found or Part not found
+    - 400: Insufficient stock (unless backorder is set)
     """
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
@@ -562,23 +669,36 @@ def add_ticket_part(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not found",
         )
+    if not row_exists(db, Part.id == part_in.part_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Part not found",
+        )
     
     # Override ticket_id in input to ensure consistency
     part_data = part_in.model_dump()
     part_data["ticket_id"] = ticket_id
     
     ticket_part = TicketPart(**part_data)
+    ticket_part.backordered = not reserve_stock(
+        db, ticket_part.part_id, ticket_part.quantity,
+        ticket_id=ticket_id, user_id=current_user.id,
+    )
+    if ticket_part.backordered and not backorder:
+        raise _insufficient_stock(db, ticket_part.part_id, ticket_part.quantity)
     db.add(ticket_part)
     
     # Update the ticket's total parts cost
-    ticket.total_parts_cost = ticket.total_parts_cost + ticket_part.calculate_total()
-    db.add(ticket)
+    _increment_parts_total(db, ticket.id, ticket_part.calculate_total())
     
     # Add update about adding part
+    note = f"Added {ticket_part.quantity} x part #{ticket_part.part_id}"
+    if ticket_part.backordered:
+        note += " (backordered)"
     ticket_update = TicketUpdate(
         ticket_id=ticket.id,
         new_status=ticket.status,
-        note=f"Added {ticket_part.quantity} x part #{ticket_part.part_id}",
+        note=note,
         user_id=current_user.id
     )
     db.add(ticket_update)
@@ -586,6 +706,7 @@ def add_ticket_part(
     db.commit()
     db.refresh(ticket_part)
     
+    publish_parts_changed(db, [ticket_part.part_id])
     return ticket_part
 
 
@@ -601,21 +722,29 @@ def update_ticket_part(
     ticket_id: int,
     part_id: int,
     part_in: TicketPartUpdate,
+    backorder: bool = Query(False, description="Backorder the part if there is not enough stock for the new quantity"),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Update a part associated with a specific ticket.
     
+    A quantity change reserves or returns the difference in stock. A
+    backordered part is reserved in full as soon as an update finds enough
+    stock for it.
+    
     Parameters:
     - **ticket_id**: ID of the ticket
     - **part_id**: ID of the part
     - **part_in**: Part update data (quantity and/or price)
+    - **backorder**: If there is not enough stock for a larger quantity,
+      return the reserved units and mark the part backordered instead of failing
     
     Returns:
     - Updated ticket part object
     
     Raises:
     - 404: Ticket part not found
+    - 400: Insufficient stock (unless backorder is set)
     """
     ticket_part = db.query(TicketPart).filter(
         TicketPart.ticket_id == ticket_id,
@@ -630,6 +759,22 @@ def update_ticket_part(
     
     # Calculate current total before update
     old_total = ticket_part.calculate_total()
+    old_quantity = ticket_part.quantity
+    new_quantity = part_in.quantity if part_in.quantity is not None else old_quantity
+    
+    # Reserve or return the difference in stock
+    movement = {"ticket_id": ticket_id, "user_id": current_user.id}
+    if ticket_part.backordered:
+        if reserve_stock(db, part_id, new_quantity, **movement):
+            ticket_part.backordered = False
+    elif new_quantity > old_quantity:
+        if not reserve_stock(db, part_id, new_quantity - old_quantity, **movement):
+            if not backorder:
+                raise _insufficient_stock(db, part_id, new_quantity - old_quantity)
+            release_stock(db, part_id, old_quantity, **movement)
+            ticket_part.backordered = True
+    elif new_quantity < old_quantity:
+        release_stock(db, part_id, old_quantity - new_quantity, **movement)
     
     # Update ticket part fields
     update_data = part_in.model_dump(exclude_unset=True)
@@ -643,15 +788,17 @@ def update_ticket_part(
     new_total = ticket_part.calculate_total()
     
     # Update the ticket's total parts cost
+    _increment_parts_total(db, ticket_id, new_total - old_total)
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    ticket.total_parts_cost = ticket.total_parts_cost - old_total + new_total
-    db.add(ticket)
     
     # Add update about updating part
+    note = f"Updated part #{part_id} details"
+    if ticket_part.backordered:
+        note += " (backordered)"
     ticket_update = TicketUpdate(
         ticket_id=ticket.id,
         new_status=ticket.status,
-        note=f"Updated part #{part_id} details",
+        note=note,
         user_id=current_user.id
     )
     db.add(ticket_update)
@@ -659,6 +806,7 @@ def update_ticket_part(
     db.commit()
     db.refresh(ticket_part)
     
+    publish_parts_changed(db, [part_id])
     return ticket_part
 
 
@@ -676,7 +824,7 @@ def remove_ticket_part(
     current_user: User = Depends(get_current_active_user),
 ) -> None:
     """
-    Remove a part from a specific ticket.
+    Remove a part from a specific ticket, returning its reserved stock.
     
     Parameters:
     - **ticket_id**: ID of the ticket
@@ -699,10 +847,15 @@ def remove_ticket_part(
     # Calculate total before removal
     removed_total = ticket_part.calculate_total()
     
+    if not ticket_part.backordered:
+        release_stock(
+            db, part_id, ticket_part.quantity,
+            ticket_id=ticket_id, user_id=current_user.id,
+        )
+    
     # Update the ticket's total parts cost
+    _increment_parts_total(db, ticket_id, -removed_total)
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    ticket.total_parts_cost = ticket.total_parts_cost - removed_total
-    db.add(ticket)
     
     # Add update about removing part
     ticket_update = TicketUpdate(
@@ -717,4 +870,93 @@ def remove_ticket_part(
     db.delete(ticket_part)
     db.commit()
     
-    return None
\ No newline at end of file
+    publish_parts_changed(db, [part_id])
+    return None
+
+
+# Maintenance Endpoints
+
+@router.post(
+    "/reconcile-parts-totals",
+    response_model=PartsTotalReconciliation,
+    summary="Reconcile ticket parts totals",
+    description="Recompute every ticket's parts total from its line items and report or fix mismatches. Only accessible to admin users."
+)
+def reconcile_ticket_parts_totals(
+    *,
+    db: Session = Depends(get_db),
+    fix: bool = False,
+    batch_size: int = Query(500, ge=1, le=10000),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Recompute every ticket's parts total from its line items.
+    
+    Parameters:
+    - **fix**: Write the recomputed totals back (default only reports)
+    - **batch_size**: Number of tickets repaired per transaction
+    
+    Returns:
+    - Number of tickets checked, the mismatches found and how many were fixed
+    
+    Only accessible to admin users.
+    """
+    return reconcile_parts_totals(db, fix=fix, batch_size=batch_size)
+
+
+@router.post(
+    "/auto-assign",
+    response_model=BulkAssignResult,
+    summary="Auto-assign tickets",
+    description="Assign technicians to open tickets using a workload balancing policy. Only accessible to admin users."
+)
+def auto_assign_tickets(
+    *,
+    db: Session = Depends(get_db),
+    assign_in: BulkAssignRequest,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Assign technicians to open tickets using a workload balancing policy.
+    
+    Parameters:
+    - **assign_in**: Ticket IDs to assign (defaults to every open, unassigned ticket), policy and optional skill tag
+    
+    Returns:
+    - The assignments made and the IDs of tickets left unassigned
+    
+    Only accessible to admin users.
+    """
+    query = db.query(Ticket).filter(
+        Ticket.technician_id.is_(None),
+        Ticket.is_archived == False,  # noqa: E712
+        Ticket.status.notin_(CLOSED_STATUSES),
+    )
+    if assign_in.ticket_ids is not None:
+        query = query.filter(Ticket.id.in_(assign_in.ticket_ids))
+    tickets = query.order_by(Ticket.id).all()
+
+    workload_tracker.ensure_loaded(db)
+    result = BulkAssignResult()
+    for ticket in tickets:
+        technician_id = workload_tracker.choose(assign_in.policy, assign_in.skill)
+        if technician_id is None:
+            result.unassigned.append(ticket.id)
+            continue
+        ticket.technician_id = technician_id
+        # Count the ticket right away so the next choice sees the new load
+        workload_tracker.apply_ticket(ticket)
+        result.assignments.append(
+            TicketAssignment(ticket_id=ticket.id, technician_id=technician_id)
+        )
+
+    try:
+        commit_or_conflict(db, "Ticket")
+    except HTTPException:
+        # Nothing was written, so rebuild the totals from the database
+        workload_tracker.reset()
+        raise
+
+    for ticket in tickets:
+        events.publish(events.TICKET_CHANGED, ticket=ticket, status_changed=False)
+    return result
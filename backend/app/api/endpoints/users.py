@@ -7,8 +7,13 @@ from app.core import security
 from app.core.deps import (
     get_current_admin_user, get_current_active_user, get_db
 )
+from app.core.integrity import ensure_unreferenced, row_exists
 from app.models.user import User
+from app.models.ticket import Ticket
+from app.models.ticket_update import TicketUpdate
+from app.models.stock_movement import StockMovement
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
+from app.services import events
 
 router = APIRouter()
 
@@ -69,15 +74,13 @@ def create_user(
     Only accessible to admin users.
     """
     # Check if user with this email or username already exists
-    user = db.query(User).filter(User.email == user_in.email).first()
-    if user:
+    if row_exists(db, User.email == user_in.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="A user with this email already exists",
         )
 
-    user = db.query(User).filter(User.username == user_in.username).first()
-    if user:
+    if row_exists(db, User.username == user_in.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="A user with this username already exists",
@@ -89,11 +92,15 @@ def create_user(
         username=user_in.username,
         full_name=user_in.full_name,
         role=user_in.role,
+        skills=user_in.skills,
+        bench_hours=user_in.bench_hours,
         hashed_password=security.get_password_hash(user_in.password),
     )
     db.add(user)
     db.commit()
     db.refresh(user)
+    
+    events.publish(events.USER_CHANGED, user=user)
     return user
 
 
@@ -141,16 +148,14 @@ def update_user_me(
     """
     # Check if updating to an existing email/username
     if user_in.email and user_in.email != current_user.email:
-        user = db.query(User).filter(User.email == user_in.email).first()
-        if user:
+        if row_exists(db, User.email == user_in.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A user with this email already exists",
             )
 
     if user_in.username and user_in.username != current_user.username:
-        user = db.query(User).filter(User.username == user_in.username).first()
-        if user:
+        if row_exists(db, User.username == user_in.username):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A user with this username already exists",
@@ -177,6 +182,8 @@ def update_user_me(
     db.add(current_user)
     db.commit()
     db.refresh(current_user)
+    
+    events.publish(events.USER_CHANGED, user=current_user)
     return current_user
 
 
@@ -264,18 +271,14 @@ def update_user(
 
     # Check if updating to an existing email/username
     if user_in.email and user_in.email != user.email:
-        user_exists = db.query(User).filter(
-            User.email == user_in.email).first()
-        if user_exists:
+        if row_exists(db, User.email == user_in.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A user with this email already exists",
             )
 
     if user_in.username and user_in.username != user.username:
-        user_exists = db.query(User).filter(
-            User.username == user_in.username).first()
-        if user_exists:
+        if row_exists(db, User.username == user_in.username):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A user with this username already exists",
@@ -302,6 +305,8 @@ def update_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    
+    events.publish(events.USER_CHANGED, user=user)
     return user
 
 
@@ -328,6 +333,8 @@ def delete_user(
     
     Raises:
     - 400: Cannot delete own user account
+    - 400: User is assigned to tickets, has written ticket updates or has
+      recorded stock movements; deactivate the account instead
     - 404: User not found
     
     Only accessible to admin users.
@@ -346,6 +353,20 @@ def delete_user(
             detail="Cannot delete own user account",
         )
 
+    # The ticket history and stock ledger keep pointing at who did the work
+    ensure_unreferenced(
+        db,
+        {
+            "tickets": Ticket.technician_id,
+            "ticket updates": TicketUpdate.user_id,
+            "stock movements": StockMovement.user_id,
+        },
+        user_id,
+        "Cannot delete user with ticket or stock history; deactivate the account instead",
+    )
+
     db.delete(user)
     db.commit()
+    
+    events.publish(events.USER_DELETED, user_id=user_id)
     return user
@@ -0,0 +1,63 @@
+from typing import Any, Optional
+
+from fastapi import Header, HTTPException, Response, status
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+
+def get_if_match_version(if_match: Optional[str] = Header(None)) -> Optional[int]:
+    """
+    Parse an If-Match header into the row version the client expects.
+
+    Accepts strong (``"3"``) and weak (``W/"3"``) entity tags as well as a
+    bare number. A missing header or ``*`` disables the precondition.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid If-Match header",
+        )
+
+
+def check_version(obj: Any, expected_version: Optional[int], resource: str) -> None:
+    """
+    Reject the request if the row changed since the client last read it.
+    """
+    if expected_version is not None and obj.version != expected_version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{resource} was modified by another request",
+        )
+
+
+def commit_or_conflict(db: Session, resource: str) -> None:
+    """
+    Commit the session, turning a lost version race into a 409 response.
+
+    The versioned UPDATE only matches the row version that was loaded, so
+    a concurrent writer committing first makes the flush raise
+    ``StaleDataError`` instead of silently overwriting its changes.
+    """
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{resource} was modified by another request",
+        )
+
+
+def set_etag(response: Response, obj: Any) -> None:
+    """
+    Expose the row version as an ETag for use in a later If-Match header.
+    """
+    response.headers["ETag"] = f'"{obj.version}"'
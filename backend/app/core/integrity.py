@@ -0,0 +1,62 @@
+"""
+Existence probes and delete guards.
+
+Testing a relationship such as ``part.ticket_parts`` for truth loads every
+referencing row into the session. These helpers ask the database instead:
+an ``EXISTS`` probe for a yes or no, and reference counts capped at
+``MAX_COUNTED`` rows per table, so the answer costs the same for a part used
+on one ticket or on a hundred thousand.
+"""
+from typing import Dict, Mapping
+
+from fastapi import HTTPException, status
+from sqlalchemy import exists, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+MAX_COUNTED = 1000
+
+
+def row_exists(db: Session, *criteria) -> bool:
+    """Whether any row matches ``criteria``, as one ``SELECT EXISTS`` probe."""
+    return bool(db.scalar(select(exists().where(*criteria))))
+
+
+def count_references(db: Session, references: Mapping[str, object], target_id: int) -> Dict[str, int]:
+    """
+    Rows pointing at ``target_id``, per label in ``references`` (label ->
+    foreign key column), in one grouped query. Each count stops at
+    ``MAX_COUNTED``. Labels without references are left out.
+    """
+    bounded = [
+        select(literal(label).label("source"))
+        .where(column == target_id)
+        .limit(MAX_COUNTED)
+        .subquery()
+        for label, column in references.items()
+    ]
+    blocking = union_all(*[select(subquery.c.source) for subquery in bounded]).subquery()
+    return {
+        source: count
+        for source, count in db.execute(
+            select(blocking.c.source, func.count()).group_by(blocking.c.source)
+        )
+    }
+
+
+def ensure_unreferenced(
+    db: Session, references: Mapping[str, object], target_id: int, message: str
+) -> None:
+    """
+    Refuse a delete with 400 while other rows still point at the row,
+    listing how many per table.
+    """
+    counts = count_references(db, references, target_id)
+    if counts:
+        blocking = ", ".join(
+            f"{count}{'+' if count >= MAX_COUNTED else ''} {label}"
+            for label, count in counts.items()
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{message} ({blocking})",
+        )
@@ -1,3 +1,4 @@
 from app.db.database import Base, engine, get_db, SessionLocal
+from app.db import fts  # noqa: F401  (registers full-text index DDL)
 
-__all__ = ["Base", "engine", "get_db", "SessionLocal"]
\ No newline at end of file
+__all__ = ["Base", "engine", "get_db", "SessionLocal"]
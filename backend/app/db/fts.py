@@ -0,0 +1,89 @@
+"""
+SQLite FTS5 full-text indexes.
+
+Each index is an external-content FTS5 table over some text columns of a
+regular table, keyed by that table's ``id`` and kept current by triggers.
+Deleting or updating a row only touches that row's index entry, so write
+cost and query latency stay flat as the tables grow.
+
+The indexes are created alongside ``Base.metadata.create_all`` on SQLite and
+by Alembic migrations; other databases simply don't get them.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.db.database import Base
+
+# fts table -> (content table, indexed columns, prefix index lengths)
+FTS_INDEXES: Dict[str, Tuple[str, Sequence[str], Optional[str]]] = {
+    "tickets_fts": ("tickets", ("ticket_number", "problem_description", "diagnosis"), None),
+    "ticket_updates_fts": ("ticket_updates", ("note",), None),
+    "customers_fts": ("customers", ("name", "email", "phone"), None),
+    "bikes_fts": ("bikes", ("name", "specs"), None),
+    # Short prefix indexes keep two- and three-letter type-ahead queries cheap
+    "parts_fts": ("parts", ("name", "category", "sku"), "2 3"),
+}
+
+
+def fts_create_statements(
+    fts_table: str,
+    content_table: str,
+    columns: Sequence[str],
+    prefix: Optional[str] = None,
+) -> List[str]:
+    """DDL for an external-content FTS5 table and its sync triggers."""
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    options = f"content='{content_table}', content_rowid='id'"
+    if prefix:
+        options += f", prefix='{prefix}'"
+
+    delete_old = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values});"
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({cols}, {options})",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {content_table} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {content_table} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {content_table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def fts_drop_statements(fts_table: str) -> List[str]:
+    return [
+        f"DROP TRIGGER IF EXISTS {fts_table}_ai",
+        f"DROP TRIGGER IF EXISTS {fts_table}_ad",
+        f"DROP TRIGGER IF EXISTS {fts_table}_au",
+        f"DROP TABLE IF EXISTS {fts_table}",
+    ]
+
+
+def fts_rebuild_statement(fts_table: str) -> str:
+    """Repopulate an index from its content table."""
+    return f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_fts_indexes(target, connection, **kw) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    for fts_table, (content_table, columns, prefix) in FTS_INDEXES.items():
+        for statement in fts_create_statements(fts_table, content_table, columns, prefix):
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_fts_indexes(target, connection, **kw) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    for fts_table in FTS_INDEXES:
+        for statement in fts_drop_statements(fts_table):
+            connection.exec_driver_sql(statement)
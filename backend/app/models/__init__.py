@@ -6,4 +6,7 @@ from app.models.ticket import Ticket, TicketStatus, TicketPriority
 from app.models.ticket_update import TicketUpdate
 from app.models.part import Part
 from app.models.ticket_part import TicketPart
-from app.models.service import Service
\ No newline at end of file
+from app.models.service import Service
+from app.models.stock_movement import StockMovement, StockSnapshot, MovementKind
+from app.models.part_usage import PartUsageDaily, PartUsagePending
+from app.models.notification import Notification, NotificationStatus
\ No newline at end of file
@@ -12,7 +12,7 @@ class Bike(BaseModel):
     specs = Column(Text, nullable=True)
     
     # Owner relationship
-    owner_id = Column(Integer, ForeignKey("customers.id"))
+    owner_id = Column(Integer, ForeignKey("customers.id", ondelete="CASCADE"), index=True)
     owner = relationship("Customer", back_populates="bikes")
     
     # Relationship to tickets
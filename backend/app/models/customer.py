@@ -1,8 +1,24 @@
-from sqlalchemy import Column, String, Text, Integer, ForeignKey
+import re
+from typing import Optional
+
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, event
 from sqlalchemy.orm import relationship
 
 from app.models.base import BaseModel
 
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Digits of a phone number, so every way of writing it compares equal."""
+    digits = _NON_DIGITS.sub("", phone or "")
+    return digits or None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email or None
+
 
 class Customer(BaseModel):
     __tablename__ = "customers"
@@ -12,6 +28,26 @@ class Customer(BaseModel):
     email = Column(String(100), index=True)
     phone = Column(String(20))
     notes = Column(Text, nullable=True)
+    # ID in the system the customer was imported from
+    external_id = Column(String(50), nullable=True, unique=True, index=True)
+    
+    # Maintained lookup keys: phone digits (also reversed, so a suffix search
+    # is an index range scan) and lowercased email
+    phone_digits = Column(String(20), nullable=True, index=True)
+    phone_digits_reversed = Column(String(20), nullable=True, index=True)
+    email_normalized = Column(String(100), nullable=True, index=True)
     
     # Relationship to bikes
     bikes = relationship("Bike", back_populates="owner", cascade="all, delete-orphan")
+    
+    def set_lookup_keys(self) -> None:
+        """Recompute the normalized phone and email columns."""
+        self.phone_digits = normalize_phone(self.phone)
+        self.phone_digits_reversed = self.phone_digits[::-1] if self.phone_digits else None
+        self.email_normalized = normalize_email(self.email)
+
+
+@event.listens_for(Customer, "before_insert")
+@event.listens_for(Customer, "before_update")
+def _set_lookup_keys(mapper, connection, target: Customer) -> None:
+    target.set_lookup_keys()
@@ -0,0 +1,39 @@
+import enum
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String, Text
+
+from app.models.base import BaseModel
+from app.models.ticket import TicketStatus
+
+
+class NotificationStatus(str, enum.Enum):
+    PENDING = "pending"  # Waiting for its next delivery attempt
+    SENT = "sent"
+    FAILED = "failed"    # Gave up after the maximum number of attempts
+
+
+class Notification(BaseModel):
+    """
+    Outbox of customer emails. Rows are written in the same transaction as
+    the ticket change they announce and delivered later by the worker.
+    """
+    __tablename__ = "notifications"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="SET NULL"), nullable=True, index=True)
+    ticket_status = Column(Enum(TicketStatus), nullable=True)
+    recipient = Column(String(100), nullable=False)
+    subject = Column(String(200), nullable=False)
+    body = Column(Text, nullable=False)
+
+    status = Column(Enum(NotificationStatus), nullable=False, default=NotificationStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    # The worker polls for due pending rows
+    __table_args__ = (
+        Index("ix_notifications_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, SmallInteger
+from sqlalchemy import Boolean, Column, Integer, String, Text, Float, SmallInteger, event
 from sqlalchemy.orm import relationship
 
 from app.models.base import BaseModel
@@ -17,16 +17,35 @@ class Part(BaseModel):
     quantity = Column(Integer, default=0)
     min_stock = Column(Integer, default=0)
     reorder_point = Column(Integer, default=0)
+    lead_time_days = Column(Integer, nullable=True)  # Supplier lead time; the forecast default when unset
+    # Maintained copy of quantity <= reorder_point, so low-stock lookups can use an index
+    is_low_stock = Column(Boolean, nullable=False, default=False, server_default="0", index=True)
     
     # Pricing
     cost_price = Column(Float, nullable=False)  # Wholesale cost
     retail_price = Column(Float, nullable=False)  # Retail price
     
+    # Optimistic concurrency: bumped on every ORM update
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
+    __mapper_args__ = {"version_id_col": version}
+    
     # Relationship
-    ticket_parts = relationship("TicketPart", back_populates="part")
+    # Parts in use can't be deleted, so a delete has no line items to load
+    ticket_parts = relationship("TicketPart", back_populates="part", passive_deletes=True)
     
     def calculate_markup(self):
         """Calculate markup percentage."""
         if self.cost_price > 0:
             return ((self.retail_price - self.cost_price) / self.cost_price) * 100
-        return 0
\ No newline at end of file
+        return 0
+    
+    def check_low_stock(self) -> bool:
+        """Whether stock is at or below the reorder point."""
+        return (self.quantity or 0) <= (self.reorder_point or 0)
+
+
+@event.listens_for(Part, "before_insert")
+@event.listens_for(Part, "before_update")
+def _set_low_stock_flag(mapper, connection, target: Part) -> None:
+    target.is_low_stock = target.check_low_stock()
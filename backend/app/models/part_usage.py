@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, UniqueConstraint, event, func, inspect, insert, select
+
+from app.models.base import BaseModel
+from app.models.ticket_part import TicketPart
+
+
+class PartUsageDaily(BaseModel):
+    """Units of a part used on tickets on one day, with what they sold and cost for."""
+    __tablename__ = "part_usage_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    part_id = Column(Integer, ForeignKey("parts.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False, index=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)  # Sum of quantity * price_charged
+    cost = Column(Float, nullable=False, default=0.0)     # Sum of quantity * cost_price when rolled up
+
+    __table_args__ = (
+        UniqueConstraint("part_id", "day", name="uq_part_usage_daily_part_day"),
+    )
+
+
+class PartUsagePending(BaseModel):
+    """A day whose ticket parts changed since its rollup was last computed."""
+    __tablename__ = "part_usage_pending"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+
+
+def _mark_day_pending(connection, ticket_part_id: int) -> None:
+    # The day comes from the stored row, so no attribute has to be loaded mid-flush
+    connection.execute(
+        insert(PartUsagePending.__table__).from_select(
+            ["day"],
+            select(func.date(TicketPart.created_at)).where(TicketPart.id == ticket_part_id),
+        )
+    )
+
+
+@event.listens_for(TicketPart, "after_insert")
+def _ticket_part_added(mapper, connection, target: TicketPart) -> None:
+    _mark_day_pending(connection, target.id)
+
+
+@event.listens_for(TicketPart, "after_update")
+def _ticket_part_changed(mapper, connection, target: TicketPart) -> None:
+    attrs = inspect(target).attrs
+    if any(attrs[name].history.has_changes() for name in ("part_id", "quantity", "price_charged")):
+        _mark_day_pending(connection, target.id)
+
+
+@event.listens_for(TicketPart, "before_delete")
+def _ticket_part_removed(mapper, connection, target: TicketPart) -> None:
+    _mark_day_pending(connection, target.id)
@@ -0,0 +1,78 @@
+import enum
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, Index, event, inspect, insert
+from sqlalchemy.orm import relationship
+
+from app.models.base import BaseModel
+from app.models.part import Part
+
+
+class MovementKind(str, enum.Enum):
+    RECEIVE = "receive"  # Delivered by a supplier
+    CONSUME = "consume"  # Reserved for a ticket
+    RETURN = "return"    # Released from a ticket back into stock
+    ADJUST = "adjust"    # Manual correction or count
+
+
+class StockMovement(BaseModel):
+    """Append-only record of one change to a part's stock level."""
+    __tablename__ = "stock_movements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    part_id = Column(Integer, ForeignKey("parts.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(Enum(MovementKind), nullable=False)
+    quantity_change = Column(Integer, nullable=False)
+
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="SET NULL"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    occurred_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    part = relationship("Part")
+
+    __table_args__ = (
+        Index("ix_stock_movements_part_occurred", "part_id", "occurred_at"),
+    )
+
+
+class StockSnapshot(BaseModel):
+    """A part's stock level as of ``taken_at``, rolled up from the ledger."""
+    __tablename__ = "stock_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    part_id = Column(Integer, ForeignKey("parts.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    taken_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_snapshots_part_taken", "part_id", "taken_at"),
+    )
+
+
+# Quantities written through the ORM (new parts, part edits) are recorded as
+# adjustments; the atomic stock helpers record their own movements.
+@event.listens_for(Part, "after_insert")
+def _record_initial_stock(mapper, connection, target: Part) -> None:
+    if target.quantity:
+        connection.execute(insert(StockMovement.__table__).values(
+            part_id=target.id,
+            kind=MovementKind.ADJUST,
+            quantity_change=target.quantity,
+            occurred_at=datetime.utcnow(),
+        ))
+
+
+@event.listens_for(Part, "after_update")
+def _record_stock_edit(mapper, connection, target: Part) -> None:
+    history = inspect(target).attrs.quantity.history
+    if not history.has_changes():
+        return
+    old = (history.deleted[0] if history.deleted else 0) or 0
+    change = (target.quantity or 0) - old
+    if change:
+        connection.execute(insert(StockMovement.__table__).values(
+            part_id=target.id,
+            kind=MovementKind.ADJUST,
+            quantity_change=change,
+            occurred_at=datetime.utcnow(),
+        ))
@@ -15,6 +15,10 @@ class TicketStatus(str, enum.Enum):
     DELIVERED = "delivered"
 
 
+# Statuses of finished work; a ticket in any other status is open
+CLOSED_STATUSES = (TicketStatus.COMPLETE, TicketStatus.DELIVERED)
+
+
 class TicketPriority(str, enum.Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -34,8 +38,11 @@ class Ticket(BaseModel):
     estimated_completion = Column(DateTime, nullable=True)
     is_archived = Column(Boolean, default=False, index=True)
     
+    # Optimistic concurrency: bumped on every ORM update
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
     # Relationships
-    bike_id = Column(Integer, ForeignKey("bikes.id"))
+    bike_id = Column(Integer, ForeignKey("bikes.id", ondelete="CASCADE"), index=True)
     bike = relationship("Bike", back_populates="tickets")
     
     technician_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -49,6 +56,11 @@ class Ticket(BaseModel):
     labor_cost = Column(Float, default=0.0)
     total_parts_cost = Column(Float, default=0.0)
     
+    # Bench time the work is expected to take
+    estimated_hours = Column(Float, nullable=True)
+    
+    __mapper_args__ = {"version_id_col": version}
+    
     def calculate_total(self):
         """Calculate the total cost of the ticket including parts and labor."""
         return self.labor_cost + self.total_parts_cost
\ No newline at end of file
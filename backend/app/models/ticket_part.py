@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.models.base import BaseModel
@@ -8,16 +8,22 @@ class TicketPart(BaseModel):
     __tablename__ = "ticket_parts"
 
     id = Column(Integer, primary_key=True, index=True)
-    ticket_id = Column(Integer, ForeignKey("tickets.id"))
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), index=True)
     part_id = Column(Integer, ForeignKey("parts.id"))
     
     quantity = Column(Integer, default=1)
     price_charged = Column(Float)  # Price charged to customer (may differ from retail)
+    backordered = Column(Boolean, default=False, nullable=False, server_default="0")  # No stock reserved yet
     
     # Relationships
     ticket = relationship("Ticket", back_populates="parts")
     part = relationship("Part", back_populates="ticket_parts")
     
+    # Usage rollups recompute one day of line items at a time
+    __table_args__ = (
+        Index("ix_ticket_parts_created_at", "created_at"),
+    )
+    
     def calculate_total(self):
         """Calculate total cost for this line item."""
         return self.quantity * self.price_charged
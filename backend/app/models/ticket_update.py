@@ -10,7 +10,7 @@ class TicketUpdate(BaseModel):
     __tablename__ = "ticket_updates"
 
     id = Column(Integer, primary_key=True, index=True)
-    ticket_id = Column(Integer, ForeignKey("tickets.id"))
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), index=True)
     ticket = relationship("Ticket", back_populates="updates")
     
     previous_status = Column(Enum(TicketStatus), nullable=True)
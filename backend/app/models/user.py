@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Enum
+from sqlalchemy import Column, String, Boolean, Enum, Float
 import enum
 from app.models.base import BaseModel
 
@@ -18,4 +18,13 @@ class User(BaseModel):
     hashed_password = Column(String, nullable=False)
     full_name = Column(String)
     role = Column(Enum(UserRole), default=UserRole.TECHNICIAN, nullable=False)
-    is_active = Column(Boolean, default=True)
\ No newline at end of file
+    is_active = Column(Boolean, default=True)
+    skills = Column(String, nullable=True)  # Comma-separated skill tags, e.g. "suspension,wheels"
+    bench_hours = Column(Float, nullable=True)  # Labor hours per working day; shop default when unset
+    
+    @property
+    def skill_tags(self):
+        """Normalized set of the user's skill tags."""
+        if not self.skills:
+            return frozenset()
+        return frozenset(tag.strip().lower() for tag in self.skills.split(",") if tag.strip())
\ No newline at end of file
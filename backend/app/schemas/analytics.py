@@ -0,0 +1,42 @@
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel
+
+
+class PartMover(BaseModel):
+    """A part's usage on tickets over a reporting period"""
+    part_id: int
+    name: str
+    sku: Optional[str] = None
+    category: Optional[str] = None
+    quantity: int
+    revenue: float
+    cost: float
+    margin: float
+
+
+class DeadStockPart(BaseModel):
+    """A part in stock that hasn't been used on a ticket during the period"""
+    part_id: int
+    name: str
+    sku: Optional[str] = None
+    category: Optional[str] = None
+    quantity: int
+    stock_value: float  # quantity * cost_price
+    last_used_on: Optional[date] = None
+
+
+class CategoryMargin(BaseModel):
+    """Revenue and cost of the parts used on tickets, per part category"""
+    category: Optional[str] = None
+    quantity: int
+    revenue: float
+    cost: float
+    margin: float
+    margin_percent: float
+
+
+class UsageRollupResult(BaseModel):
+    """Result of refreshing the daily part usage rollups"""
+    days_refreshed: int
+    rows_written: int
@@ -0,0 +1,35 @@
+from typing import List, Optional
+import enum
+from pydantic import BaseModel
+
+
+class AssignmentPolicyName(str, enum.Enum):
+    LEAST_LOADED = "least_loaded"
+    ROUND_ROBIN = "round_robin"
+    SKILL_TAG = "skill_tag"
+
+
+class TechnicianWorkload(BaseModel):
+    """Live open-work totals for an active technician"""
+    technician_id: int
+    username: str
+    skills: List[str] = []
+    open_tickets: int
+    estimated_hours: float
+
+
+class BulkAssignRequest(BaseModel):
+    """Schema for bulk auto-assignment requests"""
+    ticket_ids: Optional[List[int]] = None  # Defaults to every open, unassigned ticket
+    policy: AssignmentPolicyName = AssignmentPolicyName.LEAST_LOADED
+    skill: Optional[str] = None
+
+
+class TicketAssignment(BaseModel):
+    ticket_id: int
+    technician_id: int
+
+
+class BulkAssignResult(BaseModel):
+    assignments: List[TicketAssignment] = []
+    unassigned: List[int] = []
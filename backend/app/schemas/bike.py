@@ -1,4 +1,5 @@
 from typing import Optional, List
+from datetime import datetime
 from pydantic import BaseModel, Field
 
 
@@ -29,9 +30,29 @@ class Bike(BikeInDBBase):
     pass
 
 
+class DeletionCounts(BaseModel):
+    """Rows removed, or that would be removed, by deleting a customer or bike"""
+    customers: int = 0
+    bikes: int = 0
+    tickets: int = 0
+    ticket_updates: int = 0
+    ticket_parts: int = 0
+    dry_run: bool = False
+
+
 # Avoiding circular imports
+from app.models.ticket import TicketStatus
 from app.schemas.ticket import Ticket
 
 
+class BikeWithStats(BikeInDBBase):
+    """A bike with its service history totals, when requested from the bike list"""
+    ticket_count: Optional[int] = None
+    last_service_at: Optional[datetime] = None
+    open_ticket_status: Optional[TicketStatus] = None
+    lifetime_spend: Optional[float] = None
+
+
 class BikeWithTickets(BikeInDBBase):
-    tickets: List[Ticket] = []
\ No newline at end of file
+    tickets: List[Ticket] = []
+    ticket_count: int = 0
\ No newline at end of file
@@ -1,7 +1,22 @@
 from typing import List, Optional
+from datetime import datetime
+import enum
 from pydantic import BaseModel, EmailStr, Field
 
 from app.schemas.bike import Bike
+from app.schemas.ticket import Ticket
+
+
+class PhoneMatch(str, enum.Enum):
+    """How a phone filter is compared with the customer's phone digits"""
+    EXACT = "exact"
+    SUFFIX = "suffix"      # The last digits, as read out at the counter
+    CONTAINS = "contains"  # Anywhere in the number; not indexed
+
+
+class ImportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
 
 
 class CustomerBase(BaseModel):
@@ -31,5 +46,83 @@ class Customer(CustomerInDBBase):
     pass
 
 
+class CustomerMatch(CustomerInDBBase):
+    """A customer found by fuzzy search, with its similarity to the query"""
+    score: float
+
+
+class DuplicateCluster(BaseModel):
+    """Customers that are likely the same person"""
+    survivor_id: int  # The oldest record, proposed to keep
+    customer_ids: List[int]
+    reasons: List[str] = []  # Which rules matched: email, phone, name
+
+
+class CustomerMergeRequest(BaseModel):
+    survivor_id: int
+    customer_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
+class CustomerMergeResult(BaseModel):
+    survivor_id: int
+    merged_ids: List[int]
+    bikes_moved: int
+
+
+class CustomerImportRow(CustomerCreate):
+    external_id: Optional[str] = Field(None, max_length=50)
+
+
+class BikeImportRow(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    specs: Optional[str] = None
+    # The owner, by the external ID or email of a customer
+    owner_external_id: Optional[str] = None
+    owner_email: Optional[str] = None
+
+
+class ImportRowError(BaseModel):
+    row: int  # Line number in the file; a CSV header is line 1
+    record: Optional[str] = None
+    error: str
+
+
+class ImportedRecord(BaseModel):
+    """Where an imported row ended up"""
+    row: int
+    record: str  # customer or bike
+    id: int
+    external_id: Optional[str] = None
+    existing: bool = False  # A customer already imported under this external ID, or a bike its owner already had
+
+
+class CustomerImportResult(BaseModel):
+    rows_read: int = 0
+    customers_created: int = 0
+    customers_existing: int = 0
+    bikes_created: int = 0
+    bikes_existing: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []  # The first 100 failed rows
+    mapping: List[ImportedRecord] = []
+
+
 class CustomerWithBikes(CustomerInDBBase):
-    bikes: List[Bike] = []
\ No newline at end of file
+    bikes: List[Bike] = []
+
+
+class BikeOverview(Bike):
+    """A bike with its service history totals and latest tickets"""
+    ticket_count: int = 0
+    open_tickets: int = 0
+    last_service_at: Optional[datetime] = None
+    lifetime_spend: float = 0.0
+    recent_tickets: List[Ticket] = []
+
+
+class CustomerOverview(CustomerInDBBase):
+    """A customer with their bikes and service history totals"""
+    bikes: List[BikeOverview] = []
+    ticket_count: int = 0
+    open_tickets: int = 0
+    lifetime_spend: float = 0.0
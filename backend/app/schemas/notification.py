@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class NotificationDeliveryResult(BaseModel):
+    """Outcome of one pass of the notification worker over the outbox"""
+    sent: int = 0
+    retried: int = 0  # Failed this time, rescheduled with backoff
+    failed: int = 0   # Gave up after the maximum number of attempts
@@ -11,6 +11,7 @@ class PartBase(BaseModel):
     quantity: int = 0
     min_stock: int = 0
     reorder_point: int = 0
+    lead_time_days: Optional[int] = Field(None, ge=0)
     
     cost_price: float
     retail_price: float
@@ -29,6 +30,7 @@ class PartUpdate(BaseModel):
     quantity: Optional[int] = None
     min_stock: Optional[int] = None
     reorder_point: Optional[int] = None
+    lead_time_days: Optional[int] = Field(None, ge=0)
     
     cost_price: Optional[float] = None
     retail_price: Optional[float] = None
@@ -36,6 +38,8 @@ class PartUpdate(BaseModel):
 
 class PartInDBBase(PartBase):
     id: int
+    version: int
+    is_low_stock: bool = False
     
     model_config = {
         "from_attributes": True
@@ -47,4 +51,82 @@ class Part(PartInDBBase):
     def markup(self) -> float:
         if self.cost_price and self.cost_price > 0:
             return ((self.retail_price - self.cost_price) / self.cost_price) * 100
-        return 0
\ No newline at end of file
+        return 0
+
+
+class PartLookup(BaseModel):
+    """Catalog entry returned by type-ahead and barcode lookups"""
+    id: int
+    name: str
+    sku: Optional[str] = None
+    category: Optional[str] = None
+    quantity: int
+    retail_price: float
+    
+    model_config = {
+        "from_attributes": True
+    }
+
+
+
+class StockReceiptLine(BaseModel):
+    """One line of a supplier delivery, identified by part_id or SKU"""
+    part_id: Optional[int] = None
+    sku: Optional[str] = Field(None, max_length=50)
+    quantity: int = Field(..., gt=0)
+    cost_price: Optional[float] = Field(None, ge=0)  # New wholesale cost, if it changed
+
+
+class StockReceipt(BaseModel):
+    lines: List[StockReceiptLine] = Field(..., min_length=1, max_length=5000)
+
+
+class StockReceiptLineResult(BaseModel):
+    line: int  # Zero-based index into the submitted lines
+    part_id: Optional[int] = None
+    sku: Optional[str] = None
+    received: int = 0
+    quantity: Optional[int] = None  # Stock on hand after the receipt
+    error: Optional[str] = None
+
+
+class StockReceiptResult(BaseModel):
+    received_lines: int
+    failed_lines: int
+    results: List[StockReceiptLineResult]
+
+
+
+class PartImportError(BaseModel):
+    row: int  # Line number in the file, counting the header as line 1
+    sku: Optional[str] = None
+    error: str
+
+
+class PartImportResult(BaseModel):
+    rows_read: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[PartImportError] = []  # The first 100 failed rows
+
+
+class ReorderProposal(BaseModel):
+    """Reorder levels for a part derived from its recent demand"""
+    part_id: int
+    sku: Optional[str] = None
+    name: str
+    daily_demand: float  # Smoothed mean units used per day
+    demand_std: float    # Standard deviation of daily demand
+    lead_time_days: int
+    current_min_stock: int
+    current_reorder_point: int
+    proposed_min_stock: int  # Safety stock
+    proposed_reorder_point: int
+
+
+class ReorderForecast(BaseModel):
+    parts_forecast: int  # Parts with demand in the history window
+    parts_changed: int   # Parts whose proposed levels differ from the current ones
+    applied: bool = False
+    proposals: List[ReorderProposal] = []  # Changed parts, largest reorder point change first
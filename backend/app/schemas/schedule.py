@@ -0,0 +1,21 @@
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel
+
+
+class DayAvailability(BaseModel):
+    """Bench time on one day, for one technician or the whole shop"""
+    date: date
+    workday: bool
+    capacity_hours: float
+    booked_hours: float     # Labor on open tickets due that day
+    available_hours: float  # Most labor that can still be promised for that day
+    full: bool
+
+
+class CompletionQuote(BaseModel):
+    """Earliest date new work of the given size can be promised"""
+    technician_id: Optional[int] = None  # Whole shop when unset
+    hours: float
+    start: date
+    earliest_completion: Optional[date] = None  # None when there is no bench capacity
@@ -0,0 +1,18 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    """A single ranked search result"""
+    id: int
+    title: str
+    snippet: Optional[str] = None
+    score: float = 0
+
+
+class SearchResults(BaseModel):
+    """Search results grouped by entity type, best matches first"""
+    query: str
+    tickets: List[SearchHit] = []
+    customers: List[SearchHit] = []
+    bikes: List[SearchHit] = []
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+from app.models.stock_movement import MovementKind
+
+
+class StockMovement(BaseModel):
+    id: int
+    part_id: int
+    kind: MovementKind
+    quantity_change: int
+    ticket_id: Optional[int] = None
+    user_id: Optional[int] = None
+    occurred_at: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class StockLevel(BaseModel):
+    """A part's stock on hand at a point in time"""
+    part_id: int
+    at: datetime
+    quantity: int
+
+
+class StockCompaction(BaseModel):
+    """Result of rolling old ledger movements into snapshots"""
+    snapshots_taken: int
+    movements_removed: int
@@ -15,6 +15,7 @@ class TicketBase(BaseModel):
     bike_id: int
     technician_id: Optional[int] = None
     labor_cost: float = 0.0
+    estimated_hours: Optional[float] = Field(None, ge=0)
     is_archived: bool = False
 
 
@@ -30,6 +31,7 @@ class TicketUpdate(BaseModel):
     estimated_completion: Optional[datetime] = None
     technician_id: Optional[int] = None
     labor_cost: Optional[float] = None
+    estimated_hours: Optional[float] = Field(None, ge=0)
     note: Optional[str] = None
     is_archived: Optional[bool] = None
 
@@ -39,11 +41,27 @@ class TicketArchiveRequest(BaseModel):
     note: Optional[str] = None
 
 
+class PartsTotalMismatch(BaseModel):
+    """A ticket whose stored parts total disagrees with its line items"""
+    ticket_id: int
+    ticket_number: Optional[str] = None
+    stored_total: Optional[float] = None
+    computed_total: float
+
+
+class PartsTotalReconciliation(BaseModel):
+    """Result of a parts total reconciliation run"""
+    tickets_checked: int
+    mismatches: List[PartsTotalMismatch] = []
+    fixed: int = 0
+
+
 class TicketInDBBase(TicketBase):
     id: int
     created_at: datetime
     updated_at: datetime
     total_parts_cost: float
+    version: int
     
     model_config = {
         "from_attributes": True
@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.schemas.part import Part
 
@@ -12,16 +12,17 @@ class TicketPartBase(BaseModel):
 
 
 class TicketPartCreate(TicketPartBase):
-    pass
+    quantity: int = Field(1, ge=1)
 
 
 class TicketPartUpdate(BaseModel):
-    quantity: Optional[int] = None
+    quantity: Optional[int] = Field(None, ge=1)
     price_charged: Optional[float] = None
 
 
 class TicketPartInDBBase(TicketPartBase):
     id: int
+    backordered: bool = False
     
     model_config = {
         "from_attributes": True
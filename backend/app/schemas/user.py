@@ -9,6 +9,8 @@ class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
     full_name: Optional[str] = None
     role: UserRole = UserRole.TECHNICIAN
+    skills: Optional[str] = Field(None, max_length=255)
+    bench_hours: Optional[float] = Field(None, ge=0, le=24)
     
     
 class UserCreate(UserBase):
@@ -20,6 +22,8 @@ class UserUpdate(BaseModel):
     username: Optional[str] = Field(None, min_length=3, max_length=50)
     full_name: Optional[str] = None
     role: Optional[UserRole] = None
+    skills: Optional[str] = Field(None, max_length=255)
+    bench_hours: Optional[float] = Field(None, ge=0, le=24)
     password: Optional[str] = Field(None, min_length=8)
     is_active: Optional[bool] = None
 
@@ -0,0 +1,17 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from app.models.ticket import TicketStatus, TicketPriority
+
+
+class QueueEntry(BaseModel):
+    """A ticket in a technician's work queue, most urgent first"""
+    ticket_id: int
+    ticket_number: Optional[str] = None
+    status: TicketStatus
+    priority: TicketPriority
+    estimated_completion: Optional[datetime] = None
+    status_since: datetime
+    blocked: bool
+    score: float
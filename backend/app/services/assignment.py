@@ -0,0 +1,230 @@
+"""
+Workload-balanced technician assignment.
+
+``WorkloadTracker`` keeps live open-ticket counts and estimated labor hours
+per active technician. It is built once from the database and then kept
+current from ticket and user events, so choosing a technician never runs
+a query. Policies decide which technician gets the next ticket.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.ticket import CLOSED_STATUSES, Ticket
+from app.models.user import User, UserRole
+from app.schemas.assignment import AssignmentPolicyName
+from app.services import events
+
+# Labor assumed for tickets without an estimate
+DEFAULT_TICKET_HOURS = 1.0
+
+
+def ticket_hours(estimated_hours: Optional[float]) -> float:
+    """Labor hours a ticket counts for, defaulting when it has no estimate."""
+    if estimated_hours is None:
+        return DEFAULT_TICKET_HOURS
+    return estimated_hours
+
+
+def _is_open(ticket: Ticket) -> bool:
+    return not ticket.is_archived and ticket.status not in CLOSED_STATUSES
+
+
+class TechnicianLoad:
+    """Open work currently assigned to one technician."""
+
+    __slots__ = ("technician_id", "username", "skills", "open_tickets", "hours")
+
+    def __init__(self, technician_id: int, username: str, skills=frozenset()):
+        self.technician_id = technician_id
+        self.username = username
+        self.skills = skills
+        self.open_tickets = 0
+        self.hours = 0.0
+
+
+class WorkloadTracker:
+    """Incrementally maintained per-technician workload totals."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._technicians: Dict[int, TechnicianLoad] = {}
+        # Open assigned tickets: ticket_id -> (technician_id, hours)
+        self._tickets: Dict[int, Tuple[int, float]] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._technicians.clear()
+            self._tickets.clear()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        """Build the totals from active technicians and their open tickets."""
+        technicians = (
+            db.query(User)
+            .filter(User.role == UserRole.TECHNICIAN, User.is_active == True)  # noqa: E712
+            .all()
+        )
+        tickets = (
+            db.query(Ticket.id, Ticket.technician_id, Ticket.estimated_hours)
+            .filter(Ticket.technician_id.isnot(None))
+            .filter(Ticket.is_archived == False)  # noqa: E712
+            .filter(Ticket.status.notin_(CLOSED_STATUSES))
+            .all()
+        )
+
+        with self._lock:
+            self.reset()
+            for user in technicians:
+                self._technicians[user.id] = TechnicianLoad(user.id, user.username, user.skill_tags)
+            for ticket_id, technician_id, hours in tickets:
+                self._add(ticket_id, technician_id, ticket_hours(hours))
+            self._loaded = True
+
+    def apply_ticket(self, ticket: Ticket) -> None:
+        """Move a ticket's contribution to match its current state."""
+        with self._lock:
+            self._remove(ticket.id)
+            if ticket.technician_id is not None and _is_open(ticket):
+                self._add(ticket.id, ticket.technician_id, ticket_hours(ticket.estimated_hours))
+
+    def remove_ticket(self, ticket_id: int) -> None:
+        with self._lock:
+            self._remove(ticket_id)
+
+    def apply_user(self, user: User) -> None:
+        """Add, refresh or drop a technician from the roster."""
+        with self._lock:
+            if user.role == UserRole.TECHNICIAN and user.is_active:
+                load = self._technicians.get(user.id)
+                if load is None:
+                    load = TechnicianLoad(user.id, user.username)
+                    self._technicians[user.id] = load
+                    for technician_id, hours in self._tickets.values():
+                        if technician_id == user.id:
+                            load.open_tickets += 1
+                            load.hours += hours
+                load.username = user.username
+                load.skills = user.skill_tags
+            else:
+                self._technicians.pop(user.id, None)
+
+    def remove_user(self, user_id: int) -> None:
+        with self._lock:
+            self._technicians.pop(user_id, None)
+
+    def workloads(self) -> List[TechnicianLoad]:
+        with self._lock:
+            return sorted(self._technicians.values(), key=lambda load: load.technician_id)
+
+    def choose(
+        self,
+        policy: AssignmentPolicyName = AssignmentPolicyName.LEAST_LOADED,
+        skill: Optional[str] = None,
+    ) -> Optional[int]:
+        """Pick a technician for the next ticket, or None if nobody is available."""
+        with self._lock:
+            candidates = self.workloads()
+            if not candidates:
+                return None
+            chosen = POLICIES[policy].choose(candidates, skill)
+            return chosen.technician_id
+
+    def _add(self, ticket_id: int, technician_id: int, hours: float) -> None:
+        self._tickets[ticket_id] = (technician_id, hours)
+        load = self._technicians.get(technician_id)
+        if load is not None:
+            load.open_tickets += 1
+            load.hours += hours
+
+    def _remove(self, ticket_id: int) -> None:
+        previous = self._tickets.pop(ticket_id, None)
+        if previous is None:
+            return
+        technician_id, hours = previous
+        load = self._technicians.get(technician_id)
+        if load is not None:
+            load.open_tickets -= 1
+            load.hours -= hours
+
+
+class LeastLoadedPolicy:
+    """Fewest estimated hours first, then fewest open tickets."""
+
+    def choose(self, candidates: List[TechnicianLoad], skill: Optional[str] = None) -> TechnicianLoad:
+        return min(candidates, key=lambda load: (load.hours, load.open_tickets, load.technician_id))
+
+
+class RoundRobinPolicy:
+    """Cycle through technicians in ID order, ignoring load."""
+
+    def __init__(self) -> None:
+        self._last_id: Optional[int] = None
+
+    def choose(self, candidates: List[TechnicianLoad], skill: Optional[str] = None) -> TechnicianLoad:
+        chosen = candidates[0]
+        if self._last_id is not None:
+            chosen = next(
+                (load for load in candidates if load.technician_id > self._last_id),
+                candidates[0],
+            )
+        self._last_id = chosen.technician_id
+        return chosen
+
+
+class SkillTagPolicy:
+    """Least loaded among technicians tagged with the skill, falling back to everyone."""
+
+    def choose(self, candidates: List[TechnicianLoad], skill: Optional[str] = None) -> TechnicianLoad:
+        if skill:
+            tag = skill.strip().lower()
+            skilled = [load for load in candidates if tag in load.skills]
+            if skilled:
+                candidates = skilled
+        return LeastLoadedPolicy().choose(candidates)
+
+
+POLICIES = {
+    AssignmentPolicyName.LEAST_LOADED: LeastLoadedPolicy(),
+    AssignmentPolicyName.ROUND_ROBIN: RoundRobinPolicy(),
+    AssignmentPolicyName.SKILL_TAG: SkillTagPolicy(),
+}
+
+
+workload_tracker = WorkloadTracker()
+
+
+def _on_ticket_changed(ticket: Ticket, **_) -> None:
+    if workload_tracker.loaded:
+        workload_tracker.apply_ticket(ticket)
+
+
+def _on_ticket_deleted(ticket_id: int, **_) -> None:
+    if workload_tracker.loaded:
+        workload_tracker.remove_ticket(ticket_id)
+
+
+def _on_user_changed(user: User, **_) -> None:
+    if workload_tracker.loaded:
+        workload_tracker.apply_user(user)
+
+
+def _on_user_deleted(user_id: int, **_) -> None:
+    if workload_tracker.loaded:
+        workload_tracker.remove_user(user_id)
+
+
+events.subscribe(events.TICKET_CHANGED, _on_ticket_changed)
+events.subscribe(events.TICKET_DELETED, _on_ticket_deleted)
+events.subscribe(events.USER_CHANGED, _on_user_changed)
+events.subscribe(events.USER_DELETED, _on_user_deleted)
@@ -0,0 +1,185 @@
+"""
+Duplicate customer detection and merging.
+
+Comparing every customer with every other is quadratic, so candidates are
+found by blocking instead: customers are bucketed by a few keys (phone
+number, email address, the sorted words of their name) and only customers
+sharing a bucket are compared. Buckets bigger than ``MAX_BLOCK_SIZE`` are
+skipped; a key that many customers share (a placeholder phone number, a
+common name) says nothing about any two of them.
+
+A candidate pair is a duplicate when
+  - the emails match,
+  - the phone numbers match and the names are similar, or
+  - the names have the same words and no phone number or email disagrees.
+Duplicate pairs are joined into clusters with union-find. The oldest
+customer of a cluster is proposed to survive the merge.
+"""
+import re
+from collections import defaultdict
+from itertools import combinations
+from typing import DefaultDict, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from app.models.bike import Bike
+from app.models.customer import Customer
+from app.schemas.customer import CustomerMergeResult, DuplicateCluster
+from app.services.customer_search import trigrams
+
+MAX_BLOCK_SIZE = 50
+NAME_SIMILARITY = 0.5
+# Shorter numbers are extensions or typos and match too much
+MIN_PHONE_DIGITS = 7
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# id, name, phone digits, normalized email
+Row = Tuple[int, str, Optional[str], Optional[str]]
+
+
+def _phone_key(digits: Optional[str]) -> Optional[str]:
+    if not digits or len(digits) < MIN_PHONE_DIGITS:
+        return None
+    # Ignore a country code written on some records but not others
+    return digits[-10:]
+
+
+def _name_key(name: Optional[str]) -> Optional[str]:
+    words = sorted(_WORD_RE.findall((name or "").lower()))
+    # A lone first name is too common to block on
+    return " ".join(words) if len(words) > 1 else None
+
+
+def _name_similarity(a: str, b: str) -> float:
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    shared = len(grams_a & grams_b)
+    return shared / (len(grams_a) + len(grams_b) - shared)
+
+
+def _conflicts(a: Optional[str], b: Optional[str]) -> bool:
+    return a is not None and b is not None and a != b
+
+
+def _match_reason(a: Row, b: Row) -> Optional[str]:
+    _, name_a, phone_a, email_a = a
+    _, name_b, phone_b, email_b = b
+    phone_a, phone_b = _phone_key(phone_a), _phone_key(phone_b)
+    if email_a and email_a == email_b:
+        return "email"
+    if phone_a and phone_a == phone_b and _name_similarity(name_a, name_b) >= NAME_SIMILARITY:
+        return "phone"
+    if (
+        _name_key(name_a) and _name_key(name_a) == _name_key(name_b)
+        and not _conflicts(phone_a, phone_b) and not _conflicts(email_a, email_b)
+    ):
+        return "name"
+    return None
+
+
+def _blocks(rows: Sequence[Row]) -> Iterable[List[int]]:
+    """Row indexes sharing each blocking key, for buckets worth comparing."""
+    buckets: DefaultDict[str, List[int]] = defaultdict(list)
+    for index, (_, name, phone, email) in enumerate(rows):
+        for key in (
+            f"p:{_phone_key(phone)}" if _phone_key(phone) else None,
+            f"e:{email}" if email else None,
+            f"n:{_name_key(name)}" if _name_key(name) else None,
+        ):
+            if key:
+                buckets[key].append(index)
+    return (bucket for bucket in buckets.values() if 1 < len(bucket) <= MAX_BLOCK_SIZE)
+
+
+def cluster_duplicates(rows: Sequence[Row]) -> List[DuplicateCluster]:
+    """Clusters of likely duplicate customers among ``rows``, largest first."""
+    parent = list(range(len(rows)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    reasons: Dict[int, Set[str]] = defaultdict(set)
+    compared: Set[Tuple[int, int]] = set()
+    for bucket in _blocks(rows):
+        for a, b in combinations(bucket, 2):
+            if (a, b) in compared:
+                continue
+            compared.add((a, b))
+            reason = _match_reason(rows[a], rows[b])
+            if reason:
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+                    reasons[root_a] |= reasons.pop(root_b, set())
+                reasons[find(a)].add(reason)
+
+    members: DefaultDict[int, List[int]] = defaultdict(list)
+    for index in range(len(rows)):
+        members[find(index)].append(rows[index][0])
+    clusters = [
+        DuplicateCluster(
+            survivor_id=min(customer_ids),
+            customer_ids=sorted(customer_ids),
+            reasons=sorted(reasons[root]),
+        )
+        for root, customer_ids in members.items()
+        if len(customer_ids) > 1
+    ]
+    clusters.sort(key=lambda cluster: (-len(cluster.customer_ids), cluster.survivor_id))
+    return clusters
+
+
+def find_duplicate_customers(db: Session) -> List[DuplicateCluster]:
+    """Likely duplicate clusters across the whole customers table."""
+    rows = db.query(
+        Customer.id, Customer.name, Customer.phone_digits, Customer.email_normalized
+    ).all()
+    return cluster_duplicates([tuple(row) for row in rows])
+
+
+def external_id_conflicts(customers: Iterable[Customer]) -> List[str]:
+    """
+    The distinct external IDs among ``customers`` when there is more than
+    one; merging them would leave all but one unmapped, and importing from
+    that system again would recreate the merged-away customers.
+    """
+    external_ids = sorted({customer.external_id for customer in customers if customer.external_id})
+    return external_ids if len(external_ids) > 1 else []
+
+
+def merge_customers(db: Session, survivor: Customer, losers: Sequence[Customer]) -> CustomerMergeResult:
+    """
+    Fold ``losers`` into ``survivor`` in the caller's transaction.
+
+    Their bikes move to the survivor with one UPDATE, their notes are
+    appended to its notes, missing contact details and the external ID are
+    filled in from them, and they are deleted. The caller checks
+    ``external_id_conflicts`` first, commits and publishes the customer
+    events.
+    """
+    loser_ids = sorted(loser.id for loser in losers)
+    notes = [survivor.notes] if survivor.notes else []
+    for loser in sorted(losers, key=lambda customer: customer.id):
+        if loser.notes and loser.notes not in notes:
+            notes.append(loser.notes)
+        survivor.email = survivor.email or loser.email
+        survivor.phone = survivor.phone or loser.phone
+        survivor.external_id = survivor.external_id or loser.external_id
+    survivor.notes = "\n\n".join(notes) or None
+
+    bikes_moved = db.execute(
+        update(Bike.__table__).where(Bike.owner_id.in_(loser_ids)).values(owner_id=survivor.id)
+    ).rowcount
+    for loser in losers:
+        db.expunge(loser)
+    # The losers have no bikes left, so nothing cascades. They go before the
+    # survivor is flushed, which may take over one of their external IDs
+    db.execute(delete(Customer.__table__).where(Customer.id.in_(loser_ids)))
+    db.flush()
+    return CustomerMergeResult(survivor_id=survivor.id, merged_ids=loser_ids, bikes_moved=bikes_moved)
@@ -0,0 +1,287 @@
+"""
+Bulk customer and bike import.
+
+Rows are read from a CSV or NDJSON stream and written in chunks: each chunk's
+customers are inserted with one executemany ``INSERT ... RETURNING``, then
+its bikes with another, and the chunk is committed. Memory is bounded by the
+chunk size, plus an ``external ID -> customer ID`` and ``email -> customer ID``
+map of the owners seen so far.
+
+Every row is a customer or a bike, told apart by a ``record`` column, or by
+whether it names an owner when there is none. Bikes name their owner by
+``owner_external_id`` or ``owner_email``, resolved from the map first and
+then, for owners imported earlier, from the database with one query per
+chunk. A customer has to come before its bikes in the file.
+
+Customers whose external ID was imported before are not created again, and
+a bike is skipped when its owner already had a bike of that name before the
+import started, so an interrupted import can simply be rerun. Bikes have no
+key of their own, so two same-named bikes for one owner within a single
+import are both created.
+"""
+import csv
+import json
+from typing import Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.bike import Bike
+from app.models.customer import Customer, normalize_email, normalize_phone
+from app.schemas.customer import (
+    BikeImportRow, CustomerImportResult, CustomerImportRow, ImportedRecord, ImportFormat, ImportRowError
+)
+
+DEFAULT_CHUNK_SIZE = 1000
+# Row errors beyond this are counted but not listed
+MAX_REPORTED_ERRORS = 100
+
+CUSTOMER = "customer"
+BIKE = "bike"
+
+
+def _format_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _csv_rows(stream: TextIO) -> Iterator[Tuple[int, Dict[str, object]]]:
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _ndjson_rows(stream: TextIO) -> Iterator[Tuple[int, Dict[str, object]]]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            row = {"_error": f"Invalid JSON: {exc.msg}"}
+        if not isinstance(row, dict):
+            row = {"_error": "Each line must be a JSON object"}
+        yield line_number, {str(key).lower(): value for key, value in row.items()}
+
+
+def _clean(row: Dict[str, object]) -> Dict[str, object]:
+    values = {}
+    for key, value in row.items():
+        if isinstance(value, str):
+            value = value.strip()
+        elif isinstance(value, int) and key in ("external_id", "owner_external_id"):
+            # Old systems often number their customers
+            value = str(value)
+        if key and value not in (None, ""):
+            values[key] = value
+    return values
+
+
+class _OwnerMap:
+    """Customer IDs by external ID and normalized email, filled as the import goes."""
+
+    def __init__(self) -> None:
+        self.by_external_id: Dict[str, int] = {}
+        self.by_email: Dict[str, int] = {}
+
+    def add(self, customer_id: int, external_id: Optional[str], email: Optional[str]) -> None:
+        if external_id:
+            self.by_external_id[external_id] = customer_id
+        if email:
+            # The first customer with an email owns bikes that name it
+            self.by_email.setdefault(email, customer_id)
+
+    def load(self, db: Session, external_ids: Set[str], emails: Set[str]) -> None:
+        """Look up the keys not seen yet in this import, one query per kind."""
+        external_ids = external_ids - self.by_external_id.keys()
+        if external_ids:
+            for customer_id, external_id in db.query(Customer.id, Customer.external_id).filter(
+                Customer.external_id.in_(external_ids)
+            ):
+                self.by_external_id[external_id] = customer_id
+        emails = emails - self.by_email.keys()
+        if emails:
+            for email, customer_id in db.query(
+                Customer.email_normalized, func.min(Customer.id)
+            ).filter(Customer.email_normalized.in_(emails)).group_by(Customer.email_normalized):
+                self.by_email[email] = customer_id
+
+
+class _Importer:
+    def __init__(self, db: Session, chunk_size: int) -> None:
+        self.db = db
+        self.chunk_size = chunk_size
+        self.owners = _OwnerMap()
+        self.result = CustomerImportResult()
+        self.customers: List[Tuple[int, CustomerImportRow]] = []
+        self.bikes: List[Tuple[int, BikeImportRow]] = []
+        # Bikes after this one were created by this import
+        self.last_bike_id = db.query(func.max(Bike.id)).scalar() or 0
+
+    def fail(self, row: int, record: Optional[str], error: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(ImportRowError(row=row, record=record, error=error))
+
+    def add(self, row_number: int, raw: Dict[str, object]) -> None:
+        self.result.rows_read += 1
+        values = _clean(raw)
+        if "_error" in values:
+            self.fail(row_number, None, str(values["_error"]))
+            return
+        record = str(values.pop("record", "")).lower() or (
+            BIKE if "owner_external_id" in values or "owner_email" in values else CUSTOMER
+        )
+        schema = {CUSTOMER: CustomerImportRow, BIKE: BikeImportRow}.get(record)
+        if schema is None:
+            self.fail(row_number, record, "record: Must be customer or bike")
+            return
+        try:
+            parsed: BaseModel = schema(**values)
+        except ValidationError as exc:
+            self.fail(row_number, record, _format_error(exc))
+            return
+        if record == BIKE and not (parsed.owner_external_id or parsed.owner_email):
+            self.fail(row_number, record, "Bike needs owner_external_id or owner_email")
+            return
+        (self.customers if record == CUSTOMER else self.bikes).append((row_number, parsed))
+        if len(self.customers) + len(self.bikes) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.customers:
+            self._insert_customers()
+        if self.bikes:
+            self._insert_bikes()
+        self.db.commit()
+        self.customers, self.bikes = [], []
+
+    def _insert_customers(self) -> None:
+        self.owners.load(
+            self.db, {row.external_id for _, row in self.customers if row.external_id}, set()
+        )
+        new: List[Tuple[int, CustomerImportRow]] = []
+        pending: Set[str] = set()
+        repeats: List[Tuple[int, CustomerImportRow]] = []
+        for row_number, row in self.customers:
+            if row.external_id in self.owners.by_external_id:
+                self._map(row_number, CUSTOMER, self.owners.by_external_id[row.external_id], row.external_id, True)
+                self.result.customers_existing += 1
+            elif row.external_id in pending:
+                repeats.append((row_number, row))
+            else:
+                if row.external_id:
+                    pending.add(row.external_id)
+                new.append((row_number, row))
+
+        if new:
+            table = Customer.__table__
+            rows = []
+            for _, row in new:
+                digits = normalize_phone(row.phone)
+                rows.append({
+                    "name": row.name,
+                    "email": row.email,
+                    "phone": row.phone,
+                    "notes": row.notes,
+                    "external_id": row.external_id,
+                    # Core inserts skip the mapper hook that maintains these
+                    "phone_digits": digits,
+                    "phone_digits_reversed": digits[::-1] if digits else None,
+                    "email_normalized": normalize_email(row.email),
+                })
+            ids = self.db.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            for (row_number, row), customer_id, values in zip(new, ids, rows):
+                self.owners.add(customer_id, row.external_id, values["email_normalized"])
+                self._map(row_number, CUSTOMER, customer_id, row.external_id)
+            self.result.customers_created += len(new)
+
+        # The same external ID twice in one chunk is one customer
+        for row_number, row in repeats:
+            self._map(row_number, CUSTOMER, self.owners.by_external_id[row.external_id], row.external_id, True)
+            self.result.customers_existing += 1
+
+    def _insert_bikes(self) -> None:
+        self.owners.load(
+            self.db,
+            {row.owner_external_id for _, row in self.bikes if row.owner_external_id},
+            {normalize_email(row.owner_email) for _, row in self.bikes if row.owner_email},
+        )
+        new: List[Tuple[int, Dict[str, object]]] = []
+        for row_number, row in self.bikes:
+            owner_id = None
+            if row.owner_external_id:
+                owner_id = self.owners.by_external_id.get(row.owner_external_id)
+            if owner_id is None and row.owner_email:
+                owner_id = self.owners.by_email.get(normalize_email(row.owner_email))
+            if owner_id is None:
+                self.fail(row_number, BIKE, "Owner not found")
+                continue
+            new.append((row_number, {"name": row.name, "specs": row.specs, "owner_id": owner_id}))
+        if not new:
+            return
+
+        # Bikes the owners had before this import, from an earlier run of the file
+        existing = {
+            (owner_id, name): bike_id
+            for bike_id, owner_id, name in self.db.query(Bike.id, Bike.owner_id, Bike.name).filter(
+                Bike.owner_id.in_({values["owner_id"] for _, values in new}),
+                Bike.id <= self.last_bike_id,
+            )
+        }
+        if existing:
+            fresh = []
+            for row_number, values in new:
+                bike_id = existing.get((values["owner_id"], values["name"]))
+                if bike_id is None:
+                    fresh.append((row_number, values))
+                else:
+                    self._map(row_number, BIKE, bike_id, existing=True)
+                    self.result.bikes_existing += 1
+            new = fresh
+            if not new:
+                return
+        table = Bike.__table__
+        ids = self.db.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            [values for _, values in new],
+        ).scalars().all()
+        for (row_number, _), bike_id in zip(new, ids):
+            self._map(row_number, BIKE, bike_id)
+        self.result.bikes_created += len(new)
+
+    def _map(self, row: int, record: str, record_id: int, external_id: Optional[str] = None, existing: bool = False) -> None:
+        self.result.mapping.append(
+            ImportedRecord(row=row, record=record, id=record_id, external_id=external_id, existing=existing)
+        )
+
+
+def import_customers(
+    db: Session,
+    stream: TextIO,
+    format: ImportFormat = ImportFormat.CSV,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> CustomerImportResult:
+    """
+    Import customers and bikes from CSV (with a header row) or NDJSON.
+
+    Customer rows take the ``CustomerCreate`` fields plus ``external_id``;
+    bike rows take ``name``, ``specs`` and ``owner_external_id`` or
+    ``owner_email``. Unknown columns are ignored. Each chunk is committed on
+    its own; the caller publishes ``CUSTOMERS_BULK_CHANGED``.
+    """
+    importer = _Importer(db, chunk_size)
+    rows = _csv_rows(stream) if format == ImportFormat.CSV else _ndjson_rows(stream)
+    for row_number, row in rows:
+        importer.add(row_number, row)
+    if importer.customers or importer.bikes:
+        importer.flush()
+    return importer.result
@@ -0,0 +1,235 @@
+"""
+Typo-tolerant customer search.
+
+Names and email mailbox names are compared by trigram similarity, the
+measure used by PostgreSQL's pg_trgm: each word is padded (two spaces
+before, one after) and split into three-character runs, and two strings score
+``shared / (|a| + |b| - shared)`` over their trigram sets. "Jon Smiht"
+still shares most of its trigrams with "John Smith".
+
+On PostgreSQL the search runs in the database against pg_trgm GIN indexes.
+Elsewhere it uses a process-local inverted index from trigram to customer
+IDs, built lazily from the ``customers`` table and kept current from
+customer change events. Scoring is vectorized with NumPy over the query's
+posting lists.
+"""
+import heapq
+import re
+import threading
+from collections import defaultdict
+from typing import DefaultDict, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models.customer import Customer
+from app.services import events
+
+DEFAULT_MIN_SCORE = 0.3
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+FIELDS = ("name", "email")
+
+
+def _email_key(email: Optional[str]) -> Optional[str]:
+    # Only the mailbox name tells customers apart; shared domains would match everyone
+    return email.split("@", 1)[0] if email else email
+
+
+def trigrams(text: Optional[str]) -> FrozenSet[str]:
+    """pg_trgm-style trigrams of the words in ``text``."""
+    grams: Set[str] = set()
+    for word in _WORD_RE.findall((text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class _FieldIndex:
+    """Inverted trigram index over one text field."""
+
+    def __init__(self) -> None:
+        self.postings: DefaultDict[str, Set[int]] = defaultdict(set)
+        self.grams: Dict[int, FrozenSet[str]] = {}
+        # Trigram count per customer ID, for scoring in bulk
+        self.sizes = np.zeros(0, dtype=np.float64)
+        # Posting sets frozen into arrays on first use after a change
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def add(self, customer_id: int, text: Optional[str]) -> None:
+        grams = trigrams(text)
+        if not grams:
+            return
+        self.grams[customer_id] = grams
+        if customer_id >= len(self.sizes):
+            sizes = np.zeros(max(customer_id + 1, 2 * len(self.sizes)), dtype=np.float64)
+            sizes[:len(self.sizes)] = self.sizes
+            self.sizes = sizes
+        self.sizes[customer_id] = len(grams)
+        for gram in grams:
+            self.postings[gram].add(customer_id)
+            self._arrays.pop(gram, None)
+
+    def remove(self, customer_id: int) -> None:
+        for gram in self.grams.pop(customer_id, ()):
+            ids = self.postings[gram]
+            ids.discard(customer_id)
+            if not ids:
+                del self.postings[gram]
+            self._arrays.pop(gram, None)
+        if customer_id < len(self.sizes):
+            self.sizes[customer_id] = 0
+
+    def scores(self, query_grams: FrozenSet[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """IDs sharing a trigram with the query, and their similarity to it."""
+        arrays = [self._array(gram) for gram in query_grams if gram in self.postings]
+        if not arrays:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        shared = np.bincount(np.concatenate(arrays), minlength=len(self.sizes))
+        ids = np.flatnonzero(shared)
+        counts = shared[ids]
+        return ids, counts / (len(query_grams) + self.sizes[ids] - counts)
+
+    def _array(self, gram: str) -> np.ndarray:
+        array = self._arrays.get(gram)
+        if array is None:
+            ids = self.postings[gram]
+            array = self._arrays[gram] = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        return array
+
+
+class CustomerTrigramIndex:
+    """Process-local trigram index over customer names and emails."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._fields: Dict[str, _FieldIndex] = {field: _FieldIndex() for field in FIELDS}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._fields = {field: _FieldIndex() for field in FIELDS}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        """Build the index with one query over the customers table."""
+        rows = db.query(Customer.id, Customer.name, Customer.email).all()
+        with self._lock:
+            self.reset()
+            for customer_id, name, email in rows:
+                self._add(customer_id, name, email)
+            self._loaded = True
+
+    def upsert(self, customer_id: int, name: Optional[str], email: Optional[str]) -> None:
+        with self._lock:
+            self.remove(customer_id)
+            self._add(customer_id, name, email)
+
+    def remove(self, customer_id: int) -> None:
+        with self._lock:
+            for index in self._fields.values():
+                index.remove(customer_id)
+
+    def search(self, query: str, limit: int = 20, min_score: float = DEFAULT_MIN_SCORE) -> List[Tuple[int, float]]:
+        """
+        Customers whose name or email is at least ``min_score`` similar to
+        ``query``, as ``(customer_id, score)`` pairs, best first.
+
+        Shared trigrams are counted for every candidate at once with
+        ``bincount`` over the query's posting lists, so a common first name
+        matching thousands of customers costs about as much as a rare one.
+        """
+        texts = (query, _email_key(query) if "@" in query else query)
+        hits: Dict[int, float] = {}
+        with self._lock:
+            for field, text in zip(FIELDS, texts):
+                query_grams = trigrams(text)
+                if not query_grams:
+                    continue
+                ids, scores = self._fields[field].scores(query_grams)
+                keep = scores >= min_score
+                ids, scores = ids[keep], scores[keep]
+                # Only the best few of each field can make the final list
+                if len(ids) > limit:
+                    top = np.argpartition(-scores, limit - 1)[:limit]
+                    cutoff = scores[top].min()
+                    keep = scores >= cutoff
+                    ids, scores = ids[keep], scores[keep]
+                for customer_id, score in zip(ids.tolist(), scores.tolist()):
+                    if score > hits.get(customer_id, 0.0):
+                        hits[customer_id] = score
+        return heapq.nsmallest(limit, hits.items(), key=lambda item: (-item[1], item[0]))
+
+    def _add(self, customer_id: int, name: Optional[str], email: Optional[str]) -> None:
+        for field, text in zip(FIELDS, (name, _email_key(email))):
+            self._fields[field].add(customer_id, text)
+
+
+customer_trigram_index = CustomerTrigramIndex()
+
+
+def _pg_search(db: Session, query: str, limit: int, min_score: float) -> List[Tuple[Customer, float]]:
+    score = func.greatest(
+        func.similarity(Customer.name, query),
+        func.coalesce(func.similarity(Customer.email, query), 0),
+    ).label("score")
+    # The % operator is what the trigram GIN indexes serve
+    db.execute(func.set_config("pg_trgm.similarity_threshold", str(min_score), True).select())
+    rows = (
+        db.query(Customer, score)
+        .filter(or_(Customer.name.op("%")(query), Customer.email.op("%")(query)))
+        .order_by(score.desc(), Customer.id)
+        .limit(limit)
+        .all()
+    )
+    return [(customer, float(value)) for customer, value in rows]
+
+
+def fuzzy_search_customers(
+    db: Session, query: str, limit: int = 20, min_score: float = DEFAULT_MIN_SCORE
+) -> List[Tuple[Customer, float]]:
+    """Customers ranked by trigram similarity of their name or email to ``query``."""
+    if db.bind.dialect.name == "postgresql":
+        return _pg_search(db, query, limit, min_score)
+
+    customer_trigram_index.ensure_loaded(db)
+    hits = customer_trigram_index.search(query, limit=limit, min_score=min_score)
+    if not hits:
+        return []
+    customers = {
+        customer.id: customer
+        for customer in db.query(Customer).filter(Customer.id.in_([customer_id for customer_id, _ in hits]))
+    }
+    return [
+        (customers[customer_id], score)
+        for customer_id, score in hits
+        if customer_id in customers
+    ]
+
+
+def _on_customer_changed(customer: Customer, **_) -> None:
+    if customer_trigram_index.loaded:
+        customer_trigram_index.upsert(customer.id, customer.name, customer.email)
+
+
+def _on_customer_deleted(customer_id: int, **_) -> None:
+    if customer_trigram_index.loaded:
+        customer_trigram_index.remove(customer_id)
+
+
+def _on_customers_bulk_changed(**_) -> None:
+    customer_trigram_index.reset()
+
+
+events.subscribe(events.CUSTOMER_CHANGED, _on_customer_changed)
+events.subscribe(events.CUSTOMER_DELETED, _on_customer_deleted)
+events.subscribe(events.CUSTOMERS_BULK_CHANGED, _on_customers_bulk_changed)
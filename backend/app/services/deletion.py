@@ -0,0 +1,130 @@
+"""
+Set-based deletes of customers and bikes.
+
+Deleting a customer removes their bikes, the bikes' tickets and the tickets'
+updates and part lines. Rather than loading all of that into the session
+for the ORM cascade to delete row by row, each table is cleared with one
+``DELETE`` selecting its rows by a subquery on the parent IDs, children
+first. The work is a fixed handful of indexed statements however much
+history hangs off the customer.
+
+The foreign keys also cascade in the database; deleting in order keeps
+SQLite, which doesn't enforce foreign keys by default, consistent as well.
+Bypassing the ORM skips its delete hooks, so the part usage days touched
+are queued for the rollups here, and the reserved stock on the deleted part
+lines is put back with one grouped read and one executemany update, as
+deleting a single ticket would.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.bike import Bike
+from app.models.customer import Customer
+from app.models.notification import Notification
+from app.models.part_usage import PartUsagePending
+from app.models.stock_movement import StockMovement
+from app.models.ticket import Ticket
+from app.models.ticket_part import TicketPart
+from app.models.ticket_update import TicketUpdate
+from app.schemas.bike import DeletionCounts
+from app.services.stock import release_stock_many
+
+
+def _bike_filter(customer_id: Optional[int], bike_id: Optional[int]):
+    if customer_id is not None:
+        return Bike.owner_id == customer_id
+    return Bike.id == bike_id
+
+
+def _ticket_ids(customer_id: Optional[int], bike_id: Optional[int]):
+    bikes = select(Bike.id).where(_bike_filter(customer_id, bike_id))
+    return select(Ticket.id).where(Ticket.bike_id.in_(bikes))
+
+
+def count_deletion(
+    db: Session, customer_id: Optional[int] = None, bike_id: Optional[int] = None
+) -> DeletionCounts:
+    """What deleting the customer or the bike would remove, counted in one query."""
+    tickets = _ticket_ids(customer_id, bike_id)
+
+    def count(model, clause):
+        return select(func.count()).select_from(model).where(clause).scalar_subquery()
+
+    bikes, ticket_count, updates, parts = db.execute(select(
+        count(Bike, _bike_filter(customer_id, bike_id)),
+        count(Ticket, Ticket.id.in_(tickets)),
+        count(TicketUpdate, TicketUpdate.ticket_id.in_(tickets)),
+        count(TicketPart, TicketPart.ticket_id.in_(tickets)),
+    )).one()
+    return DeletionCounts(
+        customers=1 if customer_id is not None else 0,
+        bikes=bikes,
+        tickets=ticket_count,
+        ticket_updates=updates,
+        ticket_parts=parts,
+        dry_run=True,
+    )
+
+
+def delete_cascade(
+    db: Session,
+    customer_id: Optional[int] = None,
+    bike_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> Tuple[DeletionCounts, List[int], List[int]]:
+    """
+    Delete a customer (or a single bike) and everything under it.
+
+    Returns the rows removed per table, the IDs of the deleted tickets and
+    the IDs of the parts whose stock was put back, for the caller to publish
+    ``TICKET_DELETED`` and ``PART_CHANGED`` once it has committed.
+    """
+    tickets = _ticket_ids(customer_id, bike_id)
+    ticket_ids = [ticket_id for ticket_id, in db.execute(tickets)]
+
+    # Reserved parts go back into stock with the ticket's line items
+    released = dict(db.execute(
+        select(TicketPart.part_id, func.sum(TicketPart.quantity))
+        .where(TicketPart.ticket_id.in_(tickets))
+        .where(TicketPart.backordered == False)  # noqa: E712
+        .group_by(TicketPart.part_id)
+    ).all())
+    release_stock_many(db, released, user_id=user_id)
+
+    db.execute(
+        insert(PartUsagePending.__table__).from_select(
+            ["day"],
+            select(func.date(TicketPart.created_at))
+            .where(TicketPart.ticket_id.in_(tickets))
+            .distinct(),
+        )
+    )
+    # The stock ledger and notification outbox outlive the tickets they mention
+    for model in (StockMovement, Notification):
+        db.execute(
+            update(model.__table__)
+            .where(model.ticket_id.in_(tickets))
+            .values(ticket_id=None)
+        )
+    parts = db.execute(delete(TicketPart.__table__).where(TicketPart.ticket_id.in_(tickets)))
+    updates = db.execute(delete(TicketUpdate.__table__).where(TicketUpdate.ticket_id.in_(tickets)))
+    ticket_rows = db.execute(
+        delete(Ticket.__table__).where(
+            Ticket.bike_id.in_(select(Bike.id).where(_bike_filter(customer_id, bike_id)))
+        )
+    )
+    bikes = db.execute(delete(Bike.__table__).where(_bike_filter(customer_id, bike_id)))
+    customers = 0
+    if customer_id is not None:
+        customers = db.execute(delete(Customer.__table__).where(Customer.id == customer_id)).rowcount
+
+    counts = DeletionCounts(
+        customers=customers,
+        bikes=bikes.rowcount,
+        tickets=ticket_rows.rowcount,
+        ticket_updates=updates.rowcount,
+        ticket_parts=parts.rowcount,
+    )
+    return counts, ticket_ids, list(released)
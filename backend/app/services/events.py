@@ -0,0 +1,52 @@
+"""
+In-process domain events.
+
+Endpoints publish an event once their transaction has committed, and the
+in-memory indexes in this package subscribe to keep themselves current
+incrementally instead of re-querying the database on every read.
+"""
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, List
+
+# Payload: ticket (committed Ticket instance), status_changed (bool)
+TICKET_CHANGED = "ticket_changed"
+# Payload: ticket_id (int)
+TICKET_DELETED = "ticket_deleted"
+# Payload: user (committed User instance)
+USER_CHANGED = "user_changed"
+# Payload: user_id (int)
+USER_DELETED = "user_deleted"
+# Payload: part (committed Part instance)
+PART_CHANGED = "part_changed"
+# Payload: part_id (int)
+PART_DELETED = "part_deleted"
+# Payload: part (committed Part instance), is_low_stock (bool)
+LOW_STOCK_CHANGED = "low_stock_changed"
+# Payload: db (Session that committed the changes), part_ids (list of int):
+# many parts changed at once; indexes should rebuild or re-read those parts
+PARTS_BULK_CHANGED = "parts_bulk_changed"
+# Payload: customer (committed Customer instance)
+CUSTOMER_CHANGED = "customer_changed"
+# Payload: customer_id (int)
+CUSTOMER_DELETED = "customer_deleted"
+# No payload: many customers changed at once; indexes should rebuild
+CUSTOMERS_BULK_CHANGED = "customers_bulk_changed"
+
+_subscribers: DefaultDict[str, List[Callable[..., None]]] = defaultdict(list)
+
+
+def subscribe(event: str, handler: Callable[..., None]) -> None:
+    """Register ``handler`` to be called with the payload of ``event``."""
+    _subscribers[event].append(handler)
+
+
+def unsubscribe(event: str, handler: Callable[..., None]) -> None:
+    """Remove a handler registered with ``subscribe``."""
+    if handler in _subscribers[event]:
+        _subscribers[event].remove(handler)
+
+
+def publish(event: str, **payload: Any) -> None:
+    """Call every handler subscribed to ``event`` with ``payload``."""
+    for handler in list(_subscribers[event]):
+        handler(**payload)
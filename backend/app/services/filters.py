@@ -0,0 +1,96 @@
+"""
+Filters shared by the list and export endpoints.
+
+Each helper takes an ORM ``Query`` or a ``Select`` over the entity and
+returns it with the requested filters applied, so a list page and a bulk
+export with the same parameters always select the same rows.
+"""
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.models.bike import Bike
+from app.models.customer import Customer, normalize_email, normalize_phone
+from app.models.part import Part
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.schemas.customer import PhoneMatch
+
+
+def filter_tickets(
+    query,
+    status: Optional[TicketStatus] = None,
+    priority: Optional[TicketPriority] = None,
+    customer_id: Optional[int] = None,
+    bike_id: Optional[int] = None,
+    technician_id: Optional[int] = None,
+    archived: Optional[bool] = False,
+):
+    if status:
+        query = query.filter(Ticket.status == status)
+    if priority:
+        query = query.filter(Ticket.priority == priority)
+    if customer_id:
+        query = query.filter(
+            Ticket.bike_id.in_(select(Bike.id).where(Bike.owner_id == customer_id))
+        )
+    if bike_id:
+        query = query.filter(Ticket.bike_id == bike_id)
+    if technician_id:
+        query = query.filter(Ticket.technician_id == technician_id)
+    if archived is not None:
+        query = query.filter(Ticket.is_archived == archived)
+    return query
+
+
+def filter_parts(
+    query,
+    name: Optional[str] = None,
+    category: Optional[str] = None,
+    sku: Optional[str] = None,
+    low_stock: Optional[bool] = False,
+):
+    if name:
+        query = query.filter(Part.name.ilike(f"%{name}%"))
+    if category:
+        query = query.filter(Part.category.ilike(f"%{category}%"))
+    if sku:
+        query = query.filter(Part.sku.ilike(f"%{sku}%"))
+    if low_stock:
+        query = query.filter(Part.is_low_stock == True)  # noqa: E712
+    return query
+
+
+def filter_phone(query, phone: str, match: PhoneMatch = PhoneMatch.SUFFIX):
+    """
+    Match customers on the digits of ``phone``, however either number is
+    punctuated. Exact and suffix matches are index range scans.
+    """
+    digits = normalize_phone(phone)
+    if digits is None:
+        return query.filter(Customer.phone.ilike(f"%{phone}%"))
+    if match == PhoneMatch.EXACT:
+        return query.filter(Customer.phone_digits == digits)
+    if match == PhoneMatch.SUFFIX:
+        # Every reversed number starting with the reversed digits; ":" sorts right after "9"
+        reversed_digits = digits[::-1]
+        return query.filter(
+            Customer.phone_digits_reversed >= reversed_digits,
+            Customer.phone_digits_reversed < reversed_digits + ":",
+        )
+    return query.filter(Customer.phone_digits.contains(digits, autoescape=True))
+
+
+def filter_customers(
+    query,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    phone_match: PhoneMatch = PhoneMatch.SUFFIX,
+):
+    if name:
+        query = query.filter(Customer.name.ilike(f"%{name}%"))
+    if email:
+        query = query.filter(Customer.email_normalized.contains(normalize_email(email), autoescape=True))
+    if phone:
+        query = filter_phone(query, phone, phone_match)
+    return query
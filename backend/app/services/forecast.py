@@ -0,0 +1,175 @@
+"""
+Demand forecasting for reorder points.
+
+Daily demand for every part is laid out as one ``parts x days`` matrix from
+the part usage rollups, and smoothed for all parts at once: an exponentially
+weighted mean and standard deviation are a single matrix-vector product each.
+Reorder levels then follow the usual safety stock model:
+
+    safety stock  = z * sigma * sqrt(lead time)
+    reorder point = mean * lead time + safety stock
+
+where ``z`` is the standard normal quantile of the service level. Safety
+stock is proposed as ``min_stock``. Parts without demand in the window keep
+their hand-set levels.
+"""
+from datetime import datetime, timedelta
+from statistics import NormalDist
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.models.part import Part
+from app.models.part_usage import PartUsageDaily
+from app.schemas.part import ReorderForecast, ReorderProposal
+from app.services.low_stock import low_stock_watcher
+from app.services.part_usage import refresh_part_usage
+from app.services.stock import low_stock_after
+
+DEFAULT_HISTORY_DAYS = 90
+DEFAULT_LEAD_TIME_DAYS = 7
+DEFAULT_SERVICE_LEVEL = 0.95
+DEFAULT_SMOOTHING = 0.1
+
+
+def smooth_demand(demand: np.ndarray, alpha: float):
+    """
+    Exponentially weighted mean and standard deviation of each row of a
+    ``parts x days`` demand matrix, weighting the latest day most.
+    """
+    days = demand.shape[1]
+    weights = (1.0 - alpha) ** np.arange(days - 1, -1, -1)
+    weights /= weights.sum()
+    mean = demand @ weights
+    variance = ((demand - mean[:, None]) ** 2) @ weights
+    return mean, np.sqrt(variance)
+
+
+def reorder_levels(mean: np.ndarray, std: np.ndarray, lead_time: np.ndarray, service_level: float):
+    """Safety stock and reorder point per part, rounded up to whole units."""
+    z = NormalDist().inv_cdf(service_level)
+    safety = z * std * np.sqrt(lead_time)
+    # Round off float noise before taking the ceiling
+    safety_stock = np.ceil(np.round(safety, 6)).astype(np.int64)
+    reorder_point = np.ceil(np.round(mean * lead_time + safety, 6)).astype(np.int64)
+    return safety_stock, reorder_point
+
+
+def forecast_reorder_points(
+    db: Session,
+    history_days: int = DEFAULT_HISTORY_DAYS,
+    lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+    service_level: float = DEFAULT_SERVICE_LEVEL,
+    alpha: float = DEFAULT_SMOOTHING,
+    apply: bool = False,
+    limit: int = 100,
+    changed_ids: Optional[List[int]] = None,
+) -> ReorderForecast:
+    """
+    Propose reorder levels from the last ``history_days`` complete days of demand.
+
+    ``lead_time_days`` is used for parts without their own lead time. With
+    ``apply``, the usage rollups are first brought up to date, then every
+    changed part's ``min_stock``, ``reorder_point`` and low-stock flag are
+    updated with one executemany UPDATE and committed; their IDs are added
+    to ``changed_ids`` when given, for the caller to publish
+    ``PARTS_BULK_CHANGED``. Without it nothing is written and demand is read
+    from the rollups as of their last refresh. At most ``limit`` proposals
+    are returned either way.
+    """
+    if apply:
+        # Pick up line items added since the last rollup refresh
+        refresh_part_usage(db)
+
+    parts = db.query(
+        Part.id, Part.min_stock, Part.reorder_point, Part.lead_time_days
+    ).order_by(Part.id).all()
+    if not parts:
+        return ReorderForecast(parts_forecast=0, parts_changed=0, applied=apply)
+    part_ids = np.array([row[0] for row in parts], dtype=np.int64)
+    current_min = np.array([row[1] or 0 for row in parts], dtype=np.int64)
+    current_reorder = np.array([row[2] or 0 for row in parts], dtype=np.int64)
+    lead_time = np.array(
+        [lead_time_days if row[3] is None else row[3] for row in parts], dtype=np.float64
+    )
+
+    # The window ends yesterday, so today's partial demand doesn't drag the mean down
+    end = datetime.utcnow().date()
+    start = end - timedelta(days=history_days)
+    usage = db.query(
+        PartUsageDaily.part_id, PartUsageDaily.day, PartUsageDaily.quantity
+    ).filter(PartUsageDaily.day >= start, PartUsageDaily.day < end).all()
+
+    demand = np.zeros((len(part_ids), history_days))
+    if usage:
+        usage_parts, usage_days, usage_quantities = zip(*usage)
+        rows = np.searchsorted(part_ids, np.array(usage_parts, dtype=np.int64))
+        columns = (
+            np.array(usage_days, dtype="datetime64[D]") - np.datetime64(start, "D")
+        ).astype(np.int64)
+        np.add.at(demand, (rows, columns), np.array(usage_quantities, dtype=np.float64))
+
+    mean, std = smooth_demand(demand, alpha)
+    proposed_min, proposed_reorder = reorder_levels(mean, std, lead_time, service_level)
+
+    has_demand = demand.any(axis=1)
+    changed = has_demand & ((proposed_min != current_min) | (proposed_reorder != current_reorder))
+    changed_rows = np.flatnonzero(changed)
+
+    if apply and len(changed_rows):
+        low_stock_watcher.ensure_loaded(db)
+        table = Part.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("part_id"))
+            .values(
+                min_stock=bindparam("min_stock"),
+                reorder_point=bindparam("reorder_point"),
+                is_low_stock=low_stock_after(table.c.quantity, bindparam("reorder_point")),
+                version=table.c.version + 1,
+            ),
+            [
+                {"part_id": int(part_id), "min_stock": int(minimum), "reorder_point": int(reorder)}
+                for part_id, minimum, reorder in zip(
+                    part_ids[changed_rows], proposed_min[changed_rows], proposed_reorder[changed_rows]
+                )
+            ],
+        )
+        db.commit()
+        if changed_ids is not None:
+            changed_ids.extend(part_ids[changed_rows].tolist())
+
+    # Report the biggest moves first
+    shown = changed_rows[
+        np.argsort(-np.abs(proposed_reorder[changed_rows] - current_reorder[changed_rows]), kind="stable")
+    ][:limit]
+    labels = {}
+    if len(shown):
+        labels = {
+            part_id: (name, sku)
+            for part_id, name, sku in db.query(Part.id, Part.name, Part.sku)
+            .filter(Part.id.in_(part_ids[shown].tolist()))
+        }
+    proposals: List[ReorderProposal] = [
+        ReorderProposal(
+            part_id=int(part_ids[row]),
+            name=labels[int(part_ids[row])][0],
+            sku=labels[int(part_ids[row])][1],
+            daily_demand=round(float(mean[row]), 4),
+            demand_std=round(float(std[row]), 4),
+            lead_time_days=int(lead_time[row]),
+            current_min_stock=int(current_min[row]),
+            current_reorder_point=int(current_reorder[row]),
+            proposed_min_stock=int(proposed_min[row]),
+            proposed_reorder_point=int(proposed_reorder[row]),
+        )
+        for row in shown
+    ]
+    return ReorderForecast(
+        parts_forecast=int(has_demand.sum()),
+        parts_changed=len(changed_rows),
+        applied=apply,
+        proposals=proposals,
+    )
@@ -0,0 +1,113 @@
+"""
+Low-stock transitions.
+
+``Part.is_low_stock`` is maintained by every stock mutation, so listing low
+stock is an indexed lookup. This watcher remembers which parts are currently
+low and, as parts change, publishes ``LOW_STOCK_CHANGED`` when one crosses
+its reorder point in either direction.
+
+Stock mutation paths call ``ensure_loaded`` before they write, so the first
+change seen by a process is compared against the state it replaced. Bulk
+writes (imports, applied forecasts) are followed by ``PARTS_BULK_CHANGED``
+with the IDs of the parts written, whose flags are re-read in batches.
+"""
+import threading
+from typing import Iterable, List, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.part import Part
+from app.services import events
+
+# Part IDs per query when re-reading flags after a bulk change
+REREAD_BATCH_SIZE = 500
+
+
+class LowStockWatcher:
+    """Process-local set of the parts currently at or below their reorder point."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._low: Set[int] = set()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._low.clear()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        rows = db.query(Part.id).filter(Part.is_low_stock == True).all()  # noqa: E712
+        with self._lock:
+            self._low = {part_id for part_id, in rows}
+            self._loaded = True
+
+    def is_low(self, part_id: int) -> bool:
+        with self._lock:
+            return part_id in self._low
+
+    def update(self, part: Part) -> None:
+        """Record a committed part's flag and publish it if it flipped."""
+        with self._lock:
+            was_low = part.id in self._low
+            if part.is_low_stock:
+                self._low.add(part.id)
+            else:
+                self._low.discard(part.id)
+        if was_low != part.is_low_stock:
+            events.publish(events.LOW_STOCK_CHANGED, part=part, is_low_stock=part.is_low_stock)
+
+    def update_many(self, db: Session, part_ids: Iterable[int]) -> None:
+        """Re-read the flags of parts changed in bulk and publish the ones that flipped."""
+        part_ids = list(part_ids)
+        flipped: List[int] = []
+        for start in range(0, len(part_ids), REREAD_BATCH_SIZE):
+            batch = part_ids[start:start + REREAD_BATCH_SIZE]
+            rows = db.query(Part.id, Part.is_low_stock).filter(Part.id.in_(batch)).all()
+            with self._lock:
+                for part_id, is_low in rows:
+                    if (part_id in self._low) != bool(is_low):
+                        flipped.append(part_id)
+                    if is_low:
+                        self._low.add(part_id)
+                    else:
+                        self._low.discard(part_id)
+        for start in range(0, len(flipped), REREAD_BATCH_SIZE):
+            batch = flipped[start:start + REREAD_BATCH_SIZE]
+            for part in db.query(Part).filter(Part.id.in_(batch)).order_by(Part.id):
+                events.publish(events.LOW_STOCK_CHANGED, part=part, is_low_stock=part.is_low_stock)
+
+    def remove(self, part_id: int) -> None:
+        with self._lock:
+            self._low.discard(part_id)
+
+
+low_stock_watcher = LowStockWatcher()
+
+
+def _on_part_changed(part: Part, **_) -> None:
+    if low_stock_watcher.loaded:
+        low_stock_watcher.update(part)
+
+
+def _on_part_deleted(part_id: int, **_) -> None:
+    if low_stock_watcher.loaded:
+        low_stock_watcher.remove(part_id)
+
+
+def _on_parts_bulk_changed(db: Session, part_ids: List[int], **_) -> None:
+    if low_stock_watcher.loaded:
+        low_stock_watcher.update_many(db, part_ids)
+
+
+events.subscribe(events.PART_CHANGED, _on_part_changed)
+events.subscribe(events.PART_DELETED, _on_part_deleted)
+events.subscribe(events.PARTS_BULK_CHANGED, _on_parts_bulk_changed)
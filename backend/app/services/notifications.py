@@ -0,0 +1,229 @@
+"""
+Customer email notifications through a transactional outbox.
+
+Ticket status changes that matter to the customer add a row to
+``notifications`` in the same transaction as the change itself, so a
+notification is never lost or sent for a change that rolled back, and the
+request never waits on a mail server.
+
+``deliver_pending`` (run by the ``notification_worker.py`` job) claims due
+rows in batches and sends them over one SMTP connection that stays open
+between batches. A failed send is retried with exponential backoff until
+``max_attempts`` is reached, after which the row is marked failed and left
+for someone to look at.
+"""
+import os
+import smtplib
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models.bike import Bike
+from app.models.customer import Customer
+from app.models.notification import Notification, NotificationStatus
+from app.models.ticket import Ticket, TicketStatus
+from app.schemas.notification import NotificationDeliveryResult
+
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+MAIL_FROM = os.getenv("MAIL_FROM", "service@example.com")
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+# Statuses the customer hears about, with the message subject and first line
+STATUS_MESSAGES = {
+    TicketStatus.AWAITING_PARTS: (
+        "Your repair is waiting on parts",
+        "We're waiting on parts to finish the work on your bike.",
+    ),
+    TicketStatus.COMPLETE: (
+        "Your bike is ready for pickup",
+        "The work on your bike is done and it's ready to be picked up.",
+    ),
+}
+
+
+def enqueue_status_notification(db: Session, ticket: Ticket) -> Optional[Notification]:
+    """
+    Queue an email telling the bike's owner about the ticket's new status.
+
+    Adds the row to the session without committing, so it is written with
+    the status change. Nothing is queued for statuses the customer isn't
+    told about or owners without an email address.
+    """
+    message = STATUS_MESSAGES.get(ticket.status)
+    if message is None:
+        return None
+    # Don't flush the pending ticket change early; the caller commits it with its version check
+    with db.no_autoflush:
+        owner = (
+            db.query(Customer.name, Customer.email)
+            .join(Bike, Bike.owner_id == Customer.id)
+            .filter(Bike.id == ticket.bike_id)
+            .first()
+        )
+    if owner is None or not owner.email:
+        return None
+    subject, line = message
+    notification = Notification(
+        ticket_id=ticket.id,
+        ticket_status=ticket.status,
+        recipient=owner.email,
+        subject=f"{subject} ({ticket.ticket_number})",
+        body=f"Hi {owner.name},\n\n{line}\n\nTicket: {ticket.ticket_number}\n",
+    )
+    db.add(notification)
+    return notification
+
+
+class SmtpSender:
+    """
+    Sends messages over a single SMTP connection, opened on first use and
+    kept open across batches. The connection is checked with NOOP at the
+    start of each batch and reopened if the server has dropped it.
+    """
+
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        username: Optional[str] = SMTP_USERNAME,
+        password: Optional[str] = SMTP_PASSWORD,
+        starttls: bool = SMTP_STARTTLS,
+        sender: str = MAIL_FROM,
+        timeout: float = SMTP_TIMEOUT,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.sender = sender
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def open(self) -> None:
+        """Make sure there is a live connection, reconnecting if needed."""
+        if self._smtp is not None:
+            try:
+                alive = self._smtp.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                alive = False
+            if alive:
+                return
+            self.close()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.connections_opened += 1
+
+    def send(self, recipient: str, subject: str, body: str) -> None:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        if self._smtp is None:
+            self.open()
+        try:
+            self._smtp.send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # The next send reconnects
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        finally:
+            self._smtp = None
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next try after ``attempts`` failures: 1, 2, 4... minutes, capped at an hour."""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def deliver_pending(
+    db: Session,
+    sender: SmtpSender,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    now: Optional[datetime] = None,
+) -> NotificationDeliveryResult:
+    """
+    Send one batch of due notifications and commit the outcome.
+
+    Rows are claimed with ``SKIP LOCKED`` where the database supports it, so
+    several workers can drain the outbox without sending anything twice.
+    """
+    now = now or datetime.utcnow()
+    batch = (
+        db.query(Notification)
+        .filter(
+            Notification.status == NotificationStatus.PENDING,
+            Notification.next_attempt_at <= now,
+        )
+        .order_by(Notification.next_attempt_at, Notification.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    result = NotificationDeliveryResult()
+    if not batch:
+        db.commit()
+        return result
+
+    try:
+        sender.open()
+        connect_error = None
+    except (smtplib.SMTPException, OSError) as exc:
+        connect_error = exc
+
+    for notification in batch:
+        error = connect_error
+        if error is None:
+            try:
+                sender.send(notification.recipient, notification.subject, notification.body)
+            except (smtplib.SMTPException, OSError) as exc:
+                error = exc
+        notification.attempts += 1
+        if error is None:
+            notification.status = NotificationStatus.SENT
+            notification.sent_at = datetime.utcnow()
+            notification.last_error = None
+            result.sent += 1
+        else:
+            notification.last_error = f"{type(error).__name__}: {error}"
+            if notification.attempts >= max_attempts:
+                notification.status = NotificationStatus.FAILED
+                result.failed += 1
+            else:
+                notification.next_attempt_at = now + retry_delay(notification.attempts)
+                result.retried += 1
+    db.commit()
+    return result
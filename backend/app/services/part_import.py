@@ -0,0 +1,204 @@
+"""
+Bulk parts catalog import.
+
+Rows are read from a CSV stream, validated with ``PartCreate`` and written
+in chunks with a batched ``INSERT ... ON CONFLICT (sku) DO UPDATE`` (or a
+select-then-write fallback on databases without one), so memory is bounded
+by the chunk size rather than the file size.
+
+Existing parts get their description, category, pricing and reorder levels
+from the file; their stock is left alone, since stock only changes through
+the ledgered stock paths. New parts take their opening stock from the file
+and it's recorded in the ledger.
+"""
+import csv
+from datetime import datetime
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.part import Part
+from app.models.stock_movement import MovementKind, StockMovement
+from app.schemas.part import PartCreate, PartImportError, PartImportResult
+from app.services.low_stock import low_stock_watcher
+
+DEFAULT_CHUNK_SIZE = 1000
+# Row errors beyond this are counted but not listed
+MAX_REPORTED_ERRORS = 100
+
+# Columns overwritten when a row's SKU already exists
+UPDATED_COLUMNS = (
+    "name", "description", "category", "min_stock", "reorder_point",
+    "lead_time_days", "cost_price", "retail_price",
+)
+
+
+def _upsert_statement(db: Session):
+    """
+    The batched ``INSERT ... ON CONFLICT (sku) DO UPDATE ... RETURNING``
+    for dialects that have one, or None.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        statement = sqlite.insert(Part.__table__)
+    elif dialect == "postgresql":
+        statement = postgresql.insert(Part.__table__)
+    else:
+        return None
+
+    table = Part.__table__
+    excluded = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.sku],
+        set_={
+            **{column: excluded[column] for column in UPDATED_COLUMNS},
+            "is_low_stock": func.coalesce(table.c.quantity, 0) <= func.coalesce(excluded.reorder_point, 0),
+            "version": table.c.version + 1,
+            "updated_at": func.now(),
+        },
+    ).returning(table.c.id, table.c.sku, table.c.quantity)
+
+
+def _write_rows(db: Session, rows: List[dict], existing: Dict[str, int]) -> List[Tuple[int, str, int]]:
+    """
+    Portable fallback for ``_upsert_statement``: one batched UPDATE for the
+    SKUs that already exist and an INSERT per new part.
+    """
+    table = Part.__table__
+    updates = [
+        {"b_sku": row["sku"], **{f"b_{column}": row[column] for column in UPDATED_COLUMNS}}
+        for row in rows if row["sku"] in existing
+    ]
+    if updates:
+        db.execute(
+            update(table)
+            .where(table.c.sku == bindparam("b_sku"))
+            .values(
+                **{column: bindparam(f"b_{column}") for column in UPDATED_COLUMNS},
+                is_low_stock=func.coalesce(table.c.quantity, 0) <= func.coalesce(bindparam("b_reorder_point"), 0),
+                version=table.c.version + 1,
+                updated_at=func.now(),
+            ),
+            updates,
+        )
+
+    written = []
+    for row in rows:
+        if row["sku"] in existing:
+            written.append((existing[row["sku"]], row["sku"], row["quantity"]))
+        else:
+            part_id = db.execute(insert(table).values(**row)).inserted_primary_key[0]
+            written.append((part_id, row["sku"], row["quantity"]))
+    return written
+
+
+def _format_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _flush_chunk(
+    db: Session, chunk: Dict[str, PartCreate], result: PartImportResult, written_ids: Optional[List[int]]
+) -> None:
+    existing = dict(db.query(Part.sku, Part.id).filter(Part.sku.in_(list(chunk))).all())
+    now = datetime.utcnow()
+    rows = []
+    for part_in in chunk.values():
+        row = part_in.model_dump()
+        row["is_low_stock"] = (row["quantity"] or 0) <= (row["reorder_point"] or 0)
+        row["version"] = 1
+        rows.append(row)
+
+    statement = _upsert_statement(db)
+    if statement is not None:
+        written = db.execute(statement, rows).all()
+    else:
+        written = _write_rows(db, rows, existing)
+
+    opening_stock = []
+    for part_id, sku, quantity in written:
+        if written_ids is not None:
+            written_ids.append(part_id)
+        if sku not in existing and quantity:
+            opening_stock.append({
+                "part_id": part_id,
+                "kind": MovementKind.ADJUST,
+                "quantity_change": quantity,
+                "ticket_id": None,
+                "user_id": None,
+                "occurred_at": now,
+            })
+    if opening_stock:
+        db.execute(insert(StockMovement.__table__), opening_stock)
+    db.commit()
+
+    result.created += len(chunk) - len(existing)
+    result.updated += len(existing)
+
+
+def import_parts(
+    db: Session,
+    stream: TextIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    written_ids: Optional[List[int]] = None,
+) -> PartImportResult:
+    """
+    Import parts from CSV text with a header row.
+
+    Column names match the ``PartCreate`` fields (case-insensitive); unknown
+    columns are ignored and empty cells fall back to the field default. Every
+    row needs a SKU. A SKU repeated within a chunk is imported from its last
+    row, and the rows it replaces count as updated, so created, updated and
+    failed always add up to the rows read. Each chunk is committed on its
+    own, and the IDs of the parts it wrote are added to ``written_ids`` when
+    given, so the caller can publish ``PARTS_BULK_CHANGED`` for them even if
+    a later chunk fails.
+    """
+    result = PartImportResult()
+    low_stock_watcher.ensure_loaded(db)
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        return result
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+
+    chunk: Dict[str, PartCreate] = {}
+    for row in reader:
+        row_number = reader.line_num
+        result.rows_read += 1
+        values = {
+            key: value.strip()
+            for key, value in row.items()
+            if key and isinstance(value, str) and value.strip()
+        }
+        error: Optional[str] = None
+        try:
+            part_in = PartCreate(**values)
+            if not part_in.sku:
+                error = "sku: Field required for import"
+        except ValidationError as exc:
+            error = _format_error(exc)
+
+        if error is not None:
+            result.failed += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(
+                    PartImportError(row=row_number, sku=values.get("sku"), error=error)
+                )
+            continue
+
+        if part_in.sku in chunk:
+            # The earlier row is superseded before it is written
+            result.updated += 1
+        chunk[part_in.sku] = part_in
+        if len(chunk) >= chunk_size:
+            _flush_chunk(db, chunk, result, written_ids)
+            chunk = {}
+
+    if chunk:
+        _flush_chunk(db, chunk, result, written_ids)
+    return result
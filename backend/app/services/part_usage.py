@@ -0,0 +1,200 @@
+"""
+Daily part usage rollups.
+
+``part_usage_daily`` holds, per part and day, the units used on tickets and
+what they sold and cost for. Analytics read only the rollups, so they never
+scan ``ticket_parts``.
+
+Adding, editing or removing a ticket part queues its day in
+``part_usage_pending``. ``refresh_part_usage`` (run by the
+``part_usage_rollup.py`` job, typically out of hours) recomputes just the
+queued days from that day's line items, using the index on
+``ticket_parts.created_at``. Analytics are therefore as fresh as the last
+refresh.
+
+A line item belongs to the day it was added. Cost is taken at the part's
+cost price when the day is rolled up.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Set
+
+from sqlalchemy import Date, delete, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.part import Part
+from app.models.part_usage import PartUsageDaily, PartUsagePending
+from app.models.ticket_part import TicketPart
+from app.schemas.analytics import CategoryMargin, DeadStockPart, PartMover, UsageRollupResult
+
+ROLLUP_COLUMNS = ["part_id", "day", "quantity", "revenue", "cost"]
+
+
+def _usage_select(day_expression):
+    quantity = func.coalesce(TicketPart.quantity, 0)
+    return (
+        select(
+            TicketPart.part_id,
+            day_expression,
+            func.sum(quantity),
+            func.sum(quantity * func.coalesce(TicketPart.price_charged, 0)),
+            func.sum(quantity * func.coalesce(Part.cost_price, 0)),
+        )
+        .join(Part, Part.id == TicketPart.part_id)
+    )
+
+
+def _refresh_day(db: Session, day: date) -> int:
+    start = datetime.combine(day, time.min)
+    db.execute(delete(PartUsageDaily.__table__).where(PartUsageDaily.day == day))
+    result = db.execute(
+        insert(PartUsageDaily.__table__).from_select(
+            ROLLUP_COLUMNS,
+            _usage_select(literal(day, Date))
+            .where(TicketPart.created_at >= start)
+            .where(TicketPart.created_at < start + timedelta(days=1))
+            .group_by(TicketPart.part_id),
+        )
+    )
+    return result.rowcount
+
+
+def _rebuild(db: Session) -> UsageRollupResult:
+    db.execute(delete(PartUsageDaily.__table__))
+    day = func.date(TicketPart.created_at)
+    result = db.execute(
+        insert(PartUsageDaily.__table__).from_select(
+            ROLLUP_COLUMNS, _usage_select(day).group_by(TicketPart.part_id, day)
+        )
+    )
+    days = db.query(func.count(func.distinct(PartUsageDaily.day))).scalar()
+    return UsageRollupResult(days_refreshed=days or 0, rows_written=result.rowcount)
+
+
+def refresh_part_usage(db: Session, full: bool = False) -> UsageRollupResult:
+    """
+    Bring the rollups up to date and commit.
+
+    Recomputes the days queued since the last refresh, or, with ``full``,
+    every day from scratch. Days queued while this runs are left for the
+    next refresh.
+    """
+    last_pending = db.query(func.max(PartUsagePending.id)).scalar()
+
+    if full:
+        result = _rebuild(db)
+    else:
+        days: Set[date] = set()
+        if last_pending is not None:
+            days = {
+                day for day, in db.query(PartUsagePending.day)
+                .filter(PartUsagePending.id <= last_pending)
+                .distinct()
+            }
+        rows = sum(_refresh_day(db, day) for day in sorted(days))
+        result = UsageRollupResult(days_refreshed=len(days), rows_written=rows)
+
+    if last_pending is not None:
+        db.execute(delete(PartUsagePending.__table__).where(PartUsagePending.id <= last_pending))
+    db.commit()
+    return result
+
+
+def _period_start(days: int) -> date:
+    """First day of a period of ``days`` days ending today."""
+    return datetime.utcnow().date() - timedelta(days=days - 1)
+
+
+def top_movers(
+    db: Session, days: int, limit: int, category: Optional[str] = None
+) -> List[PartMover]:
+    """The parts with the most units used on tickets over the last ``days`` days."""
+    quantity = func.sum(PartUsageDaily.quantity).label("quantity")
+    revenue = func.sum(PartUsageDaily.revenue).label("revenue")
+    cost = func.sum(PartUsageDaily.cost).label("cost")
+    query = (
+        db.query(Part.id, Part.name, Part.sku, Part.category, quantity, revenue, cost)
+        .join(PartUsageDaily, PartUsageDaily.part_id == Part.id)
+        .filter(PartUsageDaily.day >= _period_start(days))
+    )
+    if category:
+        query = query.filter(Part.category.ilike(category))
+    rows = (
+        query.group_by(Part.id, Part.name, Part.sku, Part.category)
+        .order_by(quantity.desc(), revenue.desc(), Part.id)
+        .limit(limit)
+        .all()
+    )
+    return [
+        PartMover(
+            part_id=part_id, name=name, sku=sku, category=category,
+            quantity=quantity or 0, revenue=revenue or 0.0, cost=cost or 0.0,
+            margin=(revenue or 0.0) - (cost or 0.0),
+        )
+        for part_id, name, sku, category, quantity, revenue, cost in rows
+    ]
+
+
+def dead_stock(db: Session, days: int, limit: int) -> List[DeadStockPart]:
+    """Parts in stock with no ticket usage in the last ``days`` days, most capital tied up first."""
+    last_used = (
+        db.query(
+            PartUsageDaily.part_id.label("part_id"),
+            func.max(PartUsageDaily.day).label("last_used_on"),
+        )
+        .group_by(PartUsageDaily.part_id)
+        .subquery()
+    )
+    stock_value = (Part.quantity * Part.cost_price).label("stock_value")
+    rows = (
+        db.query(
+            Part.id, Part.name, Part.sku, Part.category, Part.quantity,
+            stock_value, last_used.c.last_used_on,
+        )
+        .outerjoin(last_used, last_used.c.part_id == Part.id)
+        .filter(Part.quantity > 0)
+        .filter(or_(
+            last_used.c.last_used_on.is_(None),
+            last_used.c.last_used_on < _period_start(days),
+        ))
+        .order_by(stock_value.desc(), Part.id)
+        .limit(limit)
+        .all()
+    )
+    return [
+        DeadStockPart(
+            part_id=part_id, name=name, sku=sku, category=category, quantity=quantity,
+            stock_value=stock_value or 0.0, last_used_on=last_used_on,
+        )
+        for part_id, name, sku, category, quantity, stock_value, last_used_on in rows
+    ]
+
+
+def margin_by_category(db: Session, days: int) -> List[CategoryMargin]:
+    """Parts revenue, cost and margin per category over the last ``days`` days."""
+    revenue = func.sum(PartUsageDaily.revenue).label("revenue")
+    rows = (
+        db.query(
+            Part.category,
+            func.sum(PartUsageDaily.quantity),
+            revenue,
+            func.sum(PartUsageDaily.cost),
+        )
+        .join(PartUsageDaily, PartUsageDaily.part_id == Part.id)
+        .filter(PartUsageDaily.day >= _period_start(days))
+        .group_by(Part.category)
+        .order_by(revenue.desc())
+        .all()
+    )
+    results = []
+    for category, quantity, revenue, cost in rows:
+        revenue, cost = revenue or 0.0, cost or 0.0
+        margin = revenue - cost
+        results.append(CategoryMargin(
+            category=category,
+            quantity=quantity or 0,
+            revenue=revenue,
+            cost=cost,
+            margin=margin,
+            margin_percent=(margin / revenue * 100) if revenue else 0.0,
+        ))
+    return results
@@ -0,0 +1,210 @@
+"""
+In-memory parts catalog for type-ahead and barcode lookups.
+
+The catalog keeps a small snapshot of every part and three indexes over it:
+
+- a sorted array of ``(token, part_id)`` pairs over name and SKU words, so a
+  prefix is resolved with two binary searches;
+- an exact, case-insensitive SKU map for scanner input;
+- category buckets.
+
+Lookups never touch the database. The catalog is built lazily from the
+``parts`` table on first use and then kept current from part change events.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.part import Part
+from app.services import events
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _normalize(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+class CatalogEntry:
+    """Snapshot of the part fields served by lookups."""
+
+    __slots__ = ("id", "name", "sku", "category", "quantity", "retail_price", "tokens")
+
+    def __init__(self, id, name, sku, category, quantity, retail_price):
+        self.id = id
+        self.name = name
+        self.sku = sku
+        self.category = category
+        self.quantity = quantity or 0
+        self.retail_price = retail_price
+        self.tokens = self._tokenize()
+
+    def _tokenize(self) -> Set[str]:
+        tokens = set(_TOKEN_RE.findall(_normalize(self.name)))
+        sku = _normalize(self.sku)
+        if sku:
+            tokens.update(_TOKEN_RE.findall(sku))
+        return tokens
+
+    def rank(self, query: str) -> Tuple[int, str, int]:
+        """Sort key: exact SKU, SKU prefix, name prefix, then everything else."""
+        sku = _normalize(self.sku)
+        if sku and sku == query:
+            tier = 0
+        elif sku and sku.startswith(query):
+            tier = 1
+        elif _normalize(self.name).startswith(query):
+            tier = 2
+        else:
+            tier = 3
+        return (tier, _normalize(self.name), self.id)
+
+
+class PartsCatalog:
+    """Process-local index of the parts catalog."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._entries: Dict[int, CatalogEntry] = {}
+        self._tokens: List[Tuple[str, int]] = []
+        self._skus: Dict[str, int] = {}
+        self._categories: DefaultDict[str, Set[int]] = defaultdict(set)
+
+    def reset(self) -> None:
+        """Forget everything; the next read rebuilds from the database."""
+        with self._lock:
+            self._loaded = False
+            self._entries.clear()
+            self._tokens = []
+            self._skus.clear()
+            self._categories.clear()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        """Build the catalog with one query over the parts table."""
+        rows = db.query(
+            Part.id, Part.name, Part.sku, Part.category, Part.quantity, Part.retail_price
+        ).all()
+
+        with self._lock:
+            self.reset()
+            tokens = []
+            for row in rows:
+                entry = CatalogEntry(*row)
+                self._entries[entry.id] = entry
+                self._index_keys(entry)
+                tokens.extend((token, entry.id) for token in entry.tokens)
+            tokens.sort()
+            self._tokens = tokens
+            self._loaded = True
+
+    def upsert(self, part: Part) -> None:
+        """Insert or refresh a part after it changed."""
+        entry = CatalogEntry(
+            part.id, part.name, part.sku, part.category, part.quantity, part.retail_price
+        )
+        with self._lock:
+            self.remove(part.id)
+            self._entries[entry.id] = entry
+            self._index_keys(entry)
+            for token in entry.tokens:
+                insort(self._tokens, (token, entry.id))
+
+    def remove(self, part_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(part_id, None)
+            if entry is None:
+                return
+            sku = _normalize(entry.sku)
+            if sku and self._skus.get(sku) == part_id:
+                del self._skus[sku]
+            category = _normalize(entry.category)
+            self._categories[category].discard(part_id)
+            if not self._categories[category]:
+                del self._categories[category]
+            for token in entry.tokens:
+                index = bisect_left(self._tokens, (token, part_id))
+                if index < len(self._tokens) and self._tokens[index] == (token, part_id):
+                    del self._tokens[index]
+
+    def get_by_sku(self, sku: str) -> Optional[CatalogEntry]:
+        with self._lock:
+            part_id = self._skus.get(_normalize(sku))
+            return self._entries.get(part_id) if part_id is not None else None
+
+    def lookup(
+        self,
+        query: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[CatalogEntry]:
+        """
+        Find parts whose name or SKU words start with every word of ``query``,
+        optionally restricted to a category, most relevant first.
+        """
+        query = _normalize(query)
+        words = _TOKEN_RE.findall(query)
+
+        with self._lock:
+            candidates: Optional[Set[int]] = None
+            if category:
+                candidates = set(self._categories.get(_normalize(category), ()))
+
+            if words:
+                # Scan the narrowest prefix range first
+                for word in sorted(words, key=len, reverse=True):
+                    matches = self._prefix_matches(word)
+                    candidates = matches if candidates is None else candidates & matches
+                    if not candidates:
+                        break
+            elif candidates is None:
+                return []
+
+            entries = [self._entries[part_id] for part_id in candidates or ()]
+        return heapq.nsmallest(limit, entries, key=lambda entry: entry.rank(query))
+
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        start = bisect_left(self._tokens, (prefix,))
+        end = bisect_left(self._tokens, (prefix + "\uffff",))
+        return {part_id for _, part_id in self._tokens[start:end]}
+
+    def _index_keys(self, entry: CatalogEntry) -> None:
+        sku = _normalize(entry.sku)
+        if sku:
+            self._skus[sku] = entry.id
+        self._categories[_normalize(entry.category)].add(entry.id)
+
+
+parts_catalog = PartsCatalog()
+
+
+def _on_part_changed(part: Part, **_) -> None:
+    if parts_catalog.loaded:
+        parts_catalog.upsert(part)
+
+
+def _on_part_deleted(part_id: int, **_) -> None:
+    if parts_catalog.loaded:
+        parts_catalog.remove(part_id)
+
+
+def _on_parts_bulk_changed(**_) -> None:
+    parts_catalog.reset()
+
+
+events.subscribe(events.PART_CHANGED, _on_part_changed)
+events.subscribe(events.PART_DELETED, _on_part_deleted)
+events.subscribe(events.PARTS_BULK_CHANGED, _on_parts_bulk_changed)
@@ -0,0 +1,92 @@
+"""
+Reconciliation of denormalized ticket totals.
+
+``Ticket.total_parts_cost`` is maintained incrementally by the ticket parts
+endpoints so reads never have to aggregate ``ticket_parts``. This module
+recomputes every total with a single grouped query and repairs any drift.
+"""
+from sqlalchemy import bindparam, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.models.ticket import Ticket
+from app.models.ticket_part import TicketPart
+from app.schemas.ticket import PartsTotalMismatch, PartsTotalReconciliation
+
+# Differences below half a cent are floating point noise, not drift
+TOLERANCE = 0.005
+
+
+def find_parts_total_mismatches(db: Session) -> list:
+    """
+    Compare every ticket's stored parts total against its line items.
+
+    Uses one GROUP BY over ``ticket_parts`` joined back to ``tickets``;
+    only tickets whose totals disagree are returned.
+    """
+    line_totals = (
+        db.query(
+            TicketPart.ticket_id.label("ticket_id"),
+            func.sum(TicketPart.quantity * TicketPart.price_charged).label("computed"),
+        )
+        .group_by(TicketPart.ticket_id)
+        .subquery()
+    )
+    computed = func.coalesce(line_totals.c.computed, 0.0)
+    stored = func.coalesce(Ticket.total_parts_cost, 0.0)
+
+    rows = (
+        db.query(Ticket.id, Ticket.ticket_number, Ticket.total_parts_cost, computed)
+        .outerjoin(line_totals, line_totals.c.ticket_id == Ticket.id)
+        .filter(or_(
+            Ticket.total_parts_cost.is_(None),
+            func.abs(stored - computed) > TOLERANCE,
+        ))
+        .order_by(Ticket.id)
+        .all()
+    )
+
+    return [
+        PartsTotalMismatch(
+            ticket_id=ticket_id,
+            ticket_number=ticket_number,
+            stored_total=stored_total,
+            computed_total=computed_total,
+        )
+        for ticket_id, ticket_number, stored_total, computed_total in rows
+    ]
+
+
+def reconcile_parts_totals(
+    db: Session, fix: bool = False, batch_size: int = 500
+) -> PartsTotalReconciliation:
+    """
+    Report (and optionally repair) drifted ticket parts totals.
+
+    Fixes are written with one executemany UPDATE per batch, committing
+    after each batch so a large repair never holds the write lock for long.
+    """
+    tickets_checked = db.query(func.count(Ticket.id)).scalar()
+    mismatches = find_parts_total_mismatches(db)
+
+    fixed = 0
+    if fix and mismatches:
+        tickets = Ticket.__table__
+        stmt = (
+            update(tickets)
+            .where(tickets.c.id == bindparam("ticket_id"))
+            .values(total_parts_cost=bindparam("computed_total"))
+        )
+        for start in range(0, len(mismatches), batch_size):
+            batch = mismatches[start:start + batch_size]
+            db.execute(stmt, [
+                {"ticket_id": m.ticket_id, "computed_total": m.computed_total}
+                for m in batch
+            ])
+            db.commit()
+            fixed += len(batch)
+
+    return PartsTotalReconciliation(
+        tickets_checked=tickets_checked,
+        mismatches=mismatches,
+        fixed=fixed,
+    )
@@ -0,0 +1,324 @@
+"""
+Bench capacity scheduling.
+
+Every active technician has ``bench_hours`` of labor per working day
+(``DEFAULT_BENCH_HOURS`` when unset). Open tickets book their estimated labor
+hours against their technician's bench on their estimated completion day.
+Open tickets without a date, or with one in the past, are due today: they are
+already in the queue. Unassigned tickets only count against the whole shop.
+
+Booked work doesn't have to be done on the day it is due, only by then. New
+work due on a day fits if, on that day and every later one, the bench time
+from today onwards still covers everything due by then plus the new work.
+The most new work that fits is the day's available hours, and the day is
+full when less than ``MIN_BOOKABLE_HOURS`` are left. The earliest completion
+date for a job is the first working day with enough available hours.
+
+Bookings are held in memory as per-technician sorted arrays of day ordinals
+and hours. They are built once from the database and kept current from
+ticket and user events, so quoting a completion date at intake runs no
+query, just a few NumPy passes over the days up to the last booking.
+"""
+import bisect
+import math
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.ticket import CLOSED_STATUSES, Ticket
+from app.models.user import User, UserRole
+from app.schemas.schedule import CompletionQuote, DayAvailability
+from app.services import events
+from app.services.assignment import ticket_hours
+
+DEFAULT_BENCH_HOURS = 8.0
+# Working weekdays, Monday being 0
+WORKDAYS = (0, 1, 2, 3, 4)
+# Less bench time than this left on a day and it counts as full
+MIN_BOOKABLE_HOURS = 0.25
+# Bookings further out than this are treated as due at the end of it
+MAX_HORIZON_DAYS = 3 * 365
+
+# Day ordinal of open tickets without an estimated completion, before any real day
+UNDATED = 0
+
+
+def bench_hours(hours: Optional[float]) -> float:
+    """Labor hours per working day a technician counts for, defaulting when unset."""
+    if hours is None:
+        return DEFAULT_BENCH_HOURS
+    return hours
+
+
+def _today() -> date:
+    return datetime.utcnow().date()
+
+
+class _SlotArray:
+    """One bench's booked hours per day, in parallel lists sorted by day ordinal."""
+
+    __slots__ = ("days", "hours", "counts")
+
+    def __init__(self) -> None:
+        self.days: List[int] = []
+        self.hours: List[float] = []
+        # Tickets per day, so a day is dropped exactly when its last ticket goes
+        self.counts: List[int] = []
+
+    def add(self, day: int, hours: float) -> None:
+        i = bisect.bisect_left(self.days, day)
+        if i < len(self.days) and self.days[i] == day:
+            self.hours[i] += hours
+            self.counts[i] += 1
+        else:
+            self.days.insert(i, day)
+            self.hours.insert(i, hours)
+            self.counts.insert(i, 1)
+
+    def remove(self, day: int, hours: float) -> None:
+        i = bisect.bisect_left(self.days, day)
+        if i == len(self.days) or self.days[i] != day:
+            return
+        self.counts[i] -= 1
+        if self.counts[i]:
+            self.hours[i] -= hours
+        else:
+            del self.days[i], self.hours[i], self.counts[i]
+
+
+def _reserve(start: int, length: int, capacity: float, days: np.ndarray, hours: np.ndarray):
+    """
+    For each of ``length`` days from ordinal ``start``: whether it is a
+    working day, its bench capacity, the hours due on it, and the most new
+    work that can be due on it without making booked work late.
+    """
+    ordinals = start + np.arange(length)
+    # date.fromordinal(1) is a Monday
+    workday = np.isin((ordinals - 1) % 7, WORKDAYS)
+    bench = np.where(workday, capacity, 0.0)
+    booked = np.zeros(length)
+    np.add.at(booked, np.clip(days - start, 0, length - 1), hours)
+    slack = np.cumsum(bench - booked)
+    # New work due on a day uses up slack on that day and every day after it
+    reserve = np.minimum.accumulate(slack[::-1])[::-1]
+    return workday, bench, booked, reserve
+
+
+class BenchSchedule:
+    """Process-local bench bookings and capacities, kept current from events."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        # Active technicians: technician_id -> bench hours per working day
+        self._capacity: Dict[int, float] = {}
+        # Bookings per technician; unassigned tickets are under None
+        self._calendars: Dict[Optional[int], _SlotArray] = {}
+        # Open tickets: ticket_id -> (technician_id, day ordinal, hours)
+        self._tickets: Dict[int, Tuple[Optional[int], int, float]] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._capacity.clear()
+            self._calendars.clear()
+            self._tickets.clear()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        """Build the bookings from active technicians and open tickets."""
+        technicians = (
+            db.query(User.id, User.bench_hours)
+            .filter(User.role == UserRole.TECHNICIAN, User.is_active == True)  # noqa: E712
+            .all()
+        )
+        tickets = (
+            db.query(Ticket.id, Ticket.technician_id, Ticket.estimated_completion, Ticket.estimated_hours)
+            .filter(Ticket.is_archived == False)  # noqa: E712
+            .filter(Ticket.status.notin_(CLOSED_STATUSES))
+            .all()
+        )
+
+        with self._lock:
+            self.reset()
+            for technician_id, hours in technicians:
+                self._capacity[technician_id] = bench_hours(hours)
+            for ticket_id, technician_id, due, hours in tickets:
+                self._book(ticket_id, technician_id, due, hours)
+            self._loaded = True
+
+    def apply_ticket(self, ticket: Ticket) -> None:
+        """Move a ticket's booking to match its current state."""
+        with self._lock:
+            self._unbook(ticket.id)
+            if not ticket.is_archived and ticket.status not in CLOSED_STATUSES:
+                self._book(ticket.id, ticket.technician_id, ticket.estimated_completion, ticket.estimated_hours)
+
+    def remove_ticket(self, ticket_id: int) -> None:
+        with self._lock:
+            self._unbook(ticket_id)
+
+    def apply_user(self, user: User) -> None:
+        """Add, refresh or drop a technician's bench."""
+        with self._lock:
+            if user.role == UserRole.TECHNICIAN and user.is_active:
+                self._capacity[user.id] = bench_hours(user.bench_hours)
+            else:
+                self._capacity.pop(user.id, None)
+
+    def remove_user(self, user_id: int) -> None:
+        with self._lock:
+            self._capacity.pop(user_id, None)
+
+    def has_technician(self, technician_id: int) -> bool:
+        return technician_id in self._capacity
+
+    def earliest_completion(
+        self, hours: float, technician_id: Optional[int] = None, start: Optional[date] = None
+    ) -> CompletionQuote:
+        """
+        The first working day by which ``hours`` of new work, started no
+        earlier than ``start`` (default today), can be done on the
+        technician's bench, or the whole shop's without one.
+        """
+        today = _today()
+        start = max(start or today, today)
+        first = today.toordinal()
+        with self._lock:
+            capacity, days, booked = self._bookings(technician_id)
+        quote = CompletionQuote(technician_id=technician_id, hours=hours, start=start)
+        if capacity <= 0:
+            return quote
+
+        last = max(int(days[-1]) if len(days) else first, start.toordinal())
+        # By then the bench has had time for everything booked plus the new work
+        weeks = math.ceil((float(booked.sum()) + hours) / (capacity * len(WORKDAYS)))
+        length = min(last - first + 1 + 7 * (weeks + 1), MAX_HORIZON_DAYS)
+        workday, bench, _, reserve = _reserve(first, length, capacity, days, booked)
+        # Booked work can use the bench before the start, the new work only after it
+        started = np.cumsum(np.where(np.arange(length) >= start.toordinal() - first, bench, 0.0))
+        fits = np.flatnonzero(workday & (reserve >= hours - 1e-9) & (started >= hours - 1e-9))
+        if len(fits):
+            quote.earliest_completion = date.fromordinal(first + int(fits[0]))
+        return quote
+
+    def availability(
+        self,
+        start: Optional[date] = None,
+        days: int = 7,
+        technician_id: Optional[int] = None,
+        today: Optional[date] = None,
+    ) -> List[DayAvailability]:
+        """
+        Capacity, bookings and hours still available on each of ``days`` days
+        from ``start`` (default today) for the technician, or the whole shop
+        without one. Days before today are reported full; their overdue work
+        counts as due today.
+        """
+        today = today or _today()
+        start = start or today
+        first = today.toordinal()
+        with self._lock:
+            capacity, booked_days, booked = self._bookings(technician_id)
+        if days < 1:
+            return []
+        dates = [start + timedelta(days=offset) for offset in range(days)]
+
+        last = max(dates[-1].toordinal(), first)
+        if len(booked_days):
+            last = max(last, min(int(booked_days[-1]), first + MAX_HORIZON_DAYS - 1))
+        workday, bench, due, reserve = _reserve(first, last - first + 1, capacity, booked_days, booked)
+
+        results = []
+        for day in dates:
+            i = day.toordinal() - first
+            if i < 0:
+                is_workday = day.weekday() in WORKDAYS
+                results.append(DayAvailability(
+                    date=day, workday=is_workday, capacity_hours=capacity if is_workday else 0.0,
+                    booked_hours=0.0, available_hours=0.0, full=True,
+                ))
+                continue
+            available = max(float(reserve[i]), 0.0) if workday[i] else 0.0
+            results.append(DayAvailability(
+                date=day,
+                workday=bool(workday[i]),
+                capacity_hours=float(bench[i]),
+                booked_hours=round(float(due[i]), 6),
+                available_hours=round(available, 6),
+                full=available < MIN_BOOKABLE_HOURS,
+            ))
+        return results
+
+    def _bookings(self, technician_id: Optional[int]) -> Tuple[float, np.ndarray, np.ndarray]:
+        """Daily capacity and sorted booked days and hours for one bench or the whole shop."""
+        if technician_id is None:
+            capacity = sum(self._capacity.values())
+            calendars = list(self._calendars.values())
+        else:
+            capacity = self._capacity.get(technician_id, 0.0)
+            calendars = [self._calendars[technician_id]] if technician_id in self._calendars else []
+        days = np.array([day for calendar in calendars for day in calendar.days], dtype=np.int64)
+        hours = np.array([hours for calendar in calendars for hours in calendar.hours], dtype=np.float64)
+        if len(calendars) > 1:
+            order = np.argsort(days, kind="stable")
+            days, hours = days[order], hours[order]
+        return capacity, days, hours
+
+    def _book(self, ticket_id: int, technician_id: Optional[int], due: Optional[datetime], hours: Optional[float]) -> None:
+        day = due.date().toordinal() if due is not None else UNDATED
+        hours = ticket_hours(hours)
+        calendar = self._calendars.get(technician_id)
+        if calendar is None:
+            calendar = self._calendars[technician_id] = _SlotArray()
+        calendar.add(day, hours)
+        self._tickets[ticket_id] = (technician_id, day, hours)
+
+    def _unbook(self, ticket_id: int) -> None:
+        previous = self._tickets.pop(ticket_id, None)
+        if previous is None:
+            return
+        technician_id, day, hours = previous
+        calendar = self._calendars[technician_id]
+        calendar.remove(day, hours)
+        if not calendar.days:
+            del self._calendars[technician_id]
+
+
+bench_schedule = BenchSchedule()
+
+
+def _on_ticket_changed(ticket: Ticket, **_) -> None:
+    if bench_schedule.loaded:
+        bench_schedule.apply_ticket(ticket)
+
+
+def _on_ticket_deleted(ticket_id: int, **_) -> None:
+    if bench_schedule.loaded:
+        bench_schedule.remove_ticket(ticket_id)
+
+
+def _on_user_changed(user: User, **_) -> None:
+    if bench_schedule.loaded:
+        bench_schedule.apply_user(user)
+
+
+def _on_user_deleted(user_id: int, **_) -> None:
+    if bench_schedule.loaded:
+        bench_schedule.remove_user(user_id)
+
+
+events.subscribe(events.TICKET_CHANGED, _on_ticket_changed)
+events.subscribe(events.TICKET_DELETED, _on_ticket_deleted)
+events.subscribe(events.USER_CHANGED, _on_user_changed)
+events.subscribe(events.USER_DELETED, _on_user_deleted)
@@ -0,0 +1,209 @@
+"""
+Full-text search across tickets, customers, bikes and parts.
+
+On SQLite this queries the FTS5 indexes from ``app.db.fts`` and ranks hits
+with bm25. Ticket update notes are searched too and reported against their
+ticket. Other databases fall back to bounded substring matching.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, case, func, or_, text
+from sqlalchemy.orm import Session
+
+from app.models.bike import Bike
+from app.models.customer import Customer
+from app.models.part import Part
+from app.models.ticket import Ticket
+from app.models.ticket_update import TicketUpdate
+from app.schemas.search import SearchHit, SearchResults
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# (hit id, bm25 rank, snippet); lower rank is a better match
+Hit = Tuple[int, float, Optional[str]]
+
+# bm25 column weights for parts_fts (name, category, sku)
+PART_COLUMN_WEIGHTS = (4.0, 1.0, 8.0)
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match as a prefix.
+
+    Words are quoted so user input can never inject FTS5 query syntax.
+    """
+    tokens = _TOKEN_RE.findall(q.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _fts_hits(db: Session, fts_table: str, match: str, limit: int, id_sql: str = "rowid", join: str = "") -> List[Hit]:
+    rows = db.execute(
+        text(
+            f"SELECT {id_sql}, bm25({fts_table}) AS rank, "
+            f"snippet({fts_table}, -1, '[', ']', '...', 12) "
+            f"FROM {fts_table} {join} "
+            f"WHERE {fts_table} MATCH :match ORDER BY rank LIMIT :limit"
+        ),
+        {"match": match, "limit": limit},
+    ).all()
+    return [(row[0], row[1], row[2]) for row in rows]
+
+
+def _best_hits(hits: List[Hit], limit: int) -> List[Hit]:
+    """Keep each id's best hit, ordered by rank."""
+    best: Dict[int, Hit] = {}
+    for hit in hits:
+        if hit[0] not in best or hit[1] < best[hit[0]][1]:
+            best[hit[0]] = hit
+    return sorted(best.values(), key=lambda hit: hit[1])[:limit]
+
+
+def _to_search_hits(hits: List[Hit], titles: Dict[int, str]) -> List[SearchHit]:
+    return [
+        SearchHit(id=hit_id, title=titles[hit_id], snippet=snippet, score=-rank)
+        for hit_id, rank, snippet in hits
+        if hit_id in titles
+    ]
+
+
+def search_all(db: Session, q: str, limit: int = 10) -> SearchResults:
+    """Search tickets, customers and bikes, returning up to ``limit`` of each."""
+    results = SearchResults(query=q)
+    match = build_match_query(q)
+    if match is None:
+        return results
+
+    if db.bind.dialect.name != "sqlite":
+        return _search_by_substring(db, q, limit)
+
+    ticket_hits = _best_hits(
+        _fts_hits(db, "tickets_fts", match, limit)
+        + _fts_hits(
+            db, "ticket_updates_fts", match, limit,
+            id_sql="ticket_updates.ticket_id",
+            join="JOIN ticket_updates ON ticket_updates.id = ticket_updates_fts.rowid",
+        ),
+        limit,
+    )
+    customer_hits = _fts_hits(db, "customers_fts", match, limit)
+    bike_hits = _fts_hits(db, "bikes_fts", match, limit)
+
+    ticket_titles = dict(
+        db.query(Ticket.id, Ticket.ticket_number)
+        .filter(Ticket.id.in_([hit[0] for hit in ticket_hits]))
+        .all()
+    )
+    customer_titles = dict(
+        db.query(Customer.id, Customer.name)
+        .filter(Customer.id.in_([hit[0] for hit in customer_hits]))
+        .all()
+    )
+    bike_titles = dict(
+        db.query(Bike.id, Bike.name)
+        .filter(Bike.id.in_([hit[0] for hit in bike_hits]))
+        .all()
+    )
+
+    results.tickets = _to_search_hits(ticket_hits, ticket_titles)
+    results.customers = _to_search_hits(customer_hits, customer_titles)
+    results.bikes = _to_search_hits(bike_hits, bike_titles)
+    return results
+
+
+def _search_by_substring(db: Session, q: str, limit: int) -> SearchResults:
+    """Unranked fallback for databases without the FTS5 indexes."""
+    pattern = f"%{q}%"
+    note_matches = db.query(TicketUpdate.ticket_id).filter(TicketUpdate.note.ilike(pattern))
+    tickets = (
+        db.query(Ticket.id, Ticket.ticket_number)
+        .filter(or_(
+            Ticket.ticket_number.ilike(pattern),
+            Ticket.problem_description.ilike(pattern),
+            Ticket.diagnosis.ilike(pattern),
+            Ticket.id.in_(note_matches),
+        ))
+        .limit(limit)
+        .all()
+    )
+    customers = (
+        db.query(Customer.id, Customer.name)
+        .filter(or_(
+            Customer.name.ilike(pattern),
+            Customer.email.ilike(pattern),
+            Customer.phone.ilike(pattern),
+        ))
+        .limit(limit)
+        .all()
+    )
+    bikes = (
+        db.query(Bike.id, Bike.name)
+        .filter(or_(Bike.name.ilike(pattern), Bike.specs.ilike(pattern)))
+        .limit(limit)
+        .all()
+    )
+    return SearchResults(
+        query=q,
+        tickets=[SearchHit(id=row[0], title=row[1]) for row in tickets],
+        customers=[SearchHit(id=row[0], title=row[1]) for row in customers],
+        bikes=[SearchHit(id=row[0], title=row[1]) for row in bikes],
+    )
+
+
+def _like_prefix(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def search_parts(db: Session, term: str, skip: int = 0, limit: int = 20) -> List[Part]:
+    """
+    Search parts by name, category and SKU, most relevant first.
+
+    An exact SKU match ranks first, then SKU prefix matches, then parts whose
+    name starts with the term, then everything else by bm25. Only one page
+    of parts is loaded.
+    """
+    term = term.strip().lower()
+    match = build_match_query(term)
+    if match is None:
+        return []
+
+    prefix = _like_prefix(term)
+    tier = case(
+        (func.lower(Part.sku) == term, 0),
+        (func.lower(Part.sku).like(prefix, escape="\\"), 1),
+        (func.lower(Part.name).like(prefix, escape="\\"), 2),
+        else_=3,
+    )
+
+    if db.bind.dialect.name != "sqlite":
+        pattern = f"%{prefix}"
+        return (
+            db.query(Part)
+            .filter(or_(
+                Part.name.ilike(pattern, escape="\\"),
+                Part.category.ilike(pattern, escape="\\"),
+                Part.sku.ilike(pattern, escape="\\"),
+            ))
+            .order_by(tier, Part.name, Part.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    weights = ", ".join(str(weight) for weight in PART_COLUMN_WEIGHTS)
+    matches = text(
+        f"SELECT rowid AS part_id, bm25(parts_fts, {weights}) AS rank "
+        "FROM parts_fts WHERE parts_fts MATCH :match"
+    ).bindparams(match=match).columns(part_id=Integer, rank=Float).subquery()
+
+    return (
+        db.query(Part)
+        .join(matches, matches.c.part_id == Part.id)
+        .order_by(tier, matches.c.rank, Part.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
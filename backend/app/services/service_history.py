@@ -0,0 +1,79 @@
+"""
+Per-bike service history.
+
+Ticket counts, open tickets, last service date and lifetime spend are
+aggregated in SQL by one grouped query over ``tickets``, and the latest
+tickets of any number of bikes come back from one query ranked with
+``row_number()``. Views over a customer's bikes or a page of bikes therefore
+cost a fixed number of queries however many bikes and tickets there are.
+
+A ticket is open until it is completed, delivered or archived. Lifetime
+spend is the labor and parts total of completed and delivered tickets; work
+still in progress hasn't been billed yet.
+"""
+from collections import defaultdict
+from typing import DefaultDict, Dict, List
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.ticket import CLOSED_STATUSES, Ticket
+
+
+def ticket_stats(bike_ids):
+    """
+    Grouped select of ``bike_id, ticket_count, open_tickets, last_service_at,
+    lifetime_spend`` for the bikes in ``bike_ids`` (a list or a select of IDs).
+    Bikes without tickets have no row.
+    """
+    closed = Ticket.status.in_(CLOSED_STATUSES)
+    inactive = or_(closed, Ticket.is_archived.is_(True))
+    total = func.coalesce(Ticket.labor_cost, 0) + func.coalesce(Ticket.total_parts_cost, 0)
+    return (
+        select(
+            Ticket.bike_id.label("bike_id"),
+            func.count(Ticket.id).label("ticket_count"),
+            func.sum(case((inactive, 0), else_=1)).label("open_tickets"),
+            func.max(Ticket.created_at).label("last_service_at"),
+            func.sum(case((closed, total), else_=0)).label("lifetime_spend"),
+        )
+        .where(Ticket.bike_id.in_(bike_ids))
+        .group_by(Ticket.bike_id)
+    )
+
+
+def open_ticket_status(bike_id):
+    """
+    Scalar subquery for the status of the newest open ticket of the bike
+    ``bike_id`` (a column to correlate with), or NULL when there is none.
+    """
+    return (
+        select(Ticket.status)
+        .where(Ticket.bike_id == bike_id)
+        .where(Ticket.status.notin_(CLOSED_STATUSES))
+        .where(Ticket.is_archived.isnot(True))
+        .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def recent_tickets(db: Session, bike_ids: List[int], per_bike: int) -> Dict[int, List[Ticket]]:
+    """The latest ``per_bike`` tickets of each bike, newest first, in one query."""
+    if not bike_ids or per_bike < 1:
+        return {}
+    rank = func.row_number().over(
+        partition_by=Ticket.bike_id,
+        order_by=(Ticket.created_at.desc(), Ticket.id.desc()),
+    ).label("rank")
+    ranked = select(Ticket.id, rank).where(Ticket.bike_id.in_(bike_ids)).subquery()
+    tickets = (
+        db.query(Ticket)
+        .join(ranked, ranked.c.id == Ticket.id)
+        .filter(ranked.c.rank <= per_bike)
+        .order_by(Ticket.bike_id, ranked.c.rank)
+    )
+    by_bike: DefaultDict[int, List[Ticket]] = defaultdict(list)
+    for ticket in tickets:
+        by_bike[ticket.bike_id].append(ticket)
+    return by_bike
@@ -0,0 +1,261 @@
+"""
+Atomic stock movements.
+
+Stock is only ever changed with a single conditional ``UPDATE`` per part, so
+concurrent reservations can't oversell a part or lose each other's changes
+and no table or row has to be locked up front. Every movement bumps the
+part's version, which makes a client holding a stale ETag re-read the stock
+level before overwriting it.
+
+Each update also recomputes the part's ``is_low_stock`` flag, so the flag
+can never disagree with the quantity it was derived from, and appends the
+change to the ``stock_movements`` ledger in the same transaction.
+
+These helpers only stage the update in the caller's transaction; the caller
+commits and then publishes ``PART_CHANGED``.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import bindparam, func, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.models.part import Part
+from app.models.stock_movement import MovementKind, StockMovement
+from app.schemas.part import StockReceiptLine, StockReceiptLineResult, StockReceiptResult
+from app.services import events
+from app.services.low_stock import low_stock_watcher
+
+
+def low_stock_after(quantity, reorder_point=Part.reorder_point):
+    """SQL expression for ``is_low_stock`` once a part holds ``quantity`` units."""
+    return func.coalesce(quantity, 0) <= func.coalesce(reorder_point, 0)
+
+
+def record_movement(
+    db: Session,
+    part_id: int,
+    quantity_change: int,
+    kind: MovementKind,
+    ticket_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> None:
+    """Append a stock change to the ledger."""
+    db.execute(insert(StockMovement.__table__).values(
+        part_id=part_id,
+        kind=kind,
+        quantity_change=quantity_change,
+        ticket_id=ticket_id,
+        user_id=user_id,
+        occurred_at=datetime.utcnow(),
+    ))
+
+
+def _part_query(db: Session, part_id: int, expected_version: Optional[int]):
+    query = db.query(Part).filter(Part.id == part_id)
+    if expected_version is not None:
+        query = query.filter(Part.version == expected_version)
+    return query
+
+
+def reserve_stock(
+    db: Session,
+    part_id: int,
+    quantity: int,
+    expected_version: Optional[int] = None,
+    *,
+    kind: MovementKind = MovementKind.CONSUME,
+    ticket_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> bool:
+    """
+    Take ``quantity`` (> 0) units of a part out of stock if that many are on hand.
+
+    Returns False, without changing anything, if the part doesn't exist, has
+    fewer than ``quantity`` units, or isn't at ``expected_version``.
+    """
+    low_stock_watcher.ensure_loaded(db)
+    updated = (
+        _part_query(db, part_id, expected_version)
+        .filter(Part.quantity >= quantity)
+        .update(
+            {
+                Part.quantity: Part.quantity - quantity,
+                Part.is_low_stock: low_stock_after(Part.quantity - quantity),
+                Part.version: Part.version + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    if updated != 1:
+        return False
+    record_movement(db, part_id, -quantity, kind, ticket_id, user_id)
+    return True
+
+
+def release_stock(
+    db: Session,
+    part_id: int,
+    quantity: int,
+    expected_version: Optional[int] = None,
+    *,
+    kind: MovementKind = MovementKind.RETURN,
+    ticket_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> bool:
+    """
+    Put ``quantity`` units of a part back into stock.
+
+    Returns False if the part doesn't exist or isn't at ``expected_version``.
+    """
+    low_stock_watcher.ensure_loaded(db)
+    updated = (
+        _part_query(db, part_id, expected_version)
+        .update(
+            {
+                Part.quantity: Part.quantity + quantity,
+                Part.is_low_stock: low_stock_after(Part.quantity + quantity),
+                Part.version: Part.version + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    if updated != 1:
+        return False
+    if quantity:
+        record_movement(db, part_id, quantity, kind, ticket_id, user_id)
+    return True
+
+
+def release_stock_many(
+    db: Session, released: Dict[int, int], user_id: Optional[int] = None
+) -> None:
+    """
+    Put stock back for many parts at once, from a mapping of part ID to units.
+
+    Every part is updated by one executemany UPDATE and gets one RETURN
+    movement in the ledger. The caller publishes ``PART_CHANGED`` for the parts.
+    """
+    released = {part_id: quantity for part_id, quantity in released.items() if quantity}
+    if not released:
+        return
+    low_stock_watcher.ensure_loaded(db)
+    parts = Part.__table__
+    db.execute(
+        update(parts)
+        .where(parts.c.id == bindparam("part_id"))
+        .values(
+            quantity=parts.c.quantity + bindparam("released"),
+            is_low_stock=low_stock_after(parts.c.quantity + bindparam("released"), parts.c.reorder_point),
+            version=parts.c.version + 1,
+        ),
+        [{"part_id": part_id, "released": quantity} for part_id, quantity in released.items()],
+    )
+    now = datetime.utcnow()
+    db.execute(insert(StockMovement.__table__), [
+        {
+            "part_id": part_id,
+            "kind": MovementKind.RETURN,
+            "quantity_change": quantity,
+            "user_id": user_id,
+            "ticket_id": None,
+            "occurred_at": now,
+        }
+        for part_id, quantity in released.items()
+    ])
+
+
+def publish_parts_changed(db: Session, part_ids: Sequence[int]) -> None:
+    """Tell the in-memory indexes about committed stock changes."""
+    if not part_ids:
+        return
+    for part in db.query(Part).filter(Part.id.in_(list(part_ids))).all():
+        events.publish(events.PART_CHANGED, part=part)
+
+
+def stock_on_hand(db: Session, part_id: int) -> int:
+    """Current stock level of a part, for error messages."""
+    quantity = db.query(Part.quantity).filter(Part.id == part_id).scalar()
+    return quantity or 0
+
+
+def receive_stock(
+    db: Session, lines: Sequence[StockReceiptLine], user_id: Optional[int] = None
+) -> StockReceiptResult:
+    """
+    Book a supplier delivery into stock in one transaction.
+
+    Lines are resolved to parts with a single query, quantities for the same
+    part are summed, and every part is updated by one executemany UPDATE.
+    Lines that don't match a part are reported and skipped; the others are
+    still received. The caller publishes ``PART_CHANGED`` for the parts.
+    """
+    part_ids = {line.part_id for line in lines if line.part_id is not None}
+    skus = {line.sku for line in lines if line.sku}
+    known = db.query(Part.id, Part.sku).filter(
+        or_(Part.id.in_(part_ids), Part.sku.in_(skus))
+    ).all()
+    known_ids = {part_id for part_id, _ in known}
+    ids_by_sku = {sku: part_id for part_id, sku in known if sku}
+
+    results: List[StockReceiptLineResult] = []
+    received: Dict[int, int] = {}
+    costs: Dict[int, Optional[float]] = {}
+    for index, line in enumerate(lines):
+        result = StockReceiptLineResult(line=index, part_id=line.part_id, sku=line.sku)
+        results.append(result)
+        if line.part_id is None and not line.sku:
+            result.error = "Line must identify a part by part_id or sku"
+            continue
+        part_id = line.part_id if line.part_id is not None else ids_by_sku.get(line.sku)
+        if part_id not in known_ids:
+            result.error = "Part not found"
+            continue
+        if line.sku and ids_by_sku.get(line.sku) != part_id:
+            result.error = "SKU does not match part"
+            continue
+        result.part_id = part_id
+        result.received = line.quantity
+        received[part_id] = received.get(part_id, 0) + line.quantity
+        if line.cost_price is not None:
+            costs[part_id] = line.cost_price  # The last price on the slip wins
+        else:
+            costs.setdefault(part_id, None)
+
+    if received:
+        low_stock_watcher.ensure_loaded(db)
+        parts = Part.__table__
+        db.execute(
+            update(parts)
+            .where(parts.c.id == bindparam("part_id"))
+            .values(
+                quantity=parts.c.quantity + bindparam("received"),
+                is_low_stock=low_stock_after(
+                    parts.c.quantity + bindparam("received"), parts.c.reorder_point
+                ),
+                cost_price=func.coalesce(bindparam("cost_price"), parts.c.cost_price),
+                version=parts.c.version + 1,
+            ),
+            [
+                {"part_id": part_id, "received": quantity, "cost_price": costs[part_id]}
+                for part_id, quantity in received.items()
+            ],
+        )
+        now = datetime.utcnow()
+        db.execute(insert(StockMovement.__table__), [
+            {
+                "part_id": part_id,
+                "kind": MovementKind.RECEIVE,
+                "quantity_change": quantity,
+                "user_id": user_id,
+                "ticket_id": None,
+                "occurred_at": now,
+            }
+            for part_id, quantity in received.items()
+        ])
+
+    return StockReceiptResult(
+        received_lines=sum(1 for result in results if result.error is None),
+        failed_lines=sum(1 for result in results if result.error is not None),
+        results=results,
+    )
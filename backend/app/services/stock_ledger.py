@@ -0,0 +1,111 @@
+"""
+Stock history from the ``stock_movements`` ledger.
+
+A part's stock at time T is its latest snapshot at or before T plus the
+movements after that snapshot up to T. Snapshots are taken periodically, so
+that tail stays short, and compaction rolls movements older than the
+retention window into a snapshot and deletes them. History inside the
+window is exact; before it, stock is known at snapshot times.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_
+from sqlalchemy.orm import Session
+
+from app.models.stock_movement import StockMovement, StockSnapshot
+from app.schemas.stock import StockCompaction
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _latest_snapshots(db: Session, at: datetime, part_id: Optional[int] = None):
+    """Subquery of each part's latest snapshot time at or before ``at``."""
+    query = (
+        db.query(
+            StockSnapshot.part_id.label("part_id"),
+            func.max(StockSnapshot.taken_at).label("taken_at"),
+        )
+        .filter(StockSnapshot.taken_at <= at)
+    )
+    if part_id is not None:
+        query = query.filter(StockSnapshot.part_id == part_id)
+    return query.group_by(StockSnapshot.part_id).subquery()
+
+
+def _stock_levels(
+    db: Session, at: datetime, part_id: Optional[int] = None
+) -> Dict[int, Tuple[int, bool]]:
+    """
+    Stock at ``at`` per part, with whether any movement followed the latest
+    snapshot. Two grouped queries regardless of the number of parts.
+    """
+    latest = _latest_snapshots(db, at, part_id)
+
+    snapshots = db.query(StockSnapshot.part_id, StockSnapshot.quantity).join(
+        latest,
+        and_(
+            latest.c.part_id == StockSnapshot.part_id,
+            latest.c.taken_at == StockSnapshot.taken_at,
+        ),
+    )
+    tails = (
+        db.query(StockMovement.part_id, func.sum(StockMovement.quantity_change))
+        .outerjoin(latest, latest.c.part_id == StockMovement.part_id)
+        .filter(StockMovement.occurred_at <= at)
+        .filter(or_(latest.c.taken_at.is_(None), StockMovement.occurred_at > latest.c.taken_at))
+    )
+    if part_id is not None:
+        tails = tails.filter(StockMovement.part_id == part_id)
+
+    levels: Dict[int, Tuple[int, bool]] = {
+        snapshot_part_id: (quantity, False) for snapshot_part_id, quantity in snapshots.all()
+    }
+    for tail_part_id, change in tails.group_by(StockMovement.part_id).all():
+        base = levels.get(tail_part_id, (0, False))[0]
+        levels[tail_part_id] = (base + (change or 0), True)
+    return levels
+
+
+def stock_at(db: Session, part_id: int, at: datetime) -> int:
+    """A part's stock on hand at ``at``."""
+    level = _stock_levels(db, _naive_utc(at), part_id).get(part_id)
+    return level[0] if level else 0
+
+
+def take_snapshots(db: Session, at: Optional[datetime] = None) -> int:
+    """
+    Snapshot every part whose stock moved since its last snapshot.
+
+    Returns the number of snapshots written.
+    """
+    at = _naive_utc(at) if at else datetime.utcnow()
+    rows = [
+        {"part_id": part_id, "quantity": quantity, "taken_at": at}
+        for part_id, (quantity, moved) in _stock_levels(db, at).items()
+        if moved
+    ]
+    if rows:
+        db.execute(insert(StockSnapshot.__table__), rows)
+    db.commit()
+    return len(rows)
+
+
+def compact_movements(db: Session, before: datetime) -> StockCompaction:
+    """
+    Roll movements at or before ``before`` into snapshots and delete them.
+
+    Older snapshots are kept, so stock before the cutoff can still be read
+    at snapshot granularity.
+    """
+    before = _naive_utc(before)
+    snapshots_taken = take_snapshots(db, at=before)
+    removed = db.execute(
+        delete(StockMovement.__table__).where(StockMovement.__table__.c.occurred_at <= before)
+    ).rowcount
+    db.commit()
+    return StockCompaction(snapshots_taken=snapshots_taken, movements_removed=removed or 0)
@@ -0,0 +1,246 @@
+"""
+Technician work queues.
+
+Every open ticket gets an urgency score built from its priority, how long
+it has sat in its current status, how much slack is left before its
+estimated completion, and whether it is blocked awaiting parts.
+
+Both time terms grow at the same rate for every ticket, so the *ordering*
+of tickets never changes with the clock. That lets each technician's queue
+live in a heap keyed on a time-independent value that only has to be
+touched when a ticket actually changes.
+"""
+import heapq
+import itertools
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.ticket import CLOSED_STATUSES, Ticket, TicketPriority, TicketStatus
+from app.models.ticket_update import TicketUpdate
+from app.services import events
+
+# Priority expressed as hours of head start over a LOW ticket
+PRIORITY_WEIGHTS = {
+    TicketPriority.URGENT: 96.0,
+    TicketPriority.HIGH: 48.0,
+    TicketPriority.MEDIUM: 24.0,
+    TicketPriority.LOW: 0.0,
+}
+# Slack assumed for tickets without an estimated completion date
+DEFAULT_SLACK_HOURS = 7 * 24.0
+# Tickets awaiting parts can't be worked, so they sink below everything else
+BLOCKED_PENALTY = 100000.0
+# A heap is rebuilt once more than this share of its entries are stale
+MAX_STALE_FRACTION = 0.25
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_hours(value: datetime) -> float:
+    """Convert a (naive UTC or aware) datetime to hours since the epoch."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH).total_seconds() / 3600.0
+
+
+class QueueItem:
+    """An open ticket as tracked by the work queue index."""
+
+    __slots__ = (
+        "ticket_id", "ticket_number", "technician_id", "status", "priority",
+        "estimated_completion", "status_since", "key",
+    )
+
+    def __init__(self, ticket_id, ticket_number, technician_id, status, priority,
+                 estimated_completion, status_since):
+        self.ticket_id = ticket_id
+        self.ticket_number = ticket_number
+        self.technician_id = technician_id
+        self.status = status
+        self.priority = priority or TicketPriority.MEDIUM
+        self.estimated_completion = estimated_completion
+        self.status_since = status_since
+        self.key = self._static_key()
+
+    @property
+    def blocked(self) -> bool:
+        return self.status == TicketStatus.AWAITING_PARTS
+
+    def _static_key(self) -> float:
+        # score(now) = weight + (now - since) + (now - due) - penalty
+        #            = key + 2 * now
+        since = _to_hours(self.status_since)
+        if self.estimated_completion is not None:
+            due = _to_hours(self.estimated_completion)
+        else:
+            due = since + DEFAULT_SLACK_HOURS
+        key = PRIORITY_WEIGHTS.get(self.priority, 0.0) - since - due
+        if self.blocked:
+            key -= BLOCKED_PENALTY
+        return key
+
+    def score(self, now: datetime) -> float:
+        return self.key + 2 * _to_hours(now)
+
+
+class WorkQueueIndex:
+    """
+    Per-technician heaps of open tickets, ordered most urgent first.
+
+    The index is built lazily from the database on first use and then kept
+    current from ticket change events. Removed or rescored tickets leave a
+    stale heap entry behind that is skipped on read. A heap is compacted as
+    soon as its stale entries pass ``MAX_STALE_FRACTION`` of it, so its size
+    stays proportional to the technician's open tickets, and a read walks
+    only the heap entries ahead of the last ticket it returns.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._items: Dict[int, QueueItem] = {}
+        self._heaps: Dict[Optional[int], List[Tuple[float, int, int]]] = defaultdict(list)
+        self._stale: Dict[Optional[int], int] = defaultdict(int)
+        self._live_seq: Dict[int, int] = {}
+        self._seq = itertools.count()
+
+    def reset(self) -> None:
+        """Forget everything; the next read rebuilds from the database."""
+        with self._lock:
+            self._loaded = False
+            self._items.clear()
+            self._heaps.clear()
+            self._stale.clear()
+            self._live_seq.clear()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        """Build the index with one query over open tickets."""
+        last_transition = (
+            db.query(
+                TicketUpdate.ticket_id.label("ticket_id"),
+                func.max(TicketUpdate.timestamp).label("since"),
+            )
+            .filter(TicketUpdate.previous_status.isnot(None))
+            .group_by(TicketUpdate.ticket_id)
+            .subquery()
+        )
+        rows = (
+            db.query(
+                Ticket.id, Ticket.ticket_number, Ticket.technician_id, Ticket.status,
+                Ticket.priority, Ticket.estimated_completion, Ticket.created_at,
+                last_transition.c.since,
+            )
+            .outerjoin(last_transition, last_transition.c.ticket_id == Ticket.id)
+            .filter(Ticket.is_archived == False)  # noqa: E712
+            .filter(Ticket.status.notin_(CLOSED_STATUSES))
+            .all()
+        )
+
+        with self._lock:
+            self.reset()
+            for (ticket_id, number, technician_id, status, priority,
+                 estimated_completion, created_at, since) in rows:
+                self._add(QueueItem(
+                    ticket_id, number, technician_id, status, priority,
+                    estimated_completion, since or created_at,
+                ))
+            self._loaded = True
+
+    def upsert(self, ticket: Ticket, status_changed: bool = False) -> None:
+        """Insert, rescore or drop a ticket after it changed."""
+        with self._lock:
+            previous = self._items.get(ticket.id)
+            if previous is not None:
+                self._discard(previous)
+
+            if ticket.is_archived or ticket.status in CLOSED_STATUSES:
+                return
+
+            if status_changed or previous is None:
+                status_since = datetime.utcnow()
+            else:
+                status_since = previous.status_since
+
+            self._add(QueueItem(
+                ticket.id, ticket.ticket_number, ticket.technician_id, ticket.status,
+                ticket.priority, ticket.estimated_completion, status_since,
+            ))
+
+    def remove(self, ticket_id: int) -> None:
+        with self._lock:
+            item = self._items.get(ticket_id)
+            if item is not None:
+                self._discard(item)
+
+    def queue(self, technician_id: int, limit: int) -> List[QueueItem]:
+        """Return up to ``limit`` of a technician's open tickets, most urgent first."""
+        with self._lock:
+            heap = self._heaps.get(technician_id)
+            if not heap:
+                return []
+
+            # Best-first walk down the heap's tree: an entry's children are
+            # only visited once it has been, so the walk stops after the
+            # ``limit`` most urgent live entries and the stale ones among them
+            result = []
+            frontier = [(heap[0], 0)]
+            while frontier and len(result) < limit:
+                (_, ticket_id, seq), index = heapq.heappop(frontier)
+                if self._live_seq.get(ticket_id) == seq:
+                    result.append(self._items[ticket_id])
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+            return result
+
+    def _add(self, item: QueueItem) -> None:
+        seq = next(self._seq)
+        self._items[item.ticket_id] = item
+        self._live_seq[item.ticket_id] = seq
+        heapq.heappush(self._heaps[item.technician_id], (-item.key, item.ticket_id, seq))
+
+    def _discard(self, item: QueueItem) -> None:
+        del self._items[item.ticket_id]
+        del self._live_seq[item.ticket_id]
+        self._stale[item.technician_id] += 1
+        if self._stale[item.technician_id] > len(self._heaps[item.technician_id]) * MAX_STALE_FRACTION:
+            self._compact(item.technician_id)
+
+    def _compact(self, technician_id: Optional[int]) -> None:
+        heap = [
+            entry for entry in self._heaps[technician_id]
+            if self._live_seq.get(entry[1]) == entry[2]
+        ]
+        heapq.heapify(heap)
+        self._heaps[technician_id] = heap
+        self._stale[technician_id] = 0
+
+
+work_queue_index = WorkQueueIndex()
+
+
+def _on_ticket_changed(ticket: Ticket, status_changed: bool = False, **_) -> None:
+    if work_queue_index.loaded:
+        work_queue_index.upsert(ticket, status_changed=status_changed)
+
+
+def _on_ticket_deleted(ticket_id: int, **_) -> None:
+    if work_queue_index.loaded:
+        work_queue_index.remove(ticket_id)
+
+
+events.subscribe(events.TICKET_CHANGED, _on_ticket_changed)
+events.subscribe(events.TICKET_DELETED, _on_ticket_deleted)
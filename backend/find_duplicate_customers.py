@@ -0,0 +1,45 @@
+# Script to find, and optionally merge, duplicate customer records
+import argparse
+
+from app.db.database import SessionLocal
+from app.models.customer import Customer
+from app.services.customer_dedupe import find_duplicate_customers, merge_customers
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find customers that are likely the same person by phone, email and name"
+    )
+    parser.add_argument("--merge", action="store_true",
+                        help="Merge every cluster into its oldest customer instead of only reporting")
+    parser.add_argument("--show", type=int, default=20, help="Number of clusters to print")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        clusters = find_duplicate_customers(db)
+        for cluster in clusters[:args.show]:
+            print(
+                f"Keep {cluster.survivor_id}, merge "
+                f"{', '.join(str(customer_id) for customer_id in cluster.customer_ids if customer_id != cluster.survivor_id)} "
+                f"({', '.join(cluster.reasons)})"
+            )
+        duplicates = sum(len(cluster.customer_ids) - 1 for cluster in clusters)
+        if not args.merge:
+            print(f"Found {len(clusters)} clusters, {duplicates} duplicate customers.")
+            return
+
+        bikes_moved = 0
+        for cluster in clusters:
+            customers = db.query(Customer).filter(Customer.id.in_(cluster.customer_ids)).all()
+            survivor = next(customer for customer in customers if customer.id == cluster.survivor_id)
+            losers = [customer for customer in customers if customer.id != cluster.survivor_id]
+            bikes_moved += merge_customers(db, survivor, losers).bikes_moved
+            db.commit()
+        print(f"Merged {duplicates} duplicate customers in {len(clusters)} clusters, moved {bikes_moved} bikes.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
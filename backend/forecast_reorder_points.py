@@ -0,0 +1,53 @@
+# Script to tune part reorder points from recent demand
+import argparse
+
+from app.db.database import SessionLocal
+from app.services.forecast import (
+    DEFAULT_HISTORY_DAYS, DEFAULT_LEAD_TIME_DAYS, DEFAULT_SERVICE_LEVEL, DEFAULT_SMOOTHING,
+    forecast_reorder_points
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Forecast part demand and propose or apply reorder points"
+    )
+    parser.add_argument("--history-days", type=int, default=DEFAULT_HISTORY_DAYS,
+                        help="Days of demand history to fit")
+    parser.add_argument("--lead-time-days", type=int, default=DEFAULT_LEAD_TIME_DAYS,
+                        help="Lead time for parts without their own")
+    parser.add_argument("--service-level", type=float, default=DEFAULT_SERVICE_LEVEL,
+                        help="Probability of not running out during the lead time")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_SMOOTHING,
+                        help="Exponential smoothing factor")
+    parser.add_argument("--apply", action="store_true",
+                        help="Write the proposed levels instead of only reporting them")
+    parser.add_argument("--show", type=int, default=20, help="Number of proposals to print")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = forecast_reorder_points(
+            db,
+            history_days=args.history_days,
+            lead_time_days=args.lead_time_days,
+            service_level=args.service_level,
+            alpha=args.alpha,
+            apply=args.apply,
+            limit=args.show,
+        )
+        for proposal in result.proposals:
+            print(
+                f"{proposal.sku or proposal.part_id}: reorder point "
+                f"{proposal.current_reorder_point} -> {proposal.proposed_reorder_point}, "
+                f"min stock {proposal.current_min_stock} -> {proposal.proposed_min_stock} "
+                f"({proposal.daily_demand:.2f}/day)"
+            )
+        action = "Updated" if result.applied else "Would update"
+        print(f"Forecast {result.parts_forecast} parts. {action} {result.parts_changed}.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
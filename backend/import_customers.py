@@ -0,0 +1,47 @@
+# Script to import customers and bikes from another system's export
+import argparse
+import csv
+
+from app.db.database import SessionLocal
+from app.schemas.customer import ImportFormat
+from app.services.customer_import import DEFAULT_CHUNK_SIZE, import_customers
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import customers and bikes from a CSV or NDJSON file"
+    )
+    parser.add_argument("path", help="File to import")
+    parser.add_argument("--format", choices=[fmt.value for fmt in ImportFormat],
+                        help="File format; taken from the file extension when omitted")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows written per transaction")
+    parser.add_argument("--mapping", help="Write the row to ID mapping to this CSV file")
+    args = parser.parse_args()
+
+    format = ImportFormat(args.format) if args.format else (
+        ImportFormat.NDJSON if args.path.lower().endswith((".ndjson", ".jsonl")) else ImportFormat.CSV
+    )
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            result = import_customers(db, stream, format=format, chunk_size=args.chunk_size)
+        for error in result.errors:
+            print(f"Line {error.row} ({error.record or 'unknown'}): {error.error}")
+        if args.mapping:
+            with open(args.mapping, "w", newline="") as out:
+                writer = csv.writer(out)
+                writer.writerow(["row", "record", "id", "external_id", "existing"])
+                for record in result.mapping:
+                    writer.writerow([record.row, record.record, record.id, record.external_id or "", record.existing])
+        print(
+            f"Read {result.rows_read} rows: created {result.customers_created} customers "
+            f"({result.customers_existing} already imported) and {result.bikes_created} bikes, "
+            f"{result.failed} failed."
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Worker that drains the customer notification outbox over SMTP
+import argparse
+import time
+
+from app.db.database import SessionLocal
+from app.services.notifications import (
+    DEFAULT_BATCH_SIZE, DEFAULT_MAX_ATTEMPTS, SmtpSender, deliver_pending
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Send queued customer notifications, retrying failures with backoff"
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Send everything currently due and exit instead of polling",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Notifications claimed per batch (default {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        help=f"Attempts before a notification is marked failed (default {DEFAULT_MAX_ATTEMPTS})",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=10.0,
+        help="Seconds to wait when the outbox is empty (default 10)",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    sender = SmtpSender()
+    try:
+        while True:
+            result = deliver_pending(
+                db, sender, batch_size=args.batch_size, max_attempts=args.max_attempts
+            )
+            if result.sent or result.retried or result.failed:
+                print(f"Sent {result.sent}, retrying {result.retried}, failed {result.failed}")
+            if result.sent + result.retried + result.failed < args.batch_size:
+                if args.once:
+                    break
+                time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sender.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
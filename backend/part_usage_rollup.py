@@ -0,0 +1,28 @@
+# Script to refresh the daily part usage rollups behind the analytics endpoints
+import argparse
+
+from app.db.database import SessionLocal
+from app.services.part_usage import refresh_part_usage
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Refresh the daily part usage rollups from ticket parts"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild every day instead of only the days changed since the last run",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = refresh_part_usage(db, full=args.full)
+        print(f"Refreshed {result.days_refreshed} days, wrote {result.rows_written} rollup rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
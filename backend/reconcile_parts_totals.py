@@ -0,0 +1,35 @@
+# Script to recompute ticket parts totals from their line items
+import argparse
+
+from app.db.database import SessionLocal
+from app.services.reconciliation import reconcile_parts_totals
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute Ticket.total_parts_cost from ticket_parts and report drift"
+    )
+    parser.add_argument("--fix", action="store_true", help="Write corrected totals back")
+    parser.add_argument("--batch-size", type=int, default=500, help="Tickets fixed per transaction")
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = reconcile_parts_totals(db, fix=args.fix, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    for mismatch in result.mismatches:
+        print(
+            f"Ticket {mismatch.ticket_number or mismatch.ticket_id}: "
+            f"stored {mismatch.stored_total} != computed {mismatch.computed_total}"
+        )
+    print(
+        f"Checked {result.tickets_checked} tickets, "
+        f"{len(result.mismatches)} mismatched, {result.fixed} fixed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Script to snapshot and compact the stock movement ledger
+import argparse
+from datetime import datetime, timedelta
+
+from app.db.database import SessionLocal
+from app.services.stock_ledger import compact_movements, take_snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Maintain the stock movement ledger"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("snapshot", help="Snapshot every part whose stock moved since its last snapshot")
+
+    compact = subparsers.add_parser("compact", help="Roll old movements into snapshots and delete them")
+    compact.add_argument("--keep-days", type=int, default=365, help="Days of movements to keep")
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "snapshot":
+            taken = take_snapshots(db)
+            print(f"Took {taken} snapshots")
+        else:
+            cutoff = datetime.utcnow() - timedelta(days=args.keep_days)
+            result = compact_movements(db, before=cutoff)
+            print(
+                f"Took {result.snapshots_taken} snapshots, "
+                f"removed {result.movements_removed} movements before {cutoff:%Y-%m-%d %H:%M}"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
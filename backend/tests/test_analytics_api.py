@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_db
+from app.core.security import get_password_hash
+from app.models.user import User, UserRole
+from app.models.customer import Customer
+from app.models.bike import Bike
+from app.models.part import Part
+from app.models.part_usage import PartUsagePending
+from app.models.ticket import Ticket
+from app.models.ticket_part import TicketPart
+from app.services.part_usage import refresh_part_usage
+from main import app
+
+
+# Setup test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"  # Use in-memory database for tests
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine
+)
+
+
+# Dependency override
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_and_teardown_db_override():
+    # Setup: Override the dependency
+    original_get_db = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+
+    yield
+
+    # Teardown: Restore original dependency if it existed
+    if original_get_db:
+        app.dependency_overrides[get_db] = original_get_db
+    else:
+        del app.dependency_overrides[get_db]
+
+
+@pytest.fixture()
+def test_db():
+    # Create the database and tables
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    admin_user = User(
+        email="admin@example.com",
+        username="admin",
+        full_name="Admin User",
+        hashed_password=get_password_hash("adminpassword"),
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    tech_user = User(
+        email="tech@example.com",
+        username="technician",
+        full_name="Tech User",
+        hashed_password=get_password_hash("techpassword"),
+        role=UserRole.TECHNICIAN,
+        is_active=True
+    )
+    customer = Customer(name="Alice Johnson", email="alice@example.com")
+    chain = Part(name="Chain", sku="CH-1", category="Drivetrain", quantity=20,
+                 cost_price=10.0, retail_price=25.0)
+    cassette = Part(name="Cassette", sku="CS-1", category="Drivetrain", quantity=4,
+                    cost_price=40.0, retail_price=80.0)
+    pads = Part(name="Brake Pads", sku="BP-1", category="Brakes", quantity=30,
+                cost_price=5.0, retail_price=15.0)
+    db.add_all([admin_user, tech_user, customer, chain, cassette, pads])
+    db.commit()
+
+    bike = Bike(name="Trek Fuel EX", owner_id=customer.id)
+    db.add(bike)
+    db.commit()
+    ticket = Ticket(ticket_number="T-AN-001", problem_description="Drivetrain service", bike_id=bike.id)
+    db.add(ticket)
+    db.commit()
+
+    db.add_all([
+        TicketPart(ticket_id=ticket.id, part_id=chain.id, quantity=3, price_charged=25.0),
+        TicketPart(ticket_id=ticket.id, part_id=pads.id, quantity=2, price_charged=15.0),
+        # Used long ago: outside every default period
+        TicketPart(ticket_id=ticket.id, part_id=cassette.id, quantity=1, price_charged=80.0,
+                   created_at=datetime.utcnow() - timedelta(days=200)),
+    ])
+    db.commit()
+
+    yield db
+
+    # Teardown - drop all tables
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def client(test_db):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def admin_token(client: TestClient):
+    login_data = {
+        "username": "admin@example.com",
+        "password": "adminpassword",
+    }
+    response = client.post("/api/auth/login", data=login_data)
+    return response.json()["access_token"]
+
+
+@pytest.fixture()
+def tech_token(client: TestClient):
+    login_data = {
+        "username": "tech@example.com",
+        "password": "techpassword",
+    }
+    response = client.post("/api/auth/login", data=login_data)
+    return response.json()["access_token"]
+
+
+def test_top_movers(client: TestClient, tech_token: str, test_db):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+
+    # Nothing is reported until the rollups are refreshed
+    response = client.get("/api/analytics/parts/top-movers", headers=headers)
+    assert response.json() == []
+
+    result = refresh_part_usage(test_db)
+    assert result.days_refreshed == 2
+    assert result.rows_written == 3
+
+    response = client.get("/api/analytics/parts/top-movers", headers=headers)
+    assert response.status_code == 200
+    content = response.json()
+    assert [mover["sku"] for mover in content] == ["CH-1", "BP-1"]
+    assert content[0]["quantity"] == 3
+    assert content[0]["revenue"] == 75.0
+    assert content[0]["margin"] == 45.0
+
+    response = client.get("/api/analytics/parts/top-movers?days=365&category=drivetrain", headers=headers)
+    assert [mover["sku"] for mover in response.json()] == ["CH-1", "CS-1"]
+
+
+def test_rollups_follow_line_item_changes(client: TestClient, tech_token: str, test_db):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+    refresh_part_usage(test_db)
+
+    pads = test_db.query(Part).filter(Part.sku == "BP-1").first()
+    chain_line = test_db.query(TicketPart).join(Part).filter(Part.sku == "CH-1").first()
+    pads_line = test_db.query(TicketPart).filter(TicketPart.part_id == pads.id).first()
+    chain_line.quantity = 1
+    test_db.delete(pads_line)
+    test_db.commit()
+
+    # Only today's rollup is recomputed
+    result = refresh_part_usage(test_db)
+    assert result.days_refreshed == 1
+    assert test_db.query(PartUsagePending).count() == 0
+
+    response = client.get("/api/analytics/parts/top-movers", headers=headers)
+    content = response.json()
+    assert [(mover["sku"], mover["quantity"]) for mover in content] == [("CH-1", 1)]
+
+    # A full rebuild agrees with the incremental refresh
+    result = refresh_part_usage(test_db, full=True)
+    assert result.days_refreshed == 2
+    response = client.get("/api/analytics/parts/top-movers", headers=headers)
+    assert response.json() == content
+
+
+def test_dead_stock(client: TestClient, tech_token: str, test_db):
+    refresh_part_usage(test_db)
+    response = client.get(
+        "/api/analytics/parts/dead-stock",
+        headers={"Authorization": f"Bearer {tech_token}"},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [part["sku"] for part in content] == ["CS-1"]
+    assert content[0]["stock_value"] == 160.0
+    assert content[0]["last_used_on"] == (datetime.utcnow() - timedelta(days=200)).date().isoformat()
+
+
+def test_margin_by_category(client: TestClient, admin_token: str, tech_token: str, test_db):
+    refresh_part_usage(test_db)
+
+    response = client.get(
+        "/api/analytics/parts/margin-by-category",
+        headers={"Authorization": f"Bearer {tech_token}"},
+    )
+    assert response.status_code == 403
+
+    response = client.get(
+        "/api/analytics/parts/margin-by-category?days=365",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    content = {row["category"]: row for row in response.json()}
+    assert content["Drivetrain"]["revenue"] == 155.0
+    assert content["Drivetrain"]["cost"] == 70.0
+    assert content["Drivetrain"]["margin"] == 85.0
+    assert content["Brakes"]["margin_percent"] == pytest.approx(66.667, rel=1e-3)
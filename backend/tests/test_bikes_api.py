@@ -9,6 +9,7 @@ from app.core.security import get_password_hash
 from app.models.user import User, UserRole
 from app.models.customer import Customer
 from app.models.bike import Bike
+from app.models.ticket import Ticket, TicketStatus
 from main import app
 
 
@@ -300,4 +301,48 @@ def test_delete_bike_unauthorized(client: TestClient, tech_token: str):
         headers={"Authorization": f"Bearer {tech_token}"}
     )
 
-    assert response.status_code == 403  # Forbidden for non-admin users
\ No newline at end of file
+    assert response.status_code == 403  # Forbidden for non-admin users
+
+
+def test_read_bikes_with_stats(client: TestClient, tech_token: str, test_db):
+    from datetime import datetime, timedelta
+
+    bike = test_db.query(Bike).first()
+    test_db.add(Bike(name="Spare Bike", owner_id=bike.owner_id))
+    start = datetime(2026, 3, 1)
+    for i, ticket_status in enumerate([TicketStatus.DELIVERED, TicketStatus.COMPLETE, TicketStatus.AWAITING_PARTS]):
+        test_db.add(Ticket(
+            ticket_number=f"T-{i}", problem_description="Service", bike_id=bike.id,
+            status=ticket_status, labor_cost=40.0, total_parts_cost=5.0,
+            created_at=start + timedelta(days=i),
+        ))
+    test_db.commit()
+    headers = {"Authorization": f"Bearer {tech_token}"}
+
+    response = client.get("/api/bikes/", headers=headers)
+    assert response.status_code == 200
+    assert response.json()[0]["ticket_count"] is None
+
+    response = client.get("/api/bikes/?include_stats=true", headers=headers)
+    assert response.status_code == 200
+    data = {item["name"]: item for item in response.json()}
+    stats = data["Mountain Bike"]
+    assert stats["ticket_count"] == 3
+    assert stats["last_service_at"].startswith("2026-03-03")
+    assert stats["open_ticket_status"] == TicketStatus.AWAITING_PARTS.value
+    assert stats["lifetime_spend"] == 90.0
+    spare = data["Spare Bike"]
+    assert spare["ticket_count"] == 0
+    assert spare["open_ticket_status"] is None
+    assert spare["lifetime_spend"] == 0.0
+
+    response = client.get("/api/bikes/?include_stats=true&skip=1&limit=1", headers=headers)
+    assert [item["name"] for item in response.json()] == ["Spare Bike"]
+
+    response = client.get(
+        f"/api/bikes/{bike.id}/with-tickets?tickets_skip=1&tickets_limit=1", headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ticket_count"] == 3
+    assert [ticket["ticket_number"] for ticket in data["tickets"]] == ["T-1"]
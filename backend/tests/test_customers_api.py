@@ -14,6 +14,8 @@ from app.models.part import Part
 from app.models.ticket_part import TicketPart
 from app.models.ticket_update import TicketUpdate
 from app.models.service import Service
+from app.models.notification import Notification
+from app.services.customer_search import customer_trigram_index
 from main import app
 
 
@@ -98,10 +100,12 @@ def test_db():
     db.add(test_customer1)
     db.add(test_customer2)
     db.commit()
+    customer_trigram_index.reset()
 
     yield db
 
     # Teardown - drop all tables
+    customer_trigram_index.reset()
     Base.metadata.drop_all(bind=engine)
 
 
@@ -291,3 +295,377 @@ def test_search_customers_minimum_length(client: TestClient, tech_token: str):
     )
 
     assert response.status_code == 422  # Validation error
+
+
+def test_filter_customers_by_phone(client: TestClient, tech_token: str, test_db):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+
+    def names(**params):
+        response = client.get("/api/customers/", params=params, headers=headers)
+        assert response.status_code == 200
+        return [customer["name"] for customer in response.json()]
+
+    # Punctuation is ignored on both sides; the default is a suffix match
+    assert names(phone="7890") == ["John Doe"]
+    assert names(phone="(123) 456.7890") == ["John Doe"]
+    assert names(phone="456") == []
+    assert names(phone="456", phone_match="contains") == ["John Doe"]
+    assert names(phone="456-7890", phone_match="exact") == []
+    assert names(phone="1234567890", phone_match="exact") == ["John Doe"]
+
+    # Email matches ignore case
+    assert names(email="JANE@Example") == ["Jane Smith"]
+
+    # Lookup keys follow updates
+    customer = test_db.query(Customer).filter(Customer.name == "Jane Smith").first()
+    response = client.put(
+        f"/api/customers/{customer.id}",
+        json={"phone": "+1 (555) 010-2222"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert names(phone="0102222") == ["Jane Smith"]
+    assert names(phone="3210") == []
+
+
+def test_fuzzy_search_customers(client: TestClient, admin_token: str, tech_token: str):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+
+    response = client.get("/api/customers/fuzzy?q=Jhon Doe", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [customer["name"] for customer in data] == ["John Doe"]
+    assert 0.3 <= data[0]["score"] < 1
+
+    # Only the mailbox name counts, not the shared domain
+    response = client.get("/api/customers/fuzzy?q=janee@example.com", headers=headers)
+    assert [customer["name"] for customer in response.json()] == ["Jane Smith"]
+
+    # The index follows creates, updates and deletes
+    response = client.post(
+        "/api/customers/",
+        json={"name": "Marguerite Okonkwo"},
+        headers=headers,
+    )
+    created = response.json()
+    response = client.get("/api/customers/fuzzy?q=margarite okonkow", headers=headers)
+    assert [customer["id"] for customer in response.json()] == [created["id"]]
+
+    client.put(f"/api/customers/{created['id']}", json={"name": "Rita Okafor"}, headers=headers)
+    response = client.get("/api/customers/fuzzy?q=margarite okonkow", headers=headers)
+    assert response.json() == []
+
+    client.delete(f"/api/customers/{created['id']}", headers={"Authorization": f"Bearer {admin_token}"})
+    response = client.get("/api/customers/fuzzy?q=rita okafor", headers=headers)
+    assert response.json() == []
+
+
+def test_customer_overview(client: TestClient, tech_token: str, test_db):
+    from datetime import datetime, timedelta
+    from sqlalchemy import event
+    from app.models.ticket import TicketStatus
+
+    customer = test_db.query(Customer).filter(Customer.name == "John Doe").first()
+    other = test_db.query(Customer).filter(Customer.name == "Jane Smith").first()
+    road = Bike(name="Road Bike", owner=customer)
+    gravel = Bike(name="Gravel Bike", owner=customer)
+    test_db.add_all([road, gravel, Bike(name="Commuter", owner=other)])
+    test_db.flush()
+    start = datetime(2026, 1, 1)
+    statuses = [TicketStatus.DELIVERED, TicketStatus.COMPLETE, TicketStatus.IN_PROGRESS]
+    for i, ticket_status in enumerate(statuses):
+        test_db.add(Ticket(
+            ticket_number=f"R-{i}", problem_description="Tune-up", bike_id=road.id,
+            status=ticket_status, labor_cost=50.0, total_parts_cost=10.0 * i,
+            created_at=start + timedelta(days=i),
+        ))
+    test_db.commit()
+
+    headers = {"Authorization": f"Bearer {tech_token}"}
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = client.get(f"/api/customers/{customer.id}/overview?recent=2", headers=headers)
+        small = len(statements)
+        # More tickets must not mean more queries
+        for i in range(20):
+            test_db.add(Ticket(
+                ticket_number=f"G-{i}", problem_description="Flat", bike_id=gravel.id,
+                status=TicketStatus.INTAKE, created_at=start + timedelta(days=i),
+            ))
+        test_db.commit()
+        statements.clear()
+        larger = client.get(f"/api/customers/{customer.id}/overview?recent=2", headers=headers)
+        assert len(statements) == small
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["name"] == "John Doe"
+    assert data["ticket_count"] == 3
+    assert data["open_tickets"] == 1
+    assert data["lifetime_spend"] == 110.0
+    bikes = {bike["name"]: bike for bike in data["bikes"]}
+    assert set(bikes) == {"Road Bike", "Gravel Bike"}
+    assert [t["ticket_number"] for t in bikes["Road Bike"]["recent_tickets"]] == ["R-2", "R-1"]
+    assert bikes["Road Bike"]["last_service_at"].startswith("2026-01-03")
+    assert bikes["Gravel Bike"]["ticket_count"] == 0
+    assert bikes["Gravel Bike"]["recent_tickets"] == []
+
+    data = larger.json()
+    assert data["open_tickets"] == 21
+    assert len(next(b for b in data["bikes"] if b["name"] == "Gravel Bike")["recent_tickets"]) == 2
+
+    response = client.get("/api/customers/9999/overview", headers=headers)
+    assert response.status_code == 404
+
+
+def test_delete_customer_cascades(client: TestClient, admin_token: str, test_db):
+    from sqlalchemy import event
+    from app.models.part_usage import PartUsagePending
+    from app.models.ticket import TicketStatus
+
+    customer = test_db.query(Customer).filter(Customer.name == "John Doe").first()
+    other = test_db.query(Customer).filter(Customer.name == "Jane Smith").first()
+    part = Part(name="Chain", sku="CH-1", quantity=10, cost_price=5.0, retail_price=10.0)
+    kept_bike = Bike(name="Kept", owner=other)
+    test_db.add_all([part, kept_bike])
+    test_db.flush()
+    kept_ticket = Ticket(ticket_number="K-1", problem_description="Keep", bike_id=kept_bike.id)
+    test_db.add(kept_ticket)
+    for b in range(3):
+        bike = Bike(name=f"Fleet {b}", owner=customer)
+        test_db.add(bike)
+        test_db.flush()
+        for t in range(4):
+            ticket = Ticket(
+                ticket_number=f"F-{b}-{t}", problem_description="Fleet service",
+                bike_id=bike.id, status=TicketStatus.COMPLETE,
+            )
+            test_db.add(ticket)
+            test_db.flush()
+            test_db.add(TicketPart(ticket_id=ticket.id, part_id=part.id, quantity=1, price_charged=10.0))
+            test_db.add(TicketUpdate(ticket_id=ticket.id, new_status=TicketStatus.COMPLETE, note="Done"))
+    test_db.commit()
+    test_db.query(PartUsagePending).delete()
+    test_db.commit()
+    customer_id, kept_ticket_id = customer.id, kept_ticket.id
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.get(f"/api/customers/{customer_id}/delete-preview", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "customers": 1, "bikes": 3, "tickets": 12,
+        "ticket_updates": 12, "ticket_parts": 12, "dry_run": True,
+    }
+
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = client.delete(f"/api/customers/{customer_id}", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert response.status_code == 200
+    assert response.json()["name"] == "John Doe"
+    # One statement per table, not one per row
+    assert sum(statement.lstrip().upper().startswith("DELETE") for statement in statements) == 5
+
+    test_db.expire_all()
+    assert test_db.query(Bike).filter(Bike.owner_id == customer_id).count() == 0
+    assert test_db.query(Ticket).count() == 1
+    assert test_db.query(TicketPart).count() == 0
+    assert test_db.query(TicketUpdate).count() == 0
+    assert test_db.query(PartUsagePending).count() == 1
+    assert test_db.get(Ticket, kept_ticket_id) is not None
+
+    response = client.get(f"/api/customers/{customer_id}/delete-preview", headers=headers)
+    assert response.status_code == 404
+
+
+def test_delete_customer_restores_reserved_stock(client: TestClient, admin_token: str, test_db):
+    from app.models.stock_movement import MovementKind, StockMovement
+
+    customer = test_db.query(Customer).filter(Customer.name == "John Doe").first()
+    chain = Part(name="Chain", sku="CH-2", quantity=1, reorder_point=2, cost_price=5.0, retail_price=10.0)
+    tube = Part(name="Tube", sku="TU-2", quantity=4, cost_price=2.0, retail_price=6.0)
+    bike = Bike(name="Commuter", owner=customer)
+    test_db.add_all([chain, tube, bike])
+    test_db.flush()
+    tickets = [Ticket(ticket_number=f"R-{i}", problem_description="Repair", bike_id=bike.id) for i in range(2)]
+    test_db.add_all(tickets)
+    test_db.flush()
+    test_db.add_all([
+        TicketPart(ticket_id=tickets[0].id, part_id=chain.id, quantity=2, price_charged=10.0),
+        TicketPart(ticket_id=tickets[1].id, part_id=chain.id, quantity=1, price_charged=10.0),
+        TicketPart(ticket_id=tickets[1].id, part_id=tube.id, quantity=2, price_charged=6.0),
+        # Nothing was reserved for a backordered line
+        TicketPart(ticket_id=tickets[1].id, part_id=tube.id, quantity=5, price_charged=6.0, backordered=True),
+    ])
+    notification = Notification(ticket_id=tickets[0].id, recipient="john@example.com", subject="Ready", body="Ready")
+    test_db.add(notification)
+    test_db.commit()
+    chain_id, tube_id, notification_id = chain.id, tube.id, notification.id
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.delete(f"/api/customers/{customer.id}", headers=headers)
+    assert response.status_code == 200
+
+    test_db.expire_all()
+    chain, tube = test_db.get(Part, chain_id), test_db.get(Part, tube_id)
+    assert (chain.quantity, tube.quantity) == (4, 6)
+    assert chain.is_low_stock is False
+    assert chain.version == 2
+    returns = dict(
+        test_db.query(StockMovement.part_id, StockMovement.quantity_change)
+        .filter(StockMovement.kind == MovementKind.RETURN)
+        .all()
+    )
+    assert returns == {chain_id: 3, tube_id: 2}
+    # Queued emails stay in the outbox without pointing at a deleted ticket
+    assert test_db.get(Notification, notification_id).ticket_id is None
+
+
+def test_find_and_merge_duplicate_customers(client: TestClient, admin_token: str, tech_token: str, test_db):
+    john = test_db.query(Customer).filter(Customer.name == "John Doe").first()
+    walk_in = Customer(name="Doe, John", phone="(123) 456-7890", notes="Walk-in")
+    by_email = Customer(name="J. Doe", email="JOHN@example.com")
+    # Same phone, different person
+    household = Customer(name="Mary Doe", phone="123.456.7890")
+    # Same name, conflicting email
+    namesake = Customer(name="Jane Smith", email="other.jane@example.com")
+    test_db.add_all([walk_in, by_email, household, namesake])
+    test_db.flush()
+    test_db.add_all([Bike(name="Walk-in Bike", owner_id=walk_in.id), Bike(name="Road", owner_id=by_email.id)])
+    test_db.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.get("/api/customers/duplicates", headers={"Authorization": f"Bearer {tech_token}"})
+    assert response.status_code == 403
+
+    response = client.get("/api/customers/duplicates", headers=headers)
+    assert response.status_code == 200
+    clusters = response.json()
+    assert len(clusters) == 1
+    assert clusters[0]["survivor_id"] == john.id
+    assert clusters[0]["customer_ids"] == sorted([john.id, walk_in.id, by_email.id])
+    assert clusters[0]["reasons"] == ["email", "phone"]
+
+    response = client.post(
+        "/api/customers/merge",
+        json={"survivor_id": john.id, "customer_ids": clusters[0]["customer_ids"]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "survivor_id": john.id,
+        "merged_ids": sorted([walk_in.id, by_email.id]),
+        "bikes_moved": 2,
+    }
+
+    response = client.get(f"/api/customers/{john.id}/with-bikes", headers=headers)
+    data = response.json()
+    assert data["notes"] == "Regular customer\n\nWalk-in"
+    assert {bike["name"] for bike in data["bikes"]} == {"Walk-in Bike", "Road"}
+    assert client.get(f"/api/customers/{walk_in.id}", headers=headers).status_code == 404
+    assert client.get("/api/customers/duplicates", headers=headers).json() == []
+
+    response = client.post(
+        "/api/customers/merge", json={"survivor_id": john.id, "customer_ids": [9999]}, headers=headers
+    )
+    assert response.status_code == 404
+    response = client.post(
+        "/api/customers/merge", json={"survivor_id": john.id, "customer_ids": [john.id]}, headers=headers
+    )
+    assert response.status_code == 400
+
+    # Merging would lose one of two external IDs, so the next import would recreate that customer
+    john.external_id = "POS-1"
+    household.external_id = "POS-2"
+    test_db.commit()
+    response = client.post(
+        "/api/customers/merge", json={"survivor_id": john.id, "customer_ids": [household.id]}, headers=headers
+    )
+    assert response.status_code == 400
+    assert "POS-1, POS-2" in response.json()["detail"]
+    assert client.get(f"/api/customers/{household.id}", headers=headers).status_code == 200
+
+
+def test_import_customers_and_bikes(client: TestClient, admin_token: str, test_db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    csv_body = (
+        "record,external_id,name,email,phone,specs,owner_external_id,owner_email\n"
+        "customer,POS-1,Ann Rider,ann@example.com,(555) 010-0001,,,\n"
+        "bike,,Cargo Bike,,,Long tail,POS-1,\n"
+        "customer,POS-2,Ben Cyclist,,,,,\n"
+        "bike,,Tandem,,,,,JOHN@example.com\n"
+        "bike,,Ghost,,,,POS-99,\n"
+        "customer,POS-3,,,,,,\n"
+        "customer,POS-1,Ann Rider,ann@example.com,,,,\n"
+    )
+    response = client.post(
+        "/api/customers/import?chunk_size=2",
+        files={"file": ("pos.csv", csv_body, "text/csv")},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows_read"] == 7
+    assert data["customers_created"] == 2
+    assert data["customers_existing"] == 1
+    assert data["bikes_created"] == 2
+    assert data["failed"] == 2
+    assert {(error["row"], error["record"]) for error in data["errors"]} == {(6, "bike"), (7, "customer")}
+    ids = {(record["row"], record["record"]): record for record in data["mapping"]}
+    ann_id = ids[(2, "customer")]["id"]
+    assert ids[(8, "customer")] == {"row": 8, "record": "customer", "id": ann_id, "external_id": "POS-1", "existing": True}
+
+    ann = test_db.get(Customer, ann_id)
+    assert ann.phone_digits == "5550100001"
+    assert [bike.name for bike in ann.bikes] == ["Cargo Bike"]
+    john = test_db.query(Customer).filter(Customer.name == "John Doe").first()
+    assert test_db.get(Bike, ids[(5, "bike")]["id"]).owner_id == john.id
+
+    # Owners from an earlier import resolve from the database
+    ndjson_body = (
+        '{"record": "bike", "name": "Fixie", "owner_external_id": "POS-2"}\n'
+        "\n"
+        "not json\n"
+        '{"record": "customer", "external_id": 4, "name": "Cy Walker"}\n'
+    )
+    response = client.post(
+        "/api/customers/import",
+        files={"file": ("pos.ndjson", ndjson_body, "application/x-ndjson")},
+        headers=headers,
+    )
+    data = response.json()
+    assert data["bikes_created"] == 1
+    assert data["customers_created"] == 1
+    assert data["errors"][0]["row"] == 3
+    assert test_db.query(Customer).filter(Customer.external_id == "4").count() == 1
+
+    response = client.get("/api/customers/fuzzy?q=Ann%20Ridr", headers=headers)
+    assert [match["id"] for match in response.json()] == [ann_id]
+
+    # Rerunning the file maps every row to what the first run created
+    response = client.post(
+        "/api/customers/import?chunk_size=2",
+        files={"file": ("pos.csv", csv_body, "text/csv")},
+        headers=headers,
+    )
+    data = response.json()
+    assert (data["customers_created"], data["customers_existing"]) == (0, 3)
+    assert (data["bikes_created"], data["bikes_existing"]) == (0, 2)
+    rerun = {(record["row"], record["record"]): record for record in data["mapping"]}
+    assert rerun[(3, "bike")]["id"] == ids[(3, "bike")]["id"]
+    assert rerun[(3, "bike")]["existing"] is True
+    test_db.expire_all()
+    assert [bike.name for bike in test_db.get(Customer, ann_id).bikes] == ["Cargo Bike"]
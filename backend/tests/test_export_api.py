@@ -0,0 +1,204 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_db
+from app.core.security import get_password_hash
+from app.models.user import User, UserRole
+from app.models.customer import Customer
+from app.models.bike import Bike
+from app.models.part import Part
+from app.models.ticket import Ticket, TicketStatus
+from app.models.ticket_part import TicketPart
+from main import app
+
+
+# Setup test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"  # Use in-memory database for tests
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine
+)
+
+
+# Dependency override
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_and_teardown_db_override():
+    # Setup: Override the dependency
+    original_get_db = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+
+    yield
+
+    # Teardown: Restore original dependency if it existed
+    if original_get_db:
+        app.dependency_overrides[get_db] = original_get_db
+    else:
+        del app.dependency_overrides[get_db]
+
+
+@pytest.fixture()
+def test_db():
+    # Create the database and tables
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    admin_user = User(
+        email="admin@example.com",
+        username="admin",
+        full_name="Admin User",
+        hashed_password=get_password_hash("adminpassword"),
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    tech_user = User(
+        email="tech@example.com",
+        username="technician",
+        full_name="Tech User",
+        hashed_password=get_password_hash("techpassword"),
+        role=UserRole.TECHNICIAN,
+        is_active=True
+    )
+    alice = Customer(name="Alice Johnson", email="alice@example.com", phone="555-0101")
+    bob = Customer(name="Bob Smith", email="bob@example.com", phone="555-0202")
+    chain = Part(name="Chain", sku="CH-1", category="Drivetrain", quantity=8,
+                 reorder_point=2, cost_price=10.0, retail_price=25.0)
+    pads = Part(name="Brake Pads", sku="BP-1", category="Brakes", quantity=1,
+                reorder_point=3, cost_price=5.0, retail_price=15.0)
+    db.add_all([admin_user, tech_user, alice, bob, chain, pads])
+    db.commit()
+
+    trek = Bike(name="Trek Fuel EX", owner_id=alice.id)
+    giant = Bike(name="Giant Defy", owner_id=bob.id)
+    db.add_all([trek, giant])
+    db.commit()
+
+    db.add_all([
+        Ticket(ticket_number="T-EXP-001", problem_description="Chain skipping",
+               bike_id=trek.id, status=TicketStatus.IN_PROGRESS),
+        Ticket(ticket_number="T-EXP-002", problem_description="Brakes squeal", bike_id=giant.id),
+        Ticket(ticket_number="T-EXP-003", problem_description="Old job", bike_id=trek.id,
+               status=TicketStatus.DELIVERED, is_archived=True),
+    ])
+    db.commit()
+
+    first = db.query(Ticket).filter(Ticket.ticket_number == "T-EXP-001").first()
+    db.add(TicketPart(ticket_id=first.id, part_id=chain.id, quantity=1, price_charged=25.0))
+    db.commit()
+
+    yield db
+
+    # Teardown - drop all tables
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def client(test_db):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def admin_token(client: TestClient):
+    login_data = {
+        "username": "admin@example.com",
+        "password": "adminpassword",
+    }
+    response = client.post("/api/auth/login", data=login_data)
+    return response.json()["access_token"]
+
+
+@pytest.fixture()
+def tech_token(client: TestClient):
+    login_data = {
+        "username": "tech@example.com",
+        "password": "techpassword",
+    }
+    response = client.post("/api/auth/login", data=login_data)
+    return response.json()["access_token"]
+
+
+def test_export_tickets_csv(client: TestClient, admin_token: str):
+    response = client.get(
+        "/api/export/tickets",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="tickets.csv"' in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["ticket_number"] for row in rows] == ["T-EXP-001", "T-EXP-002", "T-EXP-003"]
+    assert rows[0]["status"] == "in_progress"
+
+
+def test_export_tickets_filters(client: TestClient, admin_token: str, test_db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    alice = test_db.query(Customer).filter(Customer.name == "Alice Johnson").first()
+
+    response = client.get(
+        f"/api/export/tickets?format=ndjson&customer_id={alice.id}&archived=false",
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["ticket_number"] for row in rows] == ["T-EXP-001"]
+
+    # The ticket list applies the same customer filter
+    response = client.get(f"/api/tickets/?customer_id={alice.id}", headers=headers)
+    assert [ticket["ticket_number"] for ticket in response.json()] == ["T-EXP-001"]
+
+
+def test_export_parts_and_customers(client: TestClient, admin_token: str):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.get("/api/export/parts?format=ndjson&low_stock=true", headers=headers)
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["sku"] for row in rows] == ["BP-1"]
+    assert rows[0]["is_low_stock"] is True
+
+    response = client.get("/api/export/customers?email=bob", headers=headers)
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == ["Bob Smith"]
+
+    response = client.get("/api/export/ticket_parts", headers=headers)
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["price_charged"] == "25.0"
+
+
+def test_export_empty_csv_has_header(client: TestClient, admin_token: str):
+    response = client.get(
+        "/api/export/customers?name=nobody",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    assert response.text.strip() == "id,name,email,phone,notes,created_at,updated_at"
+
+
+def test_export_requires_admin(client: TestClient, tech_token: str):
+    response = client.get(
+        "/api/export/tickets",
+        headers={"Authorization": f"Bearer {tech_token}"},
+    )
+    assert response.status_code == 403
@@ -1,3 +1,6 @@
+from datetime import datetime, timedelta
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -8,6 +11,13 @@ from app.db.database import Base, get_db
 from app.core.security import get_password_hash
 from app.models.user import User, UserRole
 from app.models.part import Part
+from app.models.part_usage import PartUsageDaily, PartUsagePending
+from app.models.stock_movement import MovementKind, StockMovement, StockSnapshot
+from app.services import events, part_import
+from app.services.forecast import smooth_demand
+from app.services.low_stock import low_stock_watcher
+from app.services.parts_catalog import parts_catalog
+from app.services.stock_ledger import compact_movements, stock_at, take_snapshots
 from main import app
 
 
@@ -90,10 +100,14 @@ def test_db():
     db.add(tech_user)
     db.add(test_part)
     db.commit()
+    parts_catalog.reset()
+    low_stock_watcher.reset()
 
     yield db
 
     # Teardown - drop all tables
+    parts_catalog.reset()
+    low_stock_watcher.reset()
     Base.metadata.drop_all(bind=engine)
 
 
@@ -210,6 +224,13 @@ def test_delete_part(client: TestClient, admin_token: str, test_db: pytest.fixtu
     test_db.add(part)
     test_db.commit()
     test_db.refresh(part)
+    now = datetime.utcnow()
+    test_db.add_all([
+        StockMovement(part_id=part.id, kind=MovementKind.ADJUST, quantity_change=10, occurred_at=now),
+        StockSnapshot(part_id=part.id, quantity=10, taken_at=now),
+        PartUsageDaily(part_id=part.id, day=now.date(), quantity=1, revenue=10.0, cost=5.0),
+    ])
+    test_db.commit()
     
     response = client.delete(
         f"/api/parts/{part.id}",
@@ -217,6 +238,10 @@ def test_delete_part(client: TestClient, admin_token: str, test_db: pytest.fixtu
     )
     assert response.status_code == 200
     
+    # Its ledger and rollups go with it
+    for model in (StockMovement, StockSnapshot, PartUsageDaily):
+        assert test_db.query(model).filter(model.part_id == part.id).count() == 0
+    
     # Verify part is deleted
     response = client.get(
         f"/api/parts/{part.id}",
@@ -225,6 +250,44 @@ def test_delete_part(client: TestClient, admin_token: str, test_db: pytest.fixtu
     assert response.status_code == 404
 
 
+def test_delete_part_used_in_tickets(client: TestClient, admin_token: str, test_db, test_part):
+    from sqlalchemy import event
+    from app.core import integrity
+    from app.models.bike import Bike
+    from app.models.ticket import Ticket
+    from app.models.ticket_part import TicketPart
+
+    bike = Bike(name="Test Bike")
+    test_db.add(bike)
+    test_db.flush()
+    ticket = Ticket(ticket_number="T-1", problem_description="Worn chain", bike_id=bike.id)
+    test_db.add(ticket)
+    test_db.flush()
+    test_db.add_all([
+        TicketPart(ticket_id=ticket.id, part_id=test_part.id, quantity=1, price_charged=1.0)
+        for _ in range(5)
+    ])
+    test_db.commit()
+
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    original_cap = integrity.MAX_COUNTED
+    integrity.MAX_COUNTED = 3
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.delete(f"/api/parts/{test_part.id}", headers={"Authorization": f"Bearer {admin_token}"})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        integrity.MAX_COUNTED = original_cap
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot delete part that is used in tickets (3+ ticket parts)"
+    # The line items are counted in SQL, never loaded
+    assert not any(statement.lstrip().startswith("SELECT ticket_parts.id") for statement in statements)
+
+
 def test_search_parts(client: TestClient, tech_token: str, test_part):
     response = client.get(
         "/api/parts/search/?search_term=Test",
@@ -236,6 +299,88 @@ def test_search_parts(client: TestClient, tech_token: str, test_part):
     assert any(part["id"] == test_part.id for part in content)
 
 
+def test_search_parts_ranking_and_pagination(client: TestClient, tech_token: str, test_db):
+    test_db.add_all([
+        Part(name="Chain Lube", category="Maintenance", sku="LUBE-CH", cost_price=3.0, retail_price=8.0),
+        Part(name="KMC 11 Speed Chain", category="Drivetrain", sku="KMC-X11", cost_price=20.0, retail_price=40.0),
+        Part(name="Chainring 34T", category="Drivetrain", sku="CH-34", cost_price=25.0, retail_price=50.0),
+        Part(name="Brake Pads", category="Brakes", sku="CH", cost_price=5.0, retail_price=15.0),
+    ])
+    test_db.commit()
+    headers = {"Authorization": f"Bearer {tech_token}"}
+
+    response = client.get("/api/parts/search/?search_term=ch", headers=headers)
+    assert response.status_code == 200
+    names = [part["name"] for part in response.json()]
+    # Exact SKU, then SKU prefix, then name prefix, then other matches
+    assert names[:2] == ["Brake Pads", "Chainring 34T"]
+    assert names[2] == "Chain Lube"
+    assert names[3] == "KMC 11 Speed Chain"
+
+    response = client.get("/api/parts/search/?search_term=ch&skip=1&limit=2", headers=headers)
+    assert [part["name"] for part in response.json()] == ["Chainring 34T", "Chain Lube"]
+
+    # All words must match
+    response = client.get("/api/parts/search/?search_term=chain drive", headers=headers)
+    assert {part["name"] for part in response.json()} == {"KMC 11 Speed Chain", "Chainring 34T"}
+
+    response = client.get("/api/parts/search/?search_term=%25%25", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_lookup_parts(client: TestClient, admin_token: str, test_db, test_part):
+    test_db.add_all([
+        Part(name="Chain Lube", category="Maintenance", sku="LUBE-CH", cost_price=3.0, retail_price=8.0),
+        Part(name="Chainring 34T", category="Drivetrain", sku="CR-34", cost_price=25.0, retail_price=50.0),
+    ])
+    test_db.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.get("/api/parts/lookup?q=chain", headers=headers)
+    assert response.status_code == 200
+    assert [part["name"] for part in response.json()] == ["Chain Lube", "Chainring 34T"]
+
+    response = client.get("/api/parts/lookup?sku=cr-34", headers=headers)
+    assert [part["name"] for part in response.json()] == ["Chainring 34T"]
+
+    response = client.get("/api/parts/lookup?q=ch&category=drivetrain", headers=headers)
+    assert [part["name"] for part in response.json()] == ["Chainring 34T"]
+
+    # The catalog follows creates, updates, stock changes and deletes
+    response = client.post(
+        "/api/parts/",
+        headers=headers,
+        json={"name": "Chain Checker", "sku": "CC-1", "cost_price": 5.0, "retail_price": 12.0},
+    )
+    checker_id = response.json()["id"]
+    response = client.put(
+        f"/api/parts/{test_part.id}",
+        headers=headers,
+        json={"name": "Chain Tool"},
+    )
+    assert response.status_code == 200
+    response = client.put(
+        f"/api/parts/{test_part.id}/adjust-stock?quantity_change=5",
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/parts/lookup?q=chain", headers=headers)
+    content = response.json()
+    assert [part["name"] for part in content] == [
+        "Chain Checker", "Chain Lube", "Chain Tool", "Chainring 34T"
+    ]
+    assert content[2]["quantity"] == 15
+    response = client.get("/api/parts/lookup?q=part", headers=headers)
+    assert response.json() == []
+
+    response = client.delete(f"/api/parts/{checker_id}", headers=headers)
+    assert response.status_code == 200
+    response = client.get("/api/parts/lookup?sku=CC-1", headers=headers)
+    assert response.json() == []
+
+
 def test_adjust_stock(client: TestClient, tech_token: str, test_part):
     initial_quantity = test_part.quantity
     
@@ -289,4 +434,354 @@ def test_get_low_stock_parts(client: TestClient, tech_token: str, test_db):
     assert response.status_code == 200
     content = response.json()
     assert len(content) >= 1
-    assert any(part["id"] == low_stock_part.id for part in content)
\ No newline at end of file
+    assert any(part["id"] == low_stock_part.id for part in content)
+
+def test_low_stock_flag_maintained(client: TestClient, tech_token: str, test_db, test_part):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+    changes = []
+    
+    def record(part, is_low_stock, **_):
+        changes.append((part.id, is_low_stock))
+    
+    events.subscribe(events.LOW_STOCK_CHANGED, record)
+    try:
+        # 10 on hand, reorder point 5
+        assert test_part.is_low_stock is False
+        
+        response = client.put(
+            f"/api/parts/{test_part.id}/adjust-stock?quantity_change=-5",
+            headers=headers,
+        )
+        assert response.json()["is_low_stock"] is True
+        response = client.get("/api/parts/low-stock/", headers=headers)
+        assert [part["id"] for part in response.json()] == [test_part.id]
+        
+        # Staying low doesn't publish again
+        client.put(f"/api/parts/{test_part.id}/adjust-stock?quantity_change=-1", headers=headers)
+        
+        response = client.post(
+            "/api/parts/receive",
+            headers=headers,
+            json={"lines": [{"part_id": test_part.id, "quantity": 10}]},
+        )
+        response = client.get("/api/parts/?low_stock=true", headers=headers)
+        assert response.json() == []
+        
+        # Raising the reorder point counts as well
+        response = client.put(
+            f"/api/parts/{test_part.id}",
+            headers=headers,
+            json={"reorder_point": 20},
+        )
+        assert response.json()["is_low_stock"] is True
+    finally:
+        events.unsubscribe(events.LOW_STOCK_CHANGED, record)
+    
+    assert changes == [(test_part.id, True), (test_part.id, False), (test_part.id, True)]
+
+
+def test_bulk_import_publishes_low_stock_changes(client: TestClient, admin_token: str, test_db, test_part):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    changes = []
+    
+    def record(part, is_low_stock, **_):
+        changes.append((part.sku, is_low_stock))
+    
+    def import_csv(csv_data):
+        response = client.post(
+            "/api/parts/import", headers=headers, files={"file": ("prices.csv", csv_data, "text/csv")}
+        )
+        assert response.status_code == 200
+    
+    header = "sku,name,quantity,reorder_point,cost_price,retail_price\n"
+    events.subscribe(events.LOW_STOCK_CHANGED, record)
+    try:
+        # 10 on hand: raising the reorder point to 20 makes it low; a new part arrives low
+        import_csv(header + "TEST123,Test Part,0,20,10.00,20.00\nNEW-LOW,Spoke,1,2,0.10,0.50\nNEW-OK,Rim,9,2,10.00,30.00\n")
+        assert sorted(changes) == [("NEW-LOW", True), ("TEST123", True)]
+        
+        # Only flips publish
+        changes.clear()
+        import_csv(header + "TEST123,Test Part,0,5,10.00,20.00\nNEW-LOW,Spoke,1,3,0.10,0.50\n")
+        assert changes == [("TEST123", False)]
+    finally:
+        events.unsubscribe(events.LOW_STOCK_CHANGED, record)
+    
+    response = client.get("/api/parts/low-stock/", headers=headers)
+    assert [part["sku"] for part in response.json()] == ["NEW-LOW"]
+
+
+def test_adjust_stock_version_conflict(client: TestClient, tech_token: str, test_part):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+    
+    response = client.get(f"/api/parts/{test_part.id}", headers=headers)
+    etag = response.headers["ETag"]
+    
+    response = client.put(
+        f"/api/parts/{test_part.id}/adjust-stock?quantity_change=1",
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 200
+    
+    # A stale version is rejected instead of silently overwriting
+    response = client.put(
+        f"/api/parts/{test_part.id}",
+        headers={**headers, "If-Match": etag},
+        json={"quantity": 0},
+    )
+    assert response.status_code == 409
+    
+    response = client.get(f"/api/parts/{test_part.id}", headers=headers)
+    assert response.json()["quantity"] == test_part.quantity + 1
+
+
+def test_receive_parts(client: TestClient, tech_token: str, test_db, test_part):
+    other = Part(name="Brake Cable", sku="CABLE-1", quantity=0, cost_price=2.0, retail_price=6.0)
+    test_db.add(other)
+    test_db.commit()
+    
+    response = client.post(
+        "/api/parts/receive",
+        headers={"Authorization": f"Bearer {tech_token}"},
+        json={"lines": [
+            {"sku": "TEST123", "quantity": 5},
+            {"part_id": other.id, "quantity": 20, "cost_price": 2.5},
+            {"sku": "NOPE", "quantity": 1},
+            {"sku": "test123", "part_id": other.id, "quantity": 1},
+            {"part_id": test_part.id, "quantity": 3},
+        ]},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["received_lines"] == 3
+    assert content["failed_lines"] == 2
+    results = content["results"]
+    assert results[0]["part_id"] == test_part.id
+    assert results[0]["quantity"] == test_part.quantity + 8
+    assert results[1]["quantity"] == 20
+    assert results[2]["error"] == "Part not found"
+    assert results[3]["error"] == "SKU does not match part"
+    assert results[3]["received"] == 0
+    
+    response = client.get(f"/api/parts/{other.id}", headers={"Authorization": f"Bearer {tech_token}"})
+    assert response.json()["quantity"] == 20
+    assert response.json()["cost_price"] == 2.5
+    assert response.json()["version"] == 2
+    
+    # Lines must receive a positive quantity
+    response = client.post(
+        "/api/parts/receive",
+        headers={"Authorization": f"Bearer {tech_token}"},
+        json={"lines": [{"sku": "TEST123", "quantity": 0}]},
+    )
+    assert response.status_code == 422
+
+
+def test_stock_ledger_history(client: TestClient, tech_token: str, test_db, test_part):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+    
+    # The initial 10 units were recorded when the part was created
+    response = client.get(f"/api/parts/{test_part.id}/movements", headers=headers)
+    assert [(m["kind"], m["quantity_change"]) for m in response.json()] == [("adjust", 10)]
+    
+    client.post(
+        "/api/parts/receive",
+        headers=headers,
+        json={"lines": [{"part_id": test_part.id, "quantity": 6}]},
+    )
+    before_adjust = datetime.utcnow()
+    client.put(f"/api/parts/{test_part.id}/adjust-stock?quantity_change=-4", headers=headers)
+    client.put(f"/api/parts/{test_part.id}", headers=headers, json={"quantity": 20})
+    
+    response = client.get(f"/api/parts/{test_part.id}/movements", headers=headers)
+    assert [(m["kind"], m["quantity_change"]) for m in response.json()] == [
+        ("adjust", 8), ("adjust", -4), ("receive", 6), ("adjust", 10)
+    ]
+    
+    response = client.get(
+        f"/api/parts/{test_part.id}/stock-at",
+        headers=headers,
+        params={"at": before_adjust.isoformat()},
+    )
+    assert response.status_code == 200
+    assert response.json()["quantity"] == 16
+    
+    # Compaction rolls old movements into a snapshot without changing history
+    result = compact_movements(test_db, before=before_adjust)
+    assert result.snapshots_taken == 1
+    assert result.movements_removed == 2
+    assert stock_at(test_db, test_part.id, before_adjust) == 16
+    assert stock_at(test_db, test_part.id, datetime.utcnow()) == 20
+    
+    assert take_snapshots(test_db) == 1
+    assert take_snapshots(test_db) == 0
+    assert stock_at(test_db, test_part.id, datetime.utcnow()) == 20
+    
+    response = client.get(f"/api/parts/{test_part.id}/movements", headers=headers)
+    assert len(response.json()) == 2
+
+
+def test_import_parts(client: TestClient, admin_token: str, tech_token: str, test_db, test_part):
+    csv_data = (
+        "SKU,Name,Category,Quantity,Reorder_Point,Cost_Price,Retail_Price,Supplier\n"
+        "TEST123,Test Part v2,Test Category,999,5,11.00,22.00,Acme\n"
+        "NEW-1,New Cable,Cables,3,5,1.00,4.00,Acme\n"
+        "NEW-2,New Housing,Cables,,,2.00,5.00,Acme\n"
+        "NEW-3,Bad Price,Cables,1,0,abc,5.00,Acme\n"
+        ",No SKU,Cables,1,0,1.00,5.00,Acme\n"
+        "NEW-1,New Cable (repeat),Cables,3,5,1.50,4.00,Acme\n"
+    )
+    response = client.post(
+        "/api/parts/import?chunk_size=2",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        files={"file": ("prices.csv", csv_data, "text/csv")},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["rows_read"] == 6
+    assert result["failed"] == 2
+    assert [error["row"] for error in result["errors"]] == [5, 6]
+    assert result["errors"][0]["sku"] == "NEW-3"
+    assert "cost_price" in result["errors"][0]["error"]
+    assert result["created"] == 2
+    assert result["updated"] == 2  # TEST123, then NEW-1 again in a later chunk
+    
+    test_db.expire_all()
+    existing = test_db.query(Part).filter(Part.sku == "TEST123").one()
+    assert existing.name == "Test Part v2"
+    assert existing.retail_price == 22.00
+    assert existing.quantity == 10  # Stock isn't overwritten by a price list
+    
+    cable = test_db.query(Part).filter(Part.sku == "NEW-1").one()
+    assert cable.name == "New Cable (repeat)"
+    assert cable.quantity == 3
+    assert cable.is_low_stock is True
+    
+    response = client.get(
+        f"/api/parts/{cable.id}/movements",
+        headers={"Authorization": f"Bearer {tech_token}"},
+    )
+    assert [(m["kind"], m["quantity_change"]) for m in response.json()] == [("adjust", 3)]
+    
+    # Only admins can import, and only CSV files
+    response = client.post(
+        "/api/parts/import",
+        headers={"Authorization": f"Bearer {tech_token}"},
+        files={"file": ("prices.csv", csv_data, "text/csv")},
+    )
+    assert response.status_code == 403
+    response = client.post(
+        "/api/parts/import",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        files={"file": ("prices.xlsx", b"PK\x03\x04", "application/octet-stream")},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("upsert", [True, False])
+def test_import_parts_repeated_sku_in_chunk(client: TestClient, admin_token: str, test_db, test_part, monkeypatch, upsert):
+    if not upsert:
+        # Databases without ON CONFLICT take the select-then-write path
+        monkeypatch.setattr(part_import, "_upsert_statement", lambda db: None)
+    csv_data = (
+        "SKU,Name,Quantity,Reorder_Point,Cost_Price,Retail_Price\n"
+        "NEW-1,New Cable,3,5,1.00,4.00\n"
+        "TEST123,Test Part v2,999,12,11.00,22.00\n"
+        "NEW-1,New Cable (repeat),4,1,1.50,4.00\n"
+    )
+    response = client.post(
+        "/api/parts/import",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        files={"file": ("prices.csv", csv_data, "text/csv")},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["rows_read"] == 3
+    assert result["created"] == 1
+    assert result["updated"] == 2  # TEST123, and the superseded NEW-1 row
+    assert result["created"] + result["updated"] + result["failed"] == result["rows_read"]
+
+    test_db.expire_all()
+    existing = test_db.query(Part).filter(Part.sku == "TEST123").one()
+    assert existing.name == "Test Part v2"
+    assert existing.quantity == 10
+    assert existing.is_low_stock is True
+    assert existing.version == 2
+    cable = test_db.query(Part).filter(Part.sku == "NEW-1").one()
+    assert cable.name == "New Cable (repeat)"
+    assert cable.quantity == 4
+    assert cable.is_low_stock is False
+
+
+def test_reorder_forecast(client: TestClient, admin_token: str, tech_token: str, test_db, test_part):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    idle = Part(name="Idle Part", sku="IDLE-1", quantity=5, reorder_point=3, cost_price=1.0, retail_price=2.0)
+    test_db.add(idle)
+    test_db.commit()
+    
+    # Two units a day, every day of the window
+    today = datetime.utcnow().date()
+    test_db.add_all([
+        PartUsageDaily(part_id=test_part.id, day=today - timedelta(days=offset),
+                       quantity=2, revenue=40.0, cost=20.0)
+        for offset in range(1, 91)
+    ])
+    test_db.commit()
+    
+    # A day queued for the rollups is left for the next refresh by a read-only forecast
+    test_db.add(PartUsagePending(day=today))
+    test_db.commit()
+    
+    response = client.get("/api/parts/reorder-forecast", headers=headers)
+    assert response.status_code == 200
+    assert test_db.query(PartUsagePending).count() == 1
+    content = response.json()
+    assert content["parts_forecast"] == 1
+    assert content["parts_changed"] == 1
+    assert content["applied"] is False
+    proposal = content["proposals"][0]
+    assert proposal["sku"] == "TEST123"
+    assert proposal["daily_demand"] == 2.0
+    assert proposal["proposed_reorder_point"] == 14  # 2/day over the default 7-day lead time
+    assert proposal["proposed_min_stock"] == 0       # No variation, no safety stock
+    
+    # A part's own lead time wins over the default
+    test_part.lead_time_days = 10
+    test_db.commit()
+    changes = []
+    
+    def record(part, is_low_stock, **_):
+        changes.append((part.id, is_low_stock))
+    
+    events.subscribe(events.LOW_STOCK_CHANGED, record)
+    try:
+        response = client.post("/api/parts/reorder-forecast", headers=headers)
+    finally:
+        events.unsubscribe(events.LOW_STOCK_CHANGED, record)
+    assert response.status_code == 200
+    assert response.json()["applied"] is True
+    assert changes == [(test_part.id, True)]
+    assert test_db.query(PartUsagePending).count() == 0
+    
+    test_db.expire_all()
+    part = test_db.query(Part).filter(Part.id == test_part.id).one()
+    assert part.reorder_point == 20
+    assert part.is_low_stock is True  # 10 in stock is now below the reorder point
+    idle = test_db.query(Part).filter(Part.sku == "IDLE-1").one()
+    assert idle.reorder_point == 3  # No demand, levels left alone
+    
+    response = client.post("/api/parts/reorder-forecast", headers={"Authorization": f"Bearer {tech_token}"})
+    assert response.status_code == 403
+
+
+def test_smooth_demand_weights_recent_days():
+    demand = np.array([
+        [5.0, 5.0, 5.0, 5.0],
+        [0.0, 0.0, 0.0, 8.0],
+        [8.0, 0.0, 0.0, 0.0],
+    ])
+    mean, std = smooth_demand(demand, alpha=0.5)
+    assert mean[0] == pytest.approx(5.0)
+    assert std[0] == pytest.approx(0.0)
+    # The same spike counts for more on the latest day than the earliest
+    assert mean[1] > mean[2]
@@ -0,0 +1,266 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_db
+from app.core.security import get_password_hash
+from app.models.user import User, UserRole
+from app.models.customer import Customer
+from app.models.bike import Bike
+from app.models.ticket import Ticket, TicketStatus, TicketPriority
+from app.services import scheduling
+from app.services.scheduling import bench_schedule
+from main import app
+
+
+# Setup test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine
+)
+
+MONDAY = date(2026, 10, 19)
+TUESDAY = MONDAY + timedelta(days=1)
+WEDNESDAY = MONDAY + timedelta(days=2)
+SATURDAY = MONDAY + timedelta(days=5)
+
+
+# Dependency override
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_and_teardown_db_override():
+    # Setup: Override the dependency
+    original_get_db = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+
+    yield
+
+    # Teardown: Restore original dependency if it existed
+    if original_get_db:
+        app.dependency_overrides[get_db] = original_get_db
+    else:
+        del app.dependency_overrides[get_db]
+
+
+@pytest.fixture()
+def test_db(monkeypatch):
+    # Create the database and tables
+    Base.metadata.create_all(bind=engine)
+    bench_schedule.reset()
+    # Pin "today" to a Monday so bench capacity is predictable
+    monkeypatch.setattr(scheduling, "_today", lambda: MONDAY)
+
+    db = TestingSessionLocal()
+
+    admin_user = User(
+        email="admin@example.com",
+        username="admin",
+        full_name="Admin User",
+        hashed_password=get_password_hash("adminpassword"),
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    full_timer = User(
+        email="tech@example.com",
+        username="technician",
+        hashed_password=get_password_hash("techpassword"),
+        role=UserRole.TECHNICIAN,
+        is_active=True
+    )
+    part_timer = User(
+        email="parttime@example.com",
+        username="parttime",
+        hashed_password=get_password_hash("techpassword"),
+        role=UserRole.TECHNICIAN,
+        is_active=True,
+        bench_hours=4.0
+    )
+    customer = Customer(name="Schedule Customer", email="schedule@example.com")
+    db.add_all([admin_user, full_timer, part_timer, customer])
+    db.commit()
+
+    bike = Bike(name="Schedule Bike", owner_id=customer.id)
+    db.add(bike)
+    db.commit()
+
+    yield db
+
+    # Teardown - drop all tables
+    db.close()
+    bench_schedule.reset()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def client(test_db):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def admin_token(client: TestClient):
+    login_data = {
+        "username": "admin@example.com",
+        "password": "adminpassword",
+    }
+    response = client.post("/api/auth/login", data=login_data)
+    return response.json()["access_token"]
+
+
+@pytest.fixture
+def booked_tickets(test_db):
+    """Six hours due Monday and eight due Tuesday for the full-timer, two unscheduled hours for nobody"""
+    technician = test_db.query(User).filter(User.username == "technician").first()
+    bike = test_db.query(Bike).first()
+    tickets = [
+        Ticket(ticket_number="T-S1", problem_description="Overhaul", status=TicketStatus.IN_PROGRESS,
+               priority=TicketPriority.MEDIUM, bike_id=bike.id, technician_id=technician.id,
+               estimated_hours=6.0, estimated_completion=datetime(2026, 10, 19, 17, 0)),
+        Ticket(ticket_number="T-S2", problem_description="Rebuild fork", status=TicketStatus.DIAGNOSIS,
+               priority=TicketPriority.MEDIUM, bike_id=bike.id, technician_id=technician.id,
+               estimated_hours=8.0, estimated_completion=datetime(2026, 10, 20, 12, 0)),
+        Ticket(ticket_number="T-S3", problem_description="Tune-up", status=TicketStatus.INTAKE,
+               priority=TicketPriority.LOW, bike_id=bike.id, estimated_hours=2.0),
+        # Closed work doesn't book the bench
+        Ticket(ticket_number="T-S4", problem_description="Flat tire", status=TicketStatus.COMPLETE,
+               priority=TicketPriority.LOW, bike_id=bike.id, technician_id=technician.id,
+               estimated_hours=5.0, estimated_completion=datetime(2026, 10, 19, 12, 0)),
+    ]
+    test_db.add_all(tickets)
+    test_db.commit()
+    return technician, tickets
+
+
+def test_day_availability(client, admin_token, booked_tickets):
+    technician, _ = booked_tickets
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.get(f"/api/schedule/days/{MONDAY}", params={"technician_id": technician.id}, headers=headers)
+    assert response.status_code == 200
+    monday = response.json()
+    assert monday["workday"] is True
+    assert monday["capacity_hours"] == 8.0
+    assert monday["booked_hours"] == 6.0
+    # Tuesday's eight hours can start early, but only Monday's two spare hours are free for it
+    assert monday["available_hours"] == 2.0
+    assert monday["full"] is False
+
+    response = client.get(
+        "/api/schedule/days", params={"technician_id": technician.id, "days": 7}, headers=headers
+    )
+    assert response.status_code == 200
+    days = response.json()
+    assert [day["date"] for day in days] == [str(MONDAY + timedelta(days=i)) for i in range(7)]
+    assert [day["available_hours"] for day in days[:3]] == [2.0, 2.0, 10.0]
+    saturday = days[5]
+    assert saturday["date"] == str(SATURDAY)
+    assert saturday["workday"] is False
+    assert saturday["full"] is True
+
+    # The whole shop has both benches and also books the unscheduled ticket today
+    response = client.get(f"/api/schedule/days/{MONDAY}", headers=headers)
+    shop = response.json()
+    assert shop["capacity_hours"] == 12.0
+    assert shop["booked_hours"] == 8.0
+    assert shop["available_hours"] == 4.0
+
+    # Past days can't take more work
+    response = client.get(f"/api/schedule/days/{MONDAY - timedelta(days=3)}", headers=headers)
+    assert response.json()["full"] is True
+
+    response = client.get("/api/schedule/days", params={"technician_id": 9999}, headers=headers)
+    assert response.status_code == 404
+
+
+def test_earliest_completion(client, admin_token, booked_tickets):
+    technician, _ = booked_tickets
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    def quote(hours, **params):
+        response = client.get(
+            "/api/schedule/earliest-completion", params={"hours": hours, **params}, headers=headers
+        )
+        assert response.status_code == 200
+        return response.json()["earliest_completion"]
+
+    assert quote(2, technician_id=technician.id) == str(MONDAY)
+    assert quote(3, technician_id=technician.id) == str(WEDNESDAY)
+    # Past the week's spare 26 hours runs into the next week, skipping the weekend
+    assert quote(26, technician_id=technician.id) == str(MONDAY + timedelta(days=4))
+    assert quote(30, technician_id=technician.id) == str(MONDAY + timedelta(days=7))
+    assert quote(4, technician_id=technician.id, start=str(WEDNESDAY)) == str(WEDNESDAY)
+
+    part_timer = client.get("/api/users/", headers=headers).json()
+    part_timer = next(user for user in part_timer if user["username"] == "parttime")
+    assert quote(6, technician_id=part_timer["id"]) == str(TUESDAY)
+    # The shop has four hours left on Monday across both benches
+    assert quote(4) == str(MONDAY)
+    assert quote(5) == str(TUESDAY)
+
+
+def test_schedule_follows_ticket_and_user_changes(client, admin_token, booked_tickets):
+    technician, tickets = booked_tickets
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    def day(when):
+        response = client.get(
+            f"/api/schedule/days/{when}", params={"technician_id": technician.id}, headers=headers
+        )
+        return response.json()
+
+    def monday():
+        return day(MONDAY)
+
+    assert monday()["available_hours"] == 2.0
+
+    # Assigning the unscheduled ticket for Tuesday fills Monday and Tuesday
+    response = client.put(
+        f"/api/tickets/{tickets[2].id}",
+        json={"technician_id": technician.id, "estimated_completion": "2026-10-20T17:00:00"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert monday()["full"] is True
+    response = client.get(
+        "/api/schedule/earliest-completion",
+        params={"hours": 1, "technician_id": technician.id},
+        headers=headers,
+    )
+    assert response.json()["earliest_completion"] == str(WEDNESDAY)
+
+    # Finishing Monday's job frees its hours
+    response = client.put(
+        f"/api/tickets/{tickets[0].id}", json={"status": TicketStatus.COMPLETE.value}, headers=headers
+    )
+    assert response.status_code == 200
+    assert monday()["booked_hours"] == 0.0
+    assert monday()["available_hours"] == 6.0
+
+    # A longer bench day adds capacity
+    response = client.put(f"/api/users/{technician.id}", json={"bench_hours": 10}, headers=headers)
+    assert response.status_code == 200
+    assert monday()["capacity_hours"] == 10.0
+    assert monday()["available_hours"] == 10.0
+
+    # Deleting a ticket drops its booking
+    assert day(TUESDAY)["available_hours"] == 10.0
+    response = client.delete(f"/api/tickets/{tickets[1].id}", headers=headers)
+    assert response.status_code == 204
+    assert day(TUESDAY)["booked_hours"] == 2.0
+    assert day(TUESDAY)["available_hours"] == 18.0
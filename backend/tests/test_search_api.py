@@ -0,0 +1,164 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_db
+from app.core.security import get_password_hash
+from app.models.user import User, UserRole
+from app.models.customer import Customer
+from app.models.bike import Bike
+from app.models.ticket import Ticket, TicketStatus
+from app.models.ticket_update import TicketUpdate
+from main import app
+
+
+# Setup test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"  # Use in-memory database for tests
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine
+)
+
+
+# Dependency override
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_and_teardown_db_override():
+    # Setup: Override the dependency
+    original_get_db = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+
+    yield
+
+    # Teardown: Restore original dependency if it existed
+    if original_get_db:
+        app.dependency_overrides[get_db] = original_get_db
+    else:
+        del app.dependency_overrides[get_db]
+
+
+@pytest.fixture()
+def test_db():
+    # Create the database and tables (including the full-text indexes)
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    tech_user = User(
+        email="tech@example.com",
+        username="technician",
+        full_name="Tech User",
+        hashed_password=get_password_hash("techpassword"),
+        role=UserRole.TECHNICIAN,
+        is_active=True
+    )
+    alice = Customer(name="Alice Johnson", email="alice@example.com", phone="555-0101")
+    bob = Customer(name="Bob Smith", email="bob@example.com", phone="555-0202")
+    db.add_all([tech_user, alice, bob])
+    db.commit()
+
+    trek = Bike(name="Trek Fuel EX", specs="Carbon frame, Fox suspension", owner_id=alice.id)
+    giant = Bike(name="Giant Defy", specs="Road, hydraulic disc brakes", owner_id=bob.id)
+    db.add_all([trek, giant])
+    db.commit()
+
+    brakes = Ticket(ticket_number="T-SEARCH-001", problem_description="Squealing hydraulic brakes",
+                    bike_id=giant.id)
+    fork = Ticket(ticket_number="T-SEARCH-002", problem_description="Fork feels sticky",
+                  diagnosis="Suspension seals worn", bike_id=trek.id)
+    db.add_all([brakes, fork])
+    db.commit()
+
+    db.add(TicketUpdate(ticket_id=fork.id, user_id=tech_user.id, new_status=TicketStatus.IN_PROGRESS,
+                        note="Ordered lowers rebuild kit"))
+    db.commit()
+
+    yield db
+
+    # Teardown - drop all tables
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def client(test_db):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def tech_token(client: TestClient):
+    login_data = {
+        "username": "tech@example.com",
+        "password": "techpassword",
+    }
+    response = client.post("/api/auth/login", data=login_data)
+    return response.json()["access_token"]
+
+
+def test_search_groups_results(client: TestClient, tech_token: str):
+    response = client.get(
+        "/api/search/?q=hydraulic",
+        headers={"Authorization": f"Bearer {tech_token}"},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [hit["title"] for hit in content["tickets"]] == ["T-SEARCH-001"]
+    assert [hit["title"] for hit in content["bikes"]] == ["Giant Defy"]
+    assert content["customers"] == []
+    assert "[hydraulic]" in content["tickets"][0]["snippet"].lower()
+
+
+def test_search_prefix_and_all_terms(client: TestClient, tech_token: str):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+
+    response = client.get("/api/search/?q=alic john", headers=headers)
+    assert [hit["title"] for hit in response.json()["customers"]] == ["Alice Johnson"]
+
+    # Every term must match
+    response = client.get("/api/search/?q=alice smith", headers=headers)
+    assert response.json()["customers"] == []
+
+    # Query syntax in user input is treated as plain words
+    response = client.get('/api/search/?q="suspension" OR (', headers=headers)
+    assert response.status_code == 200
+
+
+def test_search_ticket_notes(client: TestClient, tech_token: str, test_db):
+    headers = {"Authorization": f"Bearer {tech_token}"}
+
+    response = client.get("/api/search/?q=rebuild kit", headers=headers)
+    assert [hit["title"] for hit in response.json()["tickets"]] == ["T-SEARCH-002"]
+
+    # Index follows updates and deletes
+    ticket = test_db.query(Ticket).filter(Ticket.ticket_number == "T-SEARCH-001").first()
+    ticket.diagnosis = "Contaminated rotor"
+    test_db.commit()
+    response = client.get("/api/search/?q=rotor", headers=headers)
+    assert [hit["title"] for hit in response.json()["tickets"]] == ["T-SEARCH-001"]
+
+    customer = test_db.query(Customer).filter(Customer.name == "Bob Smith").first()
+    customer.name = "Robert Smith"
+    test_db.commit()
+    response = client.get("/api/search/?q=bob", headers=headers)
+    # Still matched through the unchanged email
+    assert [hit["title"] for hit in response.json()["customers"]] == ["Robert Smith"]
+    response = client.get("/api/search/?q=robert", headers=headers)
+    assert [hit["title"] for hit in response.json()["customers"]] == ["Robert Smith"]
+
+
+def test_search_requires_query(client: TestClient, tech_token: str):
+    response = client.get("/api/search/", headers={"Authorization": f"Bearer {tech_token}"})
+    assert response.status_code == 422
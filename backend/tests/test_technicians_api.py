@@ -0,0 +1,306 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_db
+from app.core.security import get_password_hash
+from app.models.user import User, UserRole
+from app.models.customer import Customer
+from app.models.bike import Bike
+from app.models.ticket import Ticket, TicketStatus, TicketPriority
+from app.services.assignment import workload_tracker
+from app.services.work_queue import MAX_STALE_FRACTION, WorkQueueIndex, work_queue_index
+from main import app
+
+
+# Setup test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"  # Use in-memory database for tests
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine
+)
+
+
+# Dependency override
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_and_teardown_db_override():
+    # Setup: Override the dependency
+    original_get_db = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+
+    yield
+
+    # Teardown: Restore original dependency if it existed
+    if original_get_db:
+        app.dependency_overrides[get_db] = original_get_db
+    else:
+        del app.dependency_overrides[get_db]
+
+
+@pytest.fixture()
+def test_db():
+    # Create the database and tables
+    Base.metadata.create_all(bind=engine)
+    work_queue_index.reset()
+    workload_tracker.reset()
+
+    db = TestingSessionLocal()
+
+    admin_user = User(
+        email="admin@example.com",
+        username="admin",
+        full_name="Admin User",
+        hashed_password=get_password_hash("adminpassword"),
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    tech_user = User(
+        email="tech@example.com",
+        username="technician",
+        full_name="Tech User",
+        hashed_password=get_password_hash("techpassword"),
+        role=UserRole.TECHNICIAN,
+        is_active=True
+    )
+    customer = Customer(name="Queue Customer", email="queue@example.com")
+    db.add_all([admin_user, tech_user, customer])
+    db.commit()
+
+    bike = Bike(name="Queue Bike", owner_id=customer.id)
+    db.add(bike)
+    db.commit()
+
+    yield db
+
+    # Teardown - drop all tables
+    db.close()
+    work_queue_index.reset()
+    workload_tracker.reset()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def client(test_db):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def admin_token(client: TestClient):
+    login_data = {
+        "username": "admin@example.com",
+        "password": "adminpassword",
+    }
+    response = client.post("/api/auth/login", data=login_data)
+    return response.json()["access_token"]
+
+
+@pytest.fixture()
+def tech_token(client: TestClient):
+    login_data = {
+        "username": "tech@example.com",
+        "password": "techpassword",
+    }
+    response = client.post("/api/auth/login", data=login_data)
+    return response.json()["access_token"]
+
+
+@pytest.fixture
+def tech_user(test_db):
+    return test_db.query(User).filter(User.username == "technician").first()
+
+
+@pytest.fixture
+def queue_tickets(test_db, tech_user):
+    bike = test_db.query(Bike).first()
+    tickets = [
+        Ticket(ticket_number="Q-LOW", problem_description="Low", priority=TicketPriority.LOW,
+               status=TicketStatus.IN_PROGRESS, bike_id=bike.id, technician_id=tech_user.id),
+        Ticket(ticket_number="Q-URGENT", problem_description="Urgent", priority=TicketPriority.URGENT,
+               status=TicketStatus.IN_PROGRESS, bike_id=bike.id, technician_id=tech_user.id),
+        Ticket(ticket_number="Q-BLOCKED", problem_description="Blocked", priority=TicketPriority.URGENT,
+               status=TicketStatus.AWAITING_PARTS, bike_id=bike.id, technician_id=tech_user.id),
+        Ticket(ticket_number="Q-DONE", problem_description="Done", priority=TicketPriority.URGENT,
+               status=TicketStatus.COMPLETE, bike_id=bike.id, technician_id=tech_user.id),
+    ]
+    test_db.add_all(tickets)
+    test_db.commit()
+    return tickets
+
+
+def test_read_queue_ordering(client: TestClient, tech_token: str, tech_user, queue_tickets):
+    response = client.get(
+        f"/api/technicians/{tech_user.id}/queue",
+        headers={"Authorization": f"Bearer {tech_token}"},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [entry["ticket_number"] for entry in content] == ["Q-URGENT", "Q-LOW", "Q-BLOCKED"]
+    assert content[-1]["blocked"] is True
+
+
+def test_queue_updates_on_ticket_change(client: TestClient, admin_token: str, tech_user, queue_tickets):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.get(f"/api/technicians/{tech_user.id}/queue", headers=headers)
+    assert response.json()[0]["ticket_number"] == "Q-URGENT"
+
+    # Completing the urgent ticket removes it from the queue
+    urgent = queue_tickets[1]
+    response = client.put(
+        f"/api/tickets/{urgent.id}",
+        headers=headers,
+        json={"status": TicketStatus.COMPLETE.value},
+    )
+    assert response.status_code == 200
+
+    # Parts arriving unblocks the other urgent ticket
+    blocked = queue_tickets[2]
+    response = client.put(
+        f"/api/tickets/{blocked.id}",
+        headers=headers,
+        json={"status": TicketStatus.IN_PROGRESS.value},
+    )
+    assert response.status_code == 200
+
+    response = client.get(f"/api/technicians/{tech_user.id}/queue?limit=5", headers=headers)
+    assert [entry["ticket_number"] for entry in response.json()] == ["Q-BLOCKED", "Q-LOW"]
+    response = client.get(f"/api/technicians/{tech_user.id}/queue?limit=1", headers=headers)
+    assert [entry["ticket_number"] for entry in response.json()] == ["Q-BLOCKED"]
+    # The queue is always bounded
+    response = client.get(f"/api/technicians/{tech_user.id}/queue?limit=501", headers=headers)
+    assert response.status_code == 422
+
+    # Reassigning a ticket moves it out of this technician's queue
+    response = client.put(
+        f"/api/tickets/{blocked.id}",
+        headers=headers,
+        json={"technician_id": 1},
+    )
+    response = client.get(f"/api/technicians/{tech_user.id}/queue", headers=headers)
+    assert [entry["ticket_number"] for entry in response.json()] == ["Q-LOW"]
+
+
+def test_work_queue_stays_compact_under_rescoring():
+    index = WorkQueueIndex()
+    now = datetime(2026, 10, 19, 9, 0)
+    tickets = [
+        Ticket(id=i, ticket_number=f"W-{i}", technician_id=7, status=TicketStatus.INTAKE,
+               priority=TicketPriority.LOW, estimated_completion=now + timedelta(days=i), is_archived=False)
+        for i in range(1, 41)
+    ]
+    for ticket in tickets:
+        index.upsert(ticket)
+    # Rescoring every ticket many times leaves stale entries behind
+    for _ in range(10):
+        for ticket in tickets:
+            ticket.priority = TicketPriority.HIGH if ticket.priority == TicketPriority.LOW else TicketPriority.LOW
+            index.upsert(ticket)
+    index.remove(tickets[0].id)
+
+    assert len(index._heaps[7]) <= 39 / (1 - MAX_STALE_FRACTION) + 1
+    expected = sorted(tickets[1:], key=lambda ticket: ticket.estimated_completion)
+    assert [item.ticket_id for item in index.queue(7, limit=5)] == [ticket.id for ticket in expected[:5]]
+    assert [item.ticket_id for item in index.queue(7, limit=100)] == [ticket.id for ticket in expected]
+
+
+def test_read_other_technician_queue_forbidden(client: TestClient, tech_token: str, tech_user):
+    response = client.get(
+        f"/api/technicians/{tech_user.id + 100}/queue",
+        headers={"Authorization": f"Bearer {tech_token}"},
+    )
+    assert response.status_code == 403
+
+
+def test_auto_assign_least_loaded(client: TestClient, admin_token: str, test_db, tech_user, queue_tickets):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    bike = test_db.query(Bike).first()
+
+    # A second, idle technician with a wheel-building skill tag
+    response = client.post(
+        "/api/users/",
+        headers=headers,
+        json={
+            "email": "wheels@example.com",
+            "username": "wheels",
+            "password": "wheelspassword",
+            "role": UserRole.TECHNICIAN.value,
+            "skills": "wheels, tubeless",
+        },
+    )
+    assert response.status_code == 201
+    idle_id = response.json()["id"]
+
+    response = client.get("/api/technicians/workload", headers=headers)
+    assert response.status_code == 200
+    loads = {load["technician_id"]: load for load in response.json()}
+    assert loads[tech_user.id]["open_tickets"] == 3
+    assert loads[idle_id]["open_tickets"] == 0
+    assert loads[idle_id]["skills"] == ["tubeless", "wheels"]
+
+    # New tickets go to the idle technician until the load evens out
+    ticket_data = {
+        "ticket_number": "Q-NEW-1",
+        "problem_description": "Wheel true",
+        "bike_id": bike.id,
+        "estimated_hours": 2.5,
+    }
+    response = client.post("/api/tickets/?auto_assign=true", headers=headers, json=ticket_data)
+    assert response.status_code == 201
+    assert response.json()["technician_id"] == idle_id
+
+    response = client.get("/api/technicians/workload", headers=headers)
+    loads = {load["technician_id"]: load for load in response.json()}
+    assert loads[idle_id]["open_tickets"] == 1
+    assert loads[idle_id]["estimated_hours"] == 2.5
+
+    # Bulk assignment spreads unassigned tickets across technicians
+    unassigned = [
+        Ticket(ticket_number=f"Q-BULK-{i}", problem_description="Bulk", bike_id=bike.id)
+        for i in range(3)
+    ]
+    test_db.add_all(unassigned)
+    test_db.commit()
+
+    response = client.post("/api/tickets/auto-assign", headers=headers, json={})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["unassigned"] == []
+    assert len(result["assignments"]) == 3
+
+    response = client.get("/api/technicians/workload", headers=headers)
+    loads = {load["technician_id"]: load for load in response.json()}
+    # 2.5h + two 1h tickets vs. three 1h tickets + one more
+    assert loads[idle_id]["open_tickets"] == 3
+    assert loads[tech_user.id]["open_tickets"] == 4
+    assert loads[idle_id]["estimated_hours"] == 4.5
+
+
+def test_auto_assign_skill_tag(client: TestClient, admin_token: str, test_db, tech_user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    bike = test_db.query(Bike).first()
+    tech_user.skills = "suspension"
+    test_db.commit()
+
+    response = client.post(
+        "/api/tickets/?auto_assign=true&policy=skill_tag&skill=Suspension",
+        headers=headers,
+        json={"ticket_number": "Q-FORK", "problem_description": "Fork service", "bike_id": bike.id},
+    )
+    assert response.status_code == 201
+    assert response.json()["technician_id"] == tech_user.id
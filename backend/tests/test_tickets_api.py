@@ -1,3 +1,7 @@
+import socketserver
+import threading
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -12,9 +16,12 @@ from app.models.ticket import Ticket, TicketStatus, TicketPriority
 from app.models.ticket_update import TicketUpdate
 from app.models.ticket_part import TicketPart
 from app.models.part import Part
+from app.models.stock_movement import StockMovement
 from app.models.bike import Bike
 from app.models.customer import Customer
 from app.models.service import Service
+from app.models.notification import Notification, NotificationStatus
+from app.services.notifications import SmtpSender, deliver_pending
 
 
 client = TestClient(app)
@@ -364,6 +371,41 @@ def test_delete_ticket(admin_token, test_db: Session, test_bike):
     assert deleted_ticket is None
 
 
+def test_delete_ticket_unlinks_stock_movements(admin_token, test_db: Session, test_bike, test_part):
+    """Test deleting a ticket returns its parts and leaves no ledger rows pointing at it"""
+    headers = {
+        "Authorization": f"Bearer {admin_token}"
+    }
+    
+    ticket = Ticket(
+        ticket_number="T-TEST-005",
+        problem_description="Test problem to delete",
+        status=TicketStatus.INTAKE,
+        priority=TicketPriority.MEDIUM,
+        bike_id=test_bike.id
+    )
+    test_db.add(ticket)
+    test_db.commit()
+    test_db.refresh(ticket)
+    
+    part_data = {"ticket_id": ticket.id, "part_id": test_part.id, "quantity": 3, "price_charged": 100.00}
+    response = client.post(f"/api/tickets/{ticket.id}/parts", json=part_data, headers=headers)
+    assert response.status_code == 201
+    
+    response = client.delete(f"/api/tickets/{ticket.id}", headers=headers)
+    assert response.status_code == 204
+    
+    response = client.get(f"/api/parts/{test_part.id}/movements", headers=headers)
+    movements = [(m["kind"], m["quantity_change"], m["ticket_id"]) for m in response.json()]
+    assert sorted(movements) == [("adjust", 10, None), ("consume", -3, None), ("return", 3, None)]
+    response = client.get(f"/api/parts/{test_part.id}", headers=headers)
+    assert response.json()["quantity"] == 10
+    
+    # Clean up
+    test_db.query(StockMovement).filter(StockMovement.part_id == test_part.id).delete()
+    test_db.commit()
+
+
 def test_ticket_updates(admin_token, test_db: Session, test_bike):
     """Test ticket updates endpoints"""
     headers = {
@@ -480,4 +522,433 @@ def test_ticket_parts(admin_token, test_db: Session, test_bike, test_part):
     # Clean up
     test_db.query(TicketUpdate).filter(TicketUpdate.ticket_id == ticket.id).delete()
     test_db.query(Ticket).filter(Ticket.id == ticket.id).delete()
-    test_db.commit()
\ No newline at end of file
+    test_db.commit()
+
+def test_reconcile_parts_totals(admin_token, test_db: Session, test_bike, test_part):
+    """Test parts totals are maintained atomically and drift can be repaired"""
+    headers = {
+        "Authorization": f"Bearer {admin_token}"
+    }
+    
+    ticket = Ticket(
+        ticket_number="T-TEST-008",
+        problem_description="Test problem for totals",
+        status=TicketStatus.INTAKE,
+        priority=TicketPriority.MEDIUM,
+        bike_id=test_bike.id
+    )
+    test_db.add(ticket)
+    test_db.commit()
+    test_db.refresh(ticket)
+    
+    part_data = {
+        "ticket_id": ticket.id,
+        "part_id": test_part.id,
+        "quantity": 2,
+        "price_charged": 100.00
+    }
+    response = client.post(f"/api/tickets/{ticket.id}/parts", json=part_data, headers=headers)
+    assert response.status_code == 201
+    
+    response = client.put(
+        f"/api/tickets/{ticket.id}/parts/{test_part.id}",
+        json={"quantity": 3},
+        headers=headers
+    )
+    assert response.status_code == 200
+    
+    response = client.get(f"/api/tickets/{ticket.id}", headers=headers)
+    assert response.json()["total_parts_cost"] == 300.00
+    
+    # Consistent totals report no mismatches
+    response = client.post("/api/tickets/reconcile-parts-totals", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["mismatches"] == []
+    
+    # Simulate drift and repair it
+    test_db.query(Ticket).filter(Ticket.id == ticket.id).update({"total_parts_cost": 42.0})
+    test_db.commit()
+    
+    response = client.post("/api/tickets/reconcile-parts-totals", headers=headers)
+    result = response.json()
+    assert result["fixed"] == 0
+    assert [m["ticket_id"] for m in result["mismatches"]] == [ticket.id]
+    assert result["mismatches"][0]["computed_total"] == 300.00
+    
+    response = client.post("/api/tickets/reconcile-parts-totals?fix=true", headers=headers)
+    assert response.json()["fixed"] == 1
+    
+    response = client.get(f"/api/tickets/{ticket.id}", headers=headers)
+    assert response.json()["total_parts_cost"] == 300.00
+    
+    # Clean up
+    test_db.query(TicketPart).filter(TicketPart.ticket_id == ticket.id).delete()
+    test_db.query(TicketUpdate).filter(TicketUpdate.ticket_id == ticket.id).delete()
+    test_db.query(Ticket).filter(Ticket.id == ticket.id).delete()
+    test_db.commit()
+
+
+def test_ticket_parts_reserve_stock(admin_token, test_db: Session, test_bike, test_part):
+    """Test ticket parts reserve and return stock, with optional backorder"""
+    headers = {
+        "Authorization": f"Bearer {admin_token}"
+    }
+    
+    ticket = Ticket(
+        ticket_number="T-TEST-010",
+        problem_description="Test problem for stock",
+        status=TicketStatus.INTAKE,
+        priority=TicketPriority.MEDIUM,
+        bike_id=test_bike.id
+    )
+    test_db.add(ticket)
+    test_db.commit()
+    test_db.refresh(ticket)
+    
+    def stock():
+        return client.get(f"/api/parts/{test_part.id}", headers=headers).json()["quantity"]
+    
+    part_data = {
+        "ticket_id": ticket.id,
+        "part_id": test_part.id,
+        "quantity": 4,
+        "price_charged": 100.00
+    }
+    response = client.post(f"/api/tickets/{ticket.id}/parts", json=part_data, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["backordered"] is False
+    assert stock() == 6
+    
+    # Growing the line beyond what's on hand fails and changes nothing
+    response = client.put(
+        f"/api/tickets/{ticket.id}/parts/{test_part.id}",
+        json={"quantity": 11},
+        headers=headers
+    )
+    assert response.status_code == 400
+    assert "6 available" in response.json()["detail"]
+    assert stock() == 6
+    
+    response = client.put(
+        f"/api/tickets/{ticket.id}/parts/{test_part.id}",
+        json={"quantity": 10},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert stock() == 0
+    
+    response = client.put(
+        f"/api/tickets/{ticket.id}/parts/{test_part.id}",
+        json={"quantity": 1},
+        headers=headers
+    )
+    assert stock() == 9
+    
+    # Backordering returns the reserved units until stock arrives
+    response = client.put(
+        f"/api/tickets/{ticket.id}/parts/{test_part.id}?backorder=true",
+        json={"quantity": 12},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["backordered"] is True
+    assert stock() == 10
+    
+    response = client.put(f"/api/parts/{test_part.id}/adjust-stock?quantity_change=2", headers=headers)
+    assert response.status_code == 200
+    response = client.put(
+        f"/api/tickets/{ticket.id}/parts/{test_part.id}",
+        json={},
+        headers=headers
+    )
+    assert response.json()["backordered"] is False
+    assert stock() == 0
+    
+    response = client.delete(f"/api/tickets/{ticket.id}/parts/{test_part.id}", headers=headers)
+    assert response.status_code == 204
+    assert stock() == 12
+    
+    # Adding without enough stock fails unless backordered
+    part_data["quantity"] = 20
+    response = client.post(f"/api/tickets/{ticket.id}/parts", json=part_data, headers=headers)
+    assert response.status_code == 400
+    response = client.post(f"/api/tickets/{ticket.id}/parts?backorder=true", json=part_data, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["backordered"] is True
+    assert stock() == 12
+    
+    # Clean up
+    test_db.query(TicketPart).filter(TicketPart.ticket_id == ticket.id).delete()
+    test_db.query(TicketUpdate).filter(TicketUpdate.ticket_id == ticket.id).delete()
+    test_db.query(Ticket).filter(Ticket.id == ticket.id).delete()
+    test_db.commit()
+
+
+def test_update_ticket_version_conflict(admin_token, test_db: Session, test_bike):
+    """Test If-Match rejects updates based on a stale ticket version"""
+    headers = {
+        "Authorization": f"Bearer {admin_token}"
+    }
+    
+    ticket = Ticket(
+        ticket_number="T-TEST-009",
+        problem_description="Original description",
+        status=TicketStatus.INTAKE,
+        priority=TicketPriority.MEDIUM,
+        bike_id=test_bike.id
+    )
+    test_db.add(ticket)
+    test_db.commit()
+    test_db.refresh(ticket)
+    
+    response = client.get(f"/api/tickets/{ticket.id}", headers=headers)
+    etag = response.headers["ETag"]
+    assert response.json()["version"] == 1
+    
+    # First writer succeeds and bumps the version
+    response = client.put(
+        f"/api/tickets/{ticket.id}",
+        json={"diagnosis": "Worn chain"},
+        headers={**headers, "If-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] == '"2"'
+    
+    # Second writer still holding the old version is rejected
+    response = client.put(
+        f"/api/tickets/{ticket.id}",
+        json={"diagnosis": "Bent derailleur"},
+        headers={**headers, "If-Match": etag}
+    )
+    assert response.status_code == 409
+    
+    response = client.get(f"/api/tickets/{ticket.id}", headers=headers)
+    assert response.json()["diagnosis"] == "Worn chain"
+    
+    # Clean up
+    test_db.query(TicketUpdate).filter(TicketUpdate.ticket_id == ticket.id).delete()
+    test_db.query(Ticket).filter(Ticket.id == ticket.id).delete()
+    test_db.commit()
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages, recording them on the server"""
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 test ESMTP")
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 test")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                if address in server.reject:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data in self.rfile:
+                    if data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data.decode())
+                server.messages.append((recipients, "".join(lines)))
+                self.reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 Not implemented")
+
+
+@pytest.fixture
+def smtp_server():
+    """Local stand-in SMTP server on a free port"""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    server.reject = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_status_change_notifications(admin_token, test_db: Session, test_bike, smtp_server):
+    """Test status changes queue customer emails that the worker sends over one connection"""
+    headers = {
+        "Authorization": f"Bearer {admin_token}"
+    }
+    
+    tickets = [
+        Ticket(
+            ticket_number=f"T-TEST-01{i}",
+            problem_description="Needs a tune-up",
+            status=TicketStatus.IN_PROGRESS,
+            priority=TicketPriority.MEDIUM,
+            bike_id=test_bike.id
+        )
+        for i in range(3)
+    ]
+    test_db.add_all(tickets)
+    test_db.commit()
+    
+    # Statuses the customer isn't told about queue nothing
+    response = client.put(
+        f"/api/tickets/{tickets[0].id}", json={"status": TicketStatus.DIAGNOSIS.value}, headers=headers
+    )
+    assert response.status_code == 200
+    assert test_db.query(Notification).count() == 0
+    
+    # Both the ticket update and the status update endpoints queue an email
+    response = client.put(
+        f"/api/tickets/{tickets[0].id}", json={"status": TicketStatus.COMPLETE.value}, headers=headers
+    )
+    assert response.status_code == 200
+    response = client.post(
+        f"/api/tickets/{tickets[1].id}/updates",
+        json={"ticket_id": tickets[1].id, "new_status": TicketStatus.AWAITING_PARTS.value, "note": "Ordered a chain", "user_id": 1},
+        headers=headers
+    )
+    assert response.status_code == 201
+    response = client.put(
+        f"/api/tickets/{tickets[2].id}", json={"status": TicketStatus.COMPLETE.value}, headers=headers
+    )
+    assert response.status_code == 200
+    
+    queued = test_db.query(Notification).order_by(Notification.id).all()
+    assert [n.ticket_id for n in queued] == [tickets[0].id, tickets[1].id, tickets[2].id]
+    assert all(n.status == NotificationStatus.PENDING for n in queued)
+    assert all(n.recipient == "test_customer@example.com" for n in queued)
+    assert "ready for pickup" in queued[0].subject
+    assert "waiting on parts" in queued[1].subject
+    
+    # Nothing is sent until the worker runs; it sends a batch over one connection
+    assert smtp_server.messages == []
+    sender = SmtpSender(host="127.0.0.1", port=smtp_server.server_address[1], timeout=5)
+    try:
+        result = deliver_pending(test_db, sender, batch_size=2)
+        assert (result.sent, result.retried, result.failed) == (2, 0, 0)
+        result = deliver_pending(test_db, sender, batch_size=2)
+        assert (result.sent, result.retried, result.failed) == (1, 0, 0)
+        result = deliver_pending(test_db, sender, batch_size=2)
+        assert (result.sent, result.retried, result.failed) == (0, 0, 0)
+    finally:
+        sender.close()
+    assert smtp_server.connections == 1
+    assert sender.connections_opened == 1
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.messages[0][0] == ["test_customer@example.com"]
+    assert "T-TEST-010" in smtp_server.messages[0][1]
+    
+    test_db.expire_all()
+    assert all(n.status == NotificationStatus.SENT and n.sent_at for n in test_db.query(Notification))
+    
+    # Clean up
+    test_db.query(Notification).delete()
+    test_db.query(TicketUpdate).delete()
+    test_db.query(Ticket).filter(Ticket.id.in_([t.id for t in tickets])).delete()
+    test_db.commit()
+
+
+def test_delete_ticket_keeps_queued_notification(admin_token, test_db: Session, test_bike):
+    """Test deleting a ticket leaves its queued email in the outbox, no longer pointing at it"""
+    headers = {
+        "Authorization": f"Bearer {admin_token}"
+    }
+    
+    ticket = Ticket(
+        ticket_number="T-TEST-020",
+        problem_description="Needs a tune-up",
+        status=TicketStatus.IN_PROGRESS,
+        priority=TicketPriority.MEDIUM,
+        bike_id=test_bike.id
+    )
+    test_db.add(ticket)
+    test_db.commit()
+    
+    response = client.put(
+        f"/api/tickets/{ticket.id}", json={"status": TicketStatus.COMPLETE.value}, headers=headers
+    )
+    assert response.status_code == 200
+    response = client.delete(f"/api/tickets/{ticket.id}", headers=headers)
+    assert response.status_code == 204
+    
+    test_db.expire_all()
+    notification = test_db.query(Notification).one()
+    assert notification.ticket_id is None
+    assert notification.status == NotificationStatus.PENDING
+    
+    # Clean up
+    test_db.query(Notification).delete()
+    test_db.query(TicketUpdate).delete()
+    test_db.commit()
+
+
+def test_notification_retries_with_backoff(test_db: Session, smtp_server):
+    """Test failed sends are retried with growing delays until the attempts run out"""
+    smtp_server.reject.add("bounce@example.com")
+    test_db.add_all([
+        Notification(recipient="bounce@example.com", subject="Ready", body="Ready"),
+        Notification(recipient="ok@example.com", subject="Ready", body="Ready"),
+    ])
+    test_db.commit()
+    bounce, ok = test_db.query(Notification).order_by(Notification.id).all()
+    
+    sender = SmtpSender(host="127.0.0.1", port=smtp_server.server_address[1], timeout=5)
+    now = datetime.utcnow()
+    try:
+        # A refused recipient doesn't hold up the rest of the batch
+        result = deliver_pending(test_db, sender, max_attempts=3, now=now)
+        assert (result.sent, result.retried, result.failed) == (1, 1, 0)
+        assert ok.status == NotificationStatus.SENT
+        assert bounce.status == NotificationStatus.PENDING
+        assert bounce.attempts == 1
+        assert bounce.next_attempt_at == now + timedelta(minutes=1)
+        assert "SMTPRecipientsRefused" in bounce.last_error
+        
+        # Not due again until the backoff has passed
+        result = deliver_pending(test_db, sender, max_attempts=3, now=now + timedelta(seconds=30))
+        assert (result.sent, result.retried, result.failed) == (0, 0, 0)
+        
+        now += timedelta(minutes=1)
+        result = deliver_pending(test_db, sender, max_attempts=3, now=now)
+        assert (result.sent, result.retried, result.failed) == (0, 1, 0)
+        assert bounce.next_attempt_at == now + timedelta(minutes=2)
+        
+        result = deliver_pending(test_db, sender, max_attempts=3, now=now + timedelta(minutes=2))
+        assert (result.sent, result.retried, result.failed) == (0, 0, 1)
+        assert bounce.status == NotificationStatus.FAILED
+        assert bounce.attempts == 3
+    finally:
+        sender.close()
+    
+    # An unreachable server counts as a failed attempt for the whole batch
+    test_db.add(Notification(recipient="later@example.com", subject="Ready", body="Ready"))
+    test_db.commit()
+    smtp_server.shutdown()
+    smtp_server.server_close()
+    sender = SmtpSender(host="127.0.0.1", port=smtp_server.server_address[1], timeout=5)
+    result = deliver_pending(test_db, sender)
+    assert (result.sent, result.retried, result.failed) == (0, 1, 0)
+    
+    # Clean up
+    test_db.query(Notification).delete()
+    test_db.commit()
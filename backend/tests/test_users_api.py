@@ -14,6 +14,7 @@ from app.models.part import Part
 from app.models.ticket_part import TicketPart
 from app.models.ticket_update import TicketUpdate
 from app.models.service import Service
+from app.models.stock_movement import MovementKind, StockMovement
 from main import app
 
 
@@ -334,4 +335,30 @@ def test_delete_user_unauthorized(client: TestClient, tech_token: str):
         headers={"Authorization": f"Bearer {tech_token}"}
     )
     
-    assert response.status_code == 403
\ No newline at end of file
+    assert response.status_code == 403
+
+
+def test_delete_user_with_ticket_history(client: TestClient, admin_token: str, test_db):
+    tech = test_db.query(User).filter(User.email == "tech@example.com").first()
+    bike = Bike(name="Test Bike")
+    test_db.add(bike)
+    test_db.flush()
+    test_db.add(Ticket(ticket_number="T-1", problem_description="Flat", bike_id=bike.id, technician_id=tech.id))
+    test_db.commit()
+
+    response = client.delete(f"/api/users/{tech.id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+    assert "1 tickets" in response.json()["detail"]
+
+
+def test_delete_user_with_stock_history(client: TestClient, admin_token: str, test_db):
+    tech = test_db.query(User).filter(User.email == "tech@example.com").first()
+    part = Part(name="Chain", sku="CH-1", quantity=5, cost_price=10.0, retail_price=20.0)
+    test_db.add(part)
+    test_db.flush()
+    test_db.add(StockMovement(part_id=part.id, kind=MovementKind.ADJUST, quantity_change=5, user_id=tech.id))
+    test_db.commit()
+
+    response = client.delete(f"/api/users/{tech.id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+    assert "1 stock movements" in response.json()["detail"]
@@ -33,14 +33,13 @@ export const CustomerSelector: React.FC<CustomerSelectorProps> = ({
       setError('');
       
       try {
-        const results = await customerService.getCustomers();
-        // Filter customers by search term (name, email, phone)
-        const filtered = results.filter(customer => 
-          customer.full_name.toLowerCase().includes(term.toLowerCase()) ||
-          customer.email.toLowerCase().includes(term.toLowerCase()) ||
-          customer.phone.includes(term)
-        );
-        setCustomers(filtered);
+        // Phone numbers are matched on their last digits, anything else by
+        // ranked, typo-tolerant name/email search
+        const isPhone = /^[\d\s()+.-]+$/.test(term) && term.replace(/\D/g, '').length >= 3;
+        const results = isPhone
+          ? await customerService.findCustomersByPhone(term)
+          : await customerService.searchCustomers(term);
+        setCustomers(results);
       } catch (err) {
         console.error('Error searching customers:', err);
         setError('Failed to search customers');
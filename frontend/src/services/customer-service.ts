@@ -46,6 +46,24 @@ export const customerService = {
     return apiClient.get<Customer[]>(`/customers/?skip=${skip}&limit=${limit}`);
   },
 
+  /**
+   * Fuzzy search customers by name or email, best matches first
+   */
+  searchCustomers: async (query: string, limit = 20): Promise<Customer[]> => {
+    return apiClient.get<Customer[]>(
+      `/customers/fuzzy?q=${encodeURIComponent(query)}&limit=${limit}`
+    );
+  },
+
+  /**
+   * Find customers whose phone number ends with the given digits
+   */
+  findCustomersByPhone: async (phone: string, limit = 20): Promise<Customer[]> => {
+    return apiClient.get<Customer[]>(
+      `/customers/?phone=${encodeURIComponent(phone)}&phone_match=suffix&limit=${limit}`
+    );
+  },
+
   /**
    * Get customer by ID
    */